@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import type { CompositeRanking } from '../types';
+import type { SlimCompositeRanking } from '../types';
 import { compositeAPI } from '../services/api';
 import { CollegeCard } from './CollegeCard';
 import { Loader2 } from 'lucide-react';
@@ -16,7 +16,7 @@ export const CompositeRankingView: React.FC<CompositeRankingViewProps> = ({
   onCollegeClick,
   theme,
 }) => {
-  const [rankings, setRankings] = useState<CompositeRanking[]>([]);
+  const [rankings, setRankings] = useState<SlimCompositeRanking[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -29,7 +29,7 @@ export const CompositeRankingView: React.FC<CompositeRankingViewProps> = ({
         setError(null);
         
         // Fetch all pages of rankings
-        let allRankings: CompositeRanking[] = [];
+        let allRankings: SlimCompositeRanking[] = [];
         let page = 1;
         let hasMore = true;
         
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { ExternalLink, MapPin, Award, ChevronLeft, ChevronRight } from 'lucide-react';
 import { rankingsAPI } from '../services/api';
-import type { CollegeRanking, RankingSource } from '../types';
+import type { SlimCollegeRanking, RankingSource } from '../types';
 import { ThemePreset } from './particlePresets';
 
 interface IndexRankingViewProps {
@@ -15,7 +15,7 @@ export const IndexRankingView: React.FC<IndexRankingViewProps> = ({
   onCollegeClick,
   theme,
 }) => {
-  const [rankings, setRankings] = useState<CollegeRanking[]>([]);
+  const [rankings, setRankings] = useState<SlimCollegeRanking[]>([]);
   const [source, setSource] = useState<RankingSource | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { Header, StrengthsWeaknesses } from '../components';
 import { ParticlePresetKey, PARTICLE_PRESETS, ThemePreset } from '../components/particlePresets';
 import type { CollegeDetail, StrengthAnalysis } from '../types';
-import { collegeAPI, analysisAPI } from '../services/api';
+import { collegeAPI } from '../services/api';
 import { Loader2, ArrowLeft, Globe, MapPin, Calendar, ExternalLink, CheckCircle, XCircle, TrendingUp } from 'lucide-react';
 
 // All ranking sources with metadata
@@ -56,14 +56,13 @@ export const CollegeDetailPage: React.FC<CollegeDetailProps> = ({ currentPreset,
         setLoading(true);
         setError(null);
 
-        const collegeData = await collegeAPI.getById(parseInt(id));
+        const collegeData = await collegeAPI.getBundle(parseInt(id), ['analysis']);
         setCollege(collegeData);
 
-        try {
-          const analysisData = await analysisAPI.analyze(parseInt(id));
-          setAnalysis(analysisData);
-        } catch (analysisErr) {
-          console.warn('Analysis not available:', analysisErr);
+        if (collegeData.analysis) {
+          setAnalysis(collegeData.analysis);
+        } else {
+          console.warn('Analysis not available');
         }
       } catch (err) {
         setError('Failed to load college details');
@@ -8,7 +8,15 @@ import type {
   CollegeRanking,
   RankingSource,
   CollegeDetail,
+  CollegeBundle,
   CompositeRanking,
+  SlimCollegeRanking,
+  SlimCompositeRanking,
+  CustomCompositeOptions,
+  CustomCompositeResponse,
+  MoversResponse,
+  AgreementResponse,
+  BulkStrengthAnalysis,
   StrengthAnalysis,
   PaginatedResponse,
   ComparisonData,
@@ -63,6 +71,17 @@ export const collegeAPI = {
     return response.data;
   },
 
+  // Get college detail bundled with analysis/breakdown/similar in one request
+  getBundle: async (
+    id: number,
+    include: Array<'analysis' | 'breakdown' | 'similar'> = ['analysis']
+  ): Promise<CollegeBundle> => {
+    const response = await api.get<CollegeBundle>(`/colleges/${id}/`, {
+      params: { include: include.join(',') },
+    });
+    return response.data;
+  },
+
   // Search colleges
   search: async (
     query: string,
@@ -103,9 +122,9 @@ export const rankingsAPI = {
     sourceCode: string,
     page = 1,
     pageSize = 100
-  ): Promise<PaginatedResponse<CollegeRanking> & { source?: RankingSource }> => {
-    const response = await api.get<PaginatedResponse<CollegeRanking> & { source?: RankingSource }>('/rankings/by_source/', {
-      params: { source: sourceCode, page, page_size: pageSize },
+  ): Promise<PaginatedResponse<SlimCollegeRanking> & { source?: RankingSource }> => {
+    const response = await api.get<PaginatedResponse<SlimCollegeRanking> & { source?: RankingSource }>('/rankings/by_source/', {
+      params: { source: sourceCode, page, page_size: pageSize, preset: 'slim' },
     });
     return response.data;
   },
@@ -122,22 +141,43 @@ export const rankingsAPI = {
  */
 export const compositeAPI = {
   // Get international composite rankings
-  getInternational: async (page = 1, pageSize = 100): Promise<PaginatedResponse<CompositeRanking>> => {
-    const response = await api.get<PaginatedResponse<CompositeRanking>>(
+  getInternational: async (page = 1, pageSize = 100): Promise<PaginatedResponse<SlimCompositeRanking>> => {
+    const response = await api.get<PaginatedResponse<SlimCompositeRanking>>(
       '/composite-rankings/international/',
-      { params: { page, page_size: pageSize } }
+      { params: { page, page_size: pageSize, preset: 'slim' } }
     );
     return response.data;
   },
 
   // Get American composite rankings
-  getAmerican: async (page = 1, pageSize = 100): Promise<PaginatedResponse<CompositeRanking>> => {
-    const response = await api.get<PaginatedResponse<CompositeRanking>>(
+  getAmerican: async (page = 1, pageSize = 100): Promise<PaginatedResponse<SlimCompositeRanking>> => {
+    const response = await api.get<PaginatedResponse<SlimCompositeRanking>>(
       '/composite-rankings/american/',
-      { params: { page, page_size: pageSize } }
+      { params: { page, page_size: pageSize, preset: 'slim' } }
     );
     return response.data;
   },
+
+  // Get a composite with user-chosen source weights, e.g. { qs: 40, the: 40, arwu: 20 }
+  getCustom: async (
+    weights: Record<string, number>,
+    options: CustomCompositeOptions = {},
+    page = 1,
+    pageSize = 100
+  ): Promise<CustomCompositeResponse> => {
+    const response = await api.get<CustomCompositeResponse>('/composite-rankings/custom/', {
+      params: {
+        weights: Object.entries(weights).map(([code, weight]) => `${code}:${weight}`).join(','),
+        year: options.year,
+        min_sources: options.minSources,
+        missing: options.missing,
+        page,
+        page_size: pageSize,
+        preset: 'slim',
+      },
+    });
+    return response.data;
+  },
 };
 
 /**
@@ -164,6 +204,41 @@ export const analysisAPI = {
     });
     return response.data;
   },
+
+  // Analyze many colleges in one request
+  analyzeMany: async (collegeIds: number[], year?: number): Promise<BulkStrengthAnalysis> => {
+    const response = await api.post<BulkStrengthAnalysis>('/analysis/bulk/', {
+      college_ids: collegeIds,
+      year,
+    });
+    return response.data;
+  },
+};
+
+/**
+ * Year-over-year movers API endpoints
+ */
+export const moversAPI = {
+  // Biggest rank gains and drops for a source code or 'composite-international' / 'composite-american'
+  get: async (source: string, fromYear?: number, toYear?: number, limit = 20): Promise<MoversResponse> => {
+    const response = await api.get<MoversResponse>('/movers/', {
+      params: { source, from_year: fromYear, to_year: toYear, limit },
+    });
+    return response.data;
+  },
+};
+
+/**
+ * Cross-source agreement API endpoints
+ */
+export const agreementAPI = {
+  // Pairwise source correlations and the colleges the sources disagree on most
+  get: async (year?: number, limit = 20): Promise<AgreementResponse> => {
+    const response = await api.get<AgreementResponse>('/agreement/', {
+      params: { year, limit },
+    });
+    return response.data;
+  },
 };
 
 /**
@@ -36,8 +36,21 @@ export interface CollegeRanking {
   research_impact?: number;
   international_diversity?: number;
   teaching_quality?: number;
+  categories?: RankingCategory[];
 }
 
+export interface RankingCategory {
+  id: number;
+  category_type: string;
+  category_display: string;
+  strength_level: 'EXCEPTIONAL' | 'STRONG' | 'AVERAGE' | 'WEAK';
+  score: number | null;
+  description: string;
+}
+
+// Row shape returned with ?preset=slim for the ranking tables
+export type SlimCollegeRanking = Pick<CollegeRanking, 'id' | 'college' | 'rank' | 'score' | 'ranking_year'>;
+
 export interface CollegeDetail extends College {
   rankings: CollegeRanking[];
   composite_score_international?: number;
@@ -49,13 +62,33 @@ export interface CompositeRanking {
   composite_score: number;
   region: 'INTERNATIONAL' | 'AMERICAN';
   rankings_count: number;
+  // Cosine similarity (-1 to 1) to the college asked about, on similar-college rows
+  similarity?: number;
+}
+
+// Row shape returned with ?preset=slim for the composite views
+export type SlimCompositeRanking = Pick<CompositeRanking, 'college' | 'composite_score'>;
+
+export interface MetricStanding {
+  metric: string;
+  score: number;
+  // Share of colleges (0-100) with a lower average for this metric in the same year
+  percentile: number;
 }
 
 export interface StrengthAnalysis {
   college: College;
-  strengths: Array<{ metric: string; score: number }>;
-  weaknesses: Array<{ metric: string; score: number }>;
+  year: number | null;
+  strengths: MetricStanding[];
+  weaknesses: MetricStanding[];
   all_metrics: Record<string, number>;
+  percentiles: Record<string, number>;
+}
+
+export interface BulkStrengthAnalysis {
+  year: number | null;
+  results: StrengthAnalysis[];
+  missing: number[];
 }
 
 export interface PaginatedResponse<T> {
@@ -65,6 +98,56 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+export type MissingDataPolicy = 'renormalize' | 'zero' | 'exclude';
+
+export interface CustomCompositeOptions {
+  year?: number;
+  minSources?: number;
+  missing?: MissingDataPolicy;
+}
+
+export interface CustomCompositeResponse extends PaginatedResponse<SlimCompositeRanking> {
+  weights: Record<string, number>;
+  year: number | null;
+  min_sources: number;
+  missing: MissingDataPolicy;
+}
+
+export interface Mover {
+  college: College;
+  from_rank: number;
+  to_rank: number;
+  change: number;
+}
+
+export interface MoversResponse {
+  source: string;
+  from_year: number;
+  to_year: number;
+  ranked_both_years: number;
+  gainers: Mover[];
+  decliners: Mover[];
+}
+
+export interface Disagreement {
+  college: College;
+  // Variance of the normalized rank (0 = first, 1 = last) across sources
+  disagreement: number;
+  ranks: Record<string, number>;
+  normalized_ranks: Record<string, number>;
+}
+
+export interface AgreementResponse {
+  year: number | null;
+  sources: string[];
+  // Square matrices in ``sources`` order; null where too few colleges are shared
+  shared: number[][];
+  spearman: (number | null)[][];
+  kendall: (number | null)[][];
+  colleges_compared: number;
+  disagreements: Disagreement[];
+}
+
 export interface ComparisonData {
   college: College;
   rankings: CollegeRanking[];
@@ -82,3 +165,9 @@ export interface RankingsBreakdown {
   };
   all_rankings: CollegeRanking[];
 }
+
+export interface CollegeBundle extends CollegeDetail {
+  analysis?: StrengthAnalysis;
+  breakdown?: RankingsBreakdown;
+  similar?: CompositeRanking[];
+}
@@ -35,7 +35,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'rankings.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'rankings.middleware.ReadReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,6 +78,42 @@ DATABASES = {
     )
 }
 
+# Optional read replica: safe requests read from it, writes and ingest
+# commands use the primary (rankings.routers). Two SQLite files or two local
+# Postgres databases work for local testing.
+READ_REPLICA_ALIAS = 'replica'
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES[READ_REPLICA_ALIAS] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    # Tests read the primary's test database through the replica alias
+    DATABASES[READ_REPLICA_ALIAS]['TEST'] = {'MIRROR': 'default'}
+
+# Read-only SQLite snapshot of the active dataset (rankings.sqlite_snapshot),
+# rebuilt after each ingest when a path is set. SERVE_SQLITE_SNAPSHOT serves
+# the reads of GET requests for rankings data from it in place of a replica.
+SQLITE_SNAPSHOT_PATH = config('SQLITE_SNAPSHOT_PATH', default='')
+SERVE_SQLITE_SNAPSHOT = config('SERVE_SQLITE_SNAPSHOT', default=False, cast=bool)
+# Apps whose reads may go to the replica (None: all)
+READ_REPLICA_APP_LABELS = None
+if SERVE_SQLITE_SNAPSHOT and SQLITE_SNAPSHOT_PATH and not REPLICA_DATABASE_URL:
+    DATABASES[READ_REPLICA_ALIAS] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{SQLITE_SNAPSHOT_PATH}?mode=ro&immutable=1',
+        # A connection per request picks up a rebuilt snapshot
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICA_APP_LABELS = ['rankings']
+DATABASE_ROUTERS = ['rankings.routers.ReadReplicaRouter']
+# Seconds a client that wrote keeps reading from the primary
+READ_YOUR_WRITES_SECONDS = config('READ_YOUR_WRITES_SECONDS', default=10, cast=int)
+# Seconds before retrying a replica that refused connections
+REPLICA_RETRY_SECONDS = 30
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,6 +141,14 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Pre-rendered API snapshots, published after each ingest and served at
+# /api-snapshot/ by a view that follows the current snapshot (kept outside
+# STATIC_ROOT: WhiteNoise indexes static files once per worker)
+API_SNAPSHOT_ROOT = config('API_SNAPSHOT_ROOT', default=str(BASE_DIR / 'api-snapshots'))
+API_SNAPSHOT_PAGE_SIZE = 100
+API_SNAPSHOT_KEEP = 2
+API_SNAPSHOT_PUBLISH_ON_INGEST = config('API_SNAPSHOT_PUBLISH_ON_INGEST', default=True, cast=bool)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -128,7 +174,11 @@ CORS_ALLOW_HEADERS = [
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'rankings.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'rankings.pagination.CachedCountPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'rest_framework.filters.SearchFilter',
@@ -142,14 +192,46 @@ REST_FRAMEWORK = {
     ]
 }
 
-# Cache Configuration
+# Unfiltered list pages of tables at least this large report PostgreSQL's
+# row estimate instead of counting (``count_exact: false`` in the response)
+PAGINATION_ESTIMATE_MIN_ROWS = config('PAGINATION_ESTIMATE_MIN_ROWS', default=1_000_000, cast=int)
+
+# Response compression (brotli preferred, gzip fallback) for API payloads
+API_COMPRESSION_MIN_BYTES = 1024
+API_COMPRESSION_GZIP_LEVEL = 6
+API_COMPRESSION_BROTLI_QUALITY = 4
+
+# In-memory rankings matrix: reload in a background thread after ingests
+# (readers keep the previous matrix meanwhile); inline reload in development
+READ_MODEL_BACKGROUND_RELOAD = config('READ_MODEL_BACKGROUND_RELOAD', default=not DEBUG, cast=bool)
+
+# Cache Configuration: a bounded per-process LRU (rankings.cache_backends) in
+# front of the shared cache, Redis when CACHE_URL is set
+CACHE_URL = config('CACHE_URL', default='')
 CACHES = {
     'default': {
+        'BACKEND': 'rankings.cache_backends.TieredCache',
+        'LOCATION': 'shared',
+        'TIMEOUT': 3600,  # 1 hour
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_LOCAL_MAX_ENTRIES', default=1000, cast=int),
+            'MAX_BYTES': config('CACHE_LOCAL_MAX_BYTES', default=32 * 1024 * 1024, cast=int),
+            'LOCAL_TIMEOUT': 60,
+        },
+    },
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'college-rankings-cache',
-        'TIMEOUT': 3600,  # 1 hour
-    }
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
 }
+if CACHE_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+        'TIMEOUT': 3600,
+    }
 
 # Celery Configuration (optional, for production)
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
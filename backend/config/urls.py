@@ -11,6 +11,10 @@ from rankings.views import (
     CompositeRankingViewSet,
     ComparisonViewSet,
     StrengthsWeaknessesViewSet,
+    MoversViewSet,
+    AgreementViewSet,
+    ExportViewSet,
+    api_snapshot,
 )
 
 router = DefaultRouter()
@@ -20,9 +24,13 @@ router.register(r'sources', RankingSourceViewSet, basename='source')
 router.register(r'composite-rankings', CompositeRankingViewSet, basename='composite-ranking')
 router.register(r'comparison', ComparisonViewSet, basename='comparison')
 router.register(r'analysis', StrengthsWeaknessesViewSet, basename='analysis')
+router.register(r'movers', MoversViewSet, basename='movers')
+router.register(r'agreement', AgreementViewSet, basename='agreement')
+router.register(r'export', ExportViewSet, basename='export')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('api-snapshot/<path:path>', api_snapshot, name='api-snapshot'),
     path('api-auth/', include('rest_framework.urls')),
 ]
@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration, loaded automatically from the working directory
+
+The application is imported once in the master (``preload_app``), and so
+is the URLconf with the views, DRF and NumPy (``when_ready``), so workers
+fork with them already imported. Each worker then warms itself up in
+``post_fork`` (database connections have to be opened after the fork)
+before it accepts its first request.
+"""
+
+preload_app = True
+
+
+def when_ready(server):
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    from rankings.warmup import warm_up
+
+    for path, status, seconds in warm_up(application=server.app.wsgi()):
+        server.log.debug('Warm-up GET %s: %s in %.0fms', path, status, seconds * 1000)
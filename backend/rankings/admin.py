@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import College, CollegeRanking, RankingSource, RankingCategory, CacheMetadata
+from .models import (
+    College,
+    CollegeRanking,
+    RankingSource,
+    RankingCategory,
+    CacheMetadata,
+    DatasetVersion,
+)
 
 
 @admin.register(RankingSource)
@@ -36,3 +43,10 @@ class RankingCategoryAdmin(admin.ModelAdmin):
 class CacheMetadataAdmin(admin.ModelAdmin):
     list_display = ['source', 'fetch_status', 'last_fetch_time', 'colleges_fetched']
     list_filter = ['fetch_status']
+
+
+@admin.register(DatasetVersion)
+class DatasetVersionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'label', 'status', 'rankings_count', 'created_at', 'activated_at']
+    list_filter = ['status']
+    readonly_fields = ['rankings_count', 'activated_at']
@@ -0,0 +1,196 @@
+"""
+Rank aggregation over the rankings matrix
+
+Averaging raw scores mixes scales (every source publishes its own), so the
+composite endpoints can also combine the sources' *ranks*:
+
+    borda       mean normalized Borda points over the sources ranking a
+                college (1.0 for first place, approaching 0 for last)
+    median      median rank across sources
+    geomean     geometric mean of the ranks, which damps outlier sources
+    kemeny      Kemeny-Young approximation: start from the Borda order and
+                swap adjacent colleges while a majority of the sources that
+                rank either of them prefer the lower one ("local
+                Kemenization"), so no adjacent pair contradicts the majority
+
+Every function takes a (C, S) float rank array with NaN where a source does
+not rank a college, and returns ``(order, values)``: row indexes best
+first, and a per-row value (NaN for colleges no source ranks). A college a
+source ranks beats one it does not.
+
+Results are precomputed per region and year into ``AggregateRanking`` by the
+post-ingest pipeline (``rebuild_aggregates``).
+"""
+
+import logging
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+
+from .models import AggregateRanking
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('borda', 'median', 'geomean', 'kemeny')
+KEMENY_MAX_PASSES = 2000
+
+# Whether a larger value is better, per method
+HIGHER_IS_BETTER = {
+    'borda': True,
+    'median': False,
+    'geomean': False,
+    'kemeny': False,
+}
+
+
+def _order(values, higher_is_better, tie_break=None):
+    """Rows with a value, best first; ties by ``tie_break`` (default row index)"""
+    rows = np.flatnonzero(~np.isnan(values))
+    keys = -values[rows] if higher_is_better else values[rows]
+    tie_break = rows if tie_break is None else tie_break[rows]
+    return rows[np.lexsort((tie_break, keys))]
+
+
+def competition_ranks(ranks):
+    """Re-rank each source's column 1..n (ties share the lowest rank) so gaps don't matter"""
+    positions = np.full(ranks.shape, np.nan)
+    for s in range(ranks.shape[1]):
+        column = ranks[:, s]
+        ranked = ~np.isnan(column)
+        ordered = np.sort(column[ranked])
+        positions[ranked, s] = np.searchsorted(ordered, column[ranked], side='left') + 1
+    return positions
+
+
+def borda(ranks, tie_break=None):
+    positions = competition_ranks(ranks)
+    sizes = (~np.isnan(positions)).sum(axis=0)
+    points = (sizes - positions + 1) / np.maximum(sizes, 1)
+    ranked = ~np.isnan(points)
+    counts = ranked.sum(axis=1)
+    values = np.full(len(ranks), np.nan)
+    np.divide(np.where(ranked, points, 0.0).sum(axis=1), counts, out=values, where=counts > 0)
+    return _order(values, True, tie_break), values
+
+
+def median_rank(ranks, tie_break=None):
+    values = np.full(len(ranks), np.nan)
+    ranked = (~np.isnan(ranks)).any(axis=1)
+    values[ranked] = np.nanmedian(ranks[ranked], axis=1)
+    return _order(values, False, tie_break), values
+
+
+def geomean_rank(ranks, tie_break=None):
+    logs = np.log(np.clip(ranks, 1, None))
+    ranked = ~np.isnan(logs)
+    counts = ranked.sum(axis=1)
+    means = np.full(len(ranks), np.nan)
+    np.divide(np.where(ranked, logs, 0.0).sum(axis=1), counts, out=means, where=counts > 0)
+    return _order(np.exp(means), False, tie_break), np.exp(means)
+
+
+def adjacent_preferences(ranks, upper, lower):
+    """
+    Net number of sources preferring ``lower`` over ``upper``, pair by pair.
+
+    Rows of the pairwise-preference matrix are computed on demand for the
+    pairs being compared; the full C x C matrix is never materialized.
+    """
+    a, b = ranks[upper], ranks[lower]
+    return (b < a).sum(axis=1) - (a < b).sum(axis=1)
+
+
+def kemeny(ranks, tie_break=None, initial=None, max_passes=KEMENY_MAX_PASSES):
+    """
+    Locally Kemeny-optimal order by odd-even adjacent transpositions.
+
+    Each swap strictly lowers the total pairwise disagreement with the
+    sources, and every pass handles all even (then all odd) adjacent pairs
+    at once. The value returned for each college is its aggregate position.
+    If ``max_passes`` runs out first, the order is returned as it stands
+    (not locally optimal) and a warning is logged.
+    """
+    if initial is None:
+        initial, _ = borda(ranks, tie_break)
+    order = np.array(initial, dtype=np.int64)
+    comparable = np.where(np.isnan(ranks), np.inf, ranks)
+
+    for _ in range(max_passes):
+        swapped = False
+        for parity in (0, 1):
+            upper = order[parity:len(order) - 1:2]
+            lower = order[parity + 1::2][:len(upper)]
+            swap = adjacent_preferences(comparable, upper, lower) > 0
+            if swap.any():
+                upper_slots = np.arange(parity, parity + 2 * len(upper), 2)[swap]
+                order[upper_slots], order[upper_slots + 1] = lower[swap], upper[swap]
+                swapped = True
+        if not swapped:
+            break
+    else:
+        logger.warning(
+            'Kemeny aggregation of %d colleges stopped after %d passes without converging; '
+            'the order is not locally Kemeny-optimal', len(order), max_passes,
+        )
+
+    values = np.full(len(ranks), np.nan)
+    values[order] = np.arange(1, len(order) + 1)
+    return order, values
+
+
+AGGREGATORS = {
+    'borda': borda,
+    'median': median_rank,
+    'geomean': geomean_rank,
+    'kemeny': kemeny,
+}
+
+
+def aggregate(ranks, method, tie_break=None):
+    """Run one aggregation method; see the module docstring"""
+    if method not in AGGREGATORS:
+        raise ValueError(f"method must be one of: {', '.join(METHODS)}")
+    return AGGREGATORS[method](ranks, tie_break)
+
+
+def region_ranks(matrix, region, year):
+    """(C, S) ranks of a region's sources for one year of the matrix"""
+    position = matrix.year_position(year)
+    sources = matrix.region_sources(region)
+    if position is None:
+        return np.full((len(matrix.college_ids), int(sources.sum())), np.nan)
+    return matrix.rank[:, sources, position].astype(np.float64)
+
+
+def build_aggregates(matrix):
+    """Yield unsaved ``AggregateRanking`` rows for every region, year and method"""
+    for region in sorted(set(matrix.source_regions.tolist())):
+        for year in matrix.years.tolist():
+            ranks = region_ranks(matrix, region, year)
+            counts = (~np.isnan(ranks)).sum(axis=1)
+            for method in METHODS:
+                order, values = aggregate(ranks, method)
+                for position, row in enumerate(order.tolist(), start=1):
+                    yield AggregateRanking(
+                        region=region,
+                        ranking_year=year,
+                        method=method,
+                        college_id=int(matrix.college_ids[row]),
+                        position=position,
+                        value=float(values[row]),
+                        sources_count=int(counts[row]),
+                        dataset_version=matrix.version,
+                    )
+
+
+def rebuild_aggregates(matrix, batch_size=1000):
+    """Replace every precomputed aggregate with ones computed from ``matrix``"""
+    rows = build_aggregates(matrix)
+    created = 0
+    with transaction.atomic():
+        AggregateRanking.objects.all().delete()
+        while batch := list(islice(rows, batch_size)):
+            AggregateRanking.objects.bulk_create(batch)
+            created += len(batch)
+    return created
@@ -0,0 +1,195 @@
+"""
+Cross-source agreement
+
+How closely the sources agree, per year: Spearman's rho and Kendall's
+tau-b between every pair of sources over the colleges both of them rank,
+and a disagreement score per college, i.e. the variance of its normalized
+rank across the sources that rank it. A normalized rank is the college's
+position within a source's list for the year, from 0.0 (first) to 1.0
+(last), so lists of different lengths are comparable.
+
+Everything works on the rankings matrix with vectorized rank arithmetic:
+average ranks come from ``np.unique``, and the discordant pairs behind
+Kendall's tau are counted with a bottom-up merge sort done as one
+``np.sort`` per level, so a pair of 100k-college lists takes tens of
+milliseconds rather than the quadratic pair comparison. Results are cached
+per dataset version and year.
+"""
+
+import numpy as np
+
+from .caching import cached
+from .models import College
+from .serializers import CollegeSerializer
+
+MIN_SHARED = 3
+MIN_SOURCES = 2
+DISAGREEMENT_LIMIT = 20
+MAX_DISAGREEMENTS = 100
+AGREEMENT_CACHE_TIMEOUT = 60 * 60
+
+
+def average_ranks(values):
+    """1-based ranks of ``values``; tied values share the mean of their ranks"""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return (ends - (counts - 1) / 2.0)[inverse.reshape(-1)]
+
+
+def tied_pairs(*columns):
+    """Number of pairs of rows equal in every one of ``columns``"""
+    n = len(columns[0])
+    if n < 2:
+        return 0
+    order = np.lexsort(columns[::-1])
+    changed = np.zeros(n - 1, dtype=bool)
+    for column in columns:
+        column = column[order]
+        changed |= column[1:] != column[:-1]
+    starts = np.flatnonzero(np.concatenate([[True], changed]))
+    counts = np.diff(np.append(starts, n)).astype(np.int64)
+    return int((counts * (counts - 1) // 2).sum())
+
+
+def count_inversions(values):
+    """Pairs ``i < j`` with ``values[i] > values[j]`` (ties are not inversions)"""
+    n = len(values)
+    codes = np.unique(values, return_inverse=True)[1].reshape(-1).astype(np.int64)
+    index = np.arange(n)
+    inversions = 0
+    width = 1
+    while width < n:
+        # Blocks of ``width`` are sorted; offsetting each pair of blocks by
+        # pair * n keeps all left blocks in one globally sorted array
+        pair = index // (2 * width)
+        left = (index // width) % 2 == 0
+        keys = pair * n + codes
+        left_keys = keys[left]
+        right_keys = keys[~left]
+        not_greater = np.searchsorted(left_keys, right_keys, side='right')
+        block_end = np.searchsorted(left_keys, (pair[~left] + 1) * n, side='left')
+        inversions += int((block_end - not_greater).sum())
+        codes = np.sort(keys) % n
+        width *= 2
+    return inversions
+
+
+def spearman(a, b):
+    """Spearman's rho of two equally long rank arrays, or ``None`` if undefined"""
+    if len(a) < MIN_SHARED:
+        return None
+    x = average_ranks(a)
+    y = average_ranks(b)
+    x -= x.mean()
+    y -= y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    return float((x * y).sum() / denominator) if denominator > 0 else None
+
+
+def kendall_tau(a, b):
+    """Kendall's tau-b of two equally long rank arrays, or ``None`` if undefined"""
+    n = len(a)
+    if n < MIN_SHARED:
+        return None
+    order = np.lexsort((b, a))
+    a, b = a[order], b[order]
+    pairs = n * (n - 1) // 2
+    a_ties = tied_pairs(a)
+    b_ties = tied_pairs(b)
+    both_ties = tied_pairs(a, b)
+    # Sorted by a (then b), every inversion left in b is a discordant pair
+    discordant = count_inversions(b)
+    denominator = np.sqrt(float(pairs - a_ties) * float(pairs - b_ties))
+    if denominator == 0:
+        return None
+    return float((pairs - a_ties - b_ties + both_ties - 2 * discordant) / denominator)
+
+
+class SourceAgreement:
+    """Pairwise source correlations and per-college disagreement for one year"""
+
+    def __init__(self, matrix, year):
+        colleges, sources = matrix.shape[:2]
+        position = matrix.year_position(year) if year is not None else None
+        ranks = (
+            matrix.rank[:, :, position].astype(np.float64) if position is not None
+            else np.full((colleges, sources), np.nan)
+        )
+        present = ~np.isnan(ranks)
+
+        self.year = year
+        self.college_ids = matrix.college_ids
+        self.source_codes = list(matrix.source_codes)
+        self.ranks = ranks
+        self.shared = (present.T.astype(np.int64) @ present.astype(np.int64))
+        self.spearman = np.full((sources, sources), np.nan)
+        self.kendall = np.full((sources, sources), np.nan)
+        for s in range(sources):
+            for t in range(s, sources):
+                rows = np.flatnonzero(present[:, s] & present[:, t])
+                rho = spearman(ranks[rows, s], ranks[rows, t])
+                tau = kendall_tau(ranks[rows, s], ranks[rows, t])
+                self.spearman[s, t] = self.spearman[t, s] = np.nan if rho is None else rho
+                self.kendall[s, t] = self.kendall[t, s] = np.nan if tau is None else tau
+
+        self.normalized = np.full((colleges, sources), np.nan)
+        for s in range(sources):
+            rows = np.flatnonzero(present[:, s])
+            if len(rows) > 1:
+                self.normalized[rows, s] = (average_ranks(ranks[rows, s]) - 1) / (len(rows) - 1)
+        self.sources_count = (~np.isnan(self.normalized)).sum(axis=1)
+        self.compared = self.sources_count >= MIN_SOURCES
+        self.disagreement = np.full(colleges, np.nan)
+        if self.compared.any():
+            self.disagreement[self.compared] = np.nanvar(self.normalized[self.compared], axis=1)
+
+    def most_disputed(self, limit=MAX_DISAGREEMENTS):
+        """Row positions of the ``limit`` colleges with the highest disagreement; ties by college id"""
+        rows = np.flatnonzero(self.compared)
+        order = np.lexsort((self.college_ids[rows], -self.disagreement[rows]))
+        return rows[order][:limit]
+
+
+def _table(values):
+    return [[None if np.isnan(v) else round(float(v), 4) for v in row] for row in values]
+
+
+def compute_agreement(matrix, year):
+    """Serializable agreement data for ``year`` with the ``MAX_DISAGREEMENTS`` most disputed colleges"""
+    agreement = SourceAgreement(matrix, year)
+    rows = agreement.most_disputed(MAX_DISAGREEMENTS)
+    ids = [int(agreement.college_ids[row]) for row in rows]
+    colleges = College.objects.only(*CollegeSerializer.Meta.fields).in_bulk(ids)
+    disagreements = []
+    for row, college_id in zip(rows, ids):
+        if college_id not in colleges:
+            continue
+        ranked = np.flatnonzero(~np.isnan(agreement.normalized[row]))
+        disagreements.append({
+            'college': CollegeSerializer(colleges[college_id]).data,
+            'disagreement': round(float(agreement.disagreement[row]), 4),
+            'ranks': {
+                agreement.source_codes[s]: int(agreement.ranks[row, s]) for s in ranked
+            },
+            'normalized_ranks': {
+                agreement.source_codes[s]: round(float(agreement.normalized[row, s]), 4)
+                for s in ranked
+            },
+        })
+    return {
+        'year': year,
+        'sources': agreement.source_codes,
+        'shared': agreement.shared.tolist(),
+        'spearman': _table(agreement.spearman),
+        'kendall': _table(agreement.kendall),
+        'colleges_compared': int(agreement.compared.sum()),
+        'disagreements': disagreements,
+    }
+
+
+def get_agreement(matrix, year=None, limit=DISAGREEMENT_LIMIT):
+    """Agreement for ``year`` (default: the latest), cached per (dataset version, year)"""
+    year = year or matrix.latest_year
+    key = f'rankings:agreement:{matrix.version}:{year}'
+    data = cached(key, lambda: compute_agreement(matrix, year), AGREEMENT_CACHE_TIMEOUT)
+    return dict(data, disagreements=data['disagreements'][:limit])
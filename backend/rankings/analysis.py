@@ -0,0 +1,87 @@
+"""
+College-level analysis built from an in-memory set of rankings
+
+The detail, breakdown, analysis and bundle endpoints all work from the
+same list of ``CollegeRanking`` rows (with ``source`` loaded), so a
+college page can be assembled from a single load instead of re-querying
+the rankings for every section.
+"""
+
+from django.db.models import Prefetch
+
+from .dataset import get_latest_year
+from .models import METRIC_FIELDS, CollegeRanking
+from .percentiles import metric_percentiles, summarize
+from .readmodel import get_matrix
+from .serializers import (
+    CollegeRankingSerializer,
+    CollegeSerializer,
+)
+
+
+def rankings_prefetch():
+    """Prefetch a college's rankings with their sources (one query) and categories (one more)"""
+    return Prefetch(
+        'collegeranking_set',
+        queryset=CollegeRanking.objects.select_related('source').prefetch_related('categories'),
+    )
+
+
+def for_year(rankings, year=None):
+    """The rankings from ``year`` (default: the latest year in the data) and that year"""
+    year = year or get_latest_year()
+    return [r for r in rankings if r.ranking_year == year], year
+
+
+def build_breakdown(college, rankings, year=None):
+    """One year's rankings grouped by region plus that year's composite scores"""
+    rankings, year = for_year(rankings, year)
+    all_rankings = CollegeRankingSerializer(rankings, many=True).data
+    breakdown = {
+        'college': CollegeSerializer(college).data,
+        'year': year,
+        'international_rankings': [],
+        'american_rankings': [],
+        'composite_scores': college.composite_scores(year),
+        'all_rankings': all_rankings,
+    }
+
+    # Separate by region
+    for ranking, data in zip(rankings, all_rankings):
+        if ranking.source.region == 'INTERNATIONAL':
+            breakdown['international_rankings'].append(data)
+        else:
+            breakdown['american_rankings'].append(data)
+
+    return breakdown
+
+
+def average_metrics(rankings):
+    """Average of each metric field across the given rankings"""
+    avg_metrics = {}
+    for field in METRIC_FIELDS:
+        values = [float(getattr(r, field)) for r in rankings if getattr(r, field) is not None]
+        if values:
+            avg_metrics[field] = round(sum(values) / len(values), 2)
+    return avg_metrics
+
+
+def analyze_strengths(college, rankings, year=None):
+    """
+    A year's (default: latest) three highest-percentile metrics as
+    strengths and three lowest as weaknesses, judged against every
+    college's metric averages for that year
+    """
+    rankings, year = for_year(rankings, year)
+    avg_metrics = average_metrics(rankings)
+    percentiles = metric_percentiles(get_matrix(), year, avg_metrics)
+    strengths, weaknesses = summarize(avg_metrics, percentiles)
+
+    return {
+        'college': CollegeSerializer(college).data,
+        'year': year,
+        'strengths': strengths,
+        'weaknesses': weaknesses,
+        'all_metrics': avg_metrics,
+        'percentiles': percentiles,
+    }
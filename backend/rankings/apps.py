@@ -5,3 +5,6 @@ class RankingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rankings'
     verbose_name = 'College Rankings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
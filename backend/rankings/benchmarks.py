@@ -0,0 +1,622 @@
+"""
+Benchmark suites for the ``benchmark`` management command
+
+Each suite takes the number of iterations and returns a list of result rows
+(dicts) that the command prints as a table. Suites run against whatever is
+in the configured database, so seed it first (``seed_demo_data``).
+"""
+
+import csv
+import gzip
+import json
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management.base import CommandError
+from django.test import Client, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from .agreement import SourceAgreement, kendall_tau, spearman
+from .aggregation import METHODS, aggregate
+from .bitmaps import SourceBitmaps, filter_by_sources, name_ordered_ids
+from .cache_backends import VERSION_KEY, TieredCache
+from .caching import cache_metrics, cached, reset_cache_metrics
+from .composites import CompositeRows, CompositeSpec, average_composite, score_weighted
+from .export import COLUMNAR_FORMATS, EXPORT_FORMATS, EXPORT_TABLES, stream_export
+from .facets import FacetIndex
+from .models import METRIC_FIELDS, College, CollegeRanking, RankingSource
+from .queries import composite_queryset
+from .readmodel import RankingsMatrix, build_matrix, load_matrix
+from .renderers import FastJSONRenderer
+from .routers import PRIMARY_COOKIE, replica_alias
+from .similarity import SimilarityIndex
+from .serializers import (
+    CollegeRankingSerializer,
+    CompositeRankingSerializer,
+    RankingSourceSerializer,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+
+def format_table(rows):
+    """Lines of a plain-text table of dict rows, columns in first-seen order"""
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    widths = {
+        col: max(len(col), *(len(str(row.get(col, ''))) for row in rows))
+        for col in columns
+    }
+    lines = [
+        '  '.join(col.ljust(widths[col]) for col in columns),
+        '  '.join('-' * widths[col] for col in columns),
+    ]
+    for row in rows:
+        lines.append('  '.join(str(row.get(col, '')).ljust(widths[col]) for col in columns))
+    return lines
+
+
+def _time_per_call(func, iterations):
+    """Average CPU time per call in microseconds"""
+    func()  # warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def _renderer_payloads():
+    source = RankingSource.objects.filter(collegeranking__isnull=False).first()
+    if source is None:
+        raise CommandError('No rankings in the database; run seed_demo_data first')
+
+    rankings = CollegeRanking.objects.filter(source=source).select_related(
+        'college', 'source'
+    ).prefetch_related('categories').order_by('rank')[:100]
+    by_source = {
+        'count': len(rankings),
+        'next': None,
+        'previous': None,
+        'results': CollegeRankingSerializer(rankings, many=True).data,
+        'source': RankingSourceSerializer(source).data,
+    }
+
+    colleges = composite_queryset('INTERNATIONAL')[:100]
+    composite = {
+        'count': len(colleges),
+        'next': None,
+        'previous': None,
+        'results': CompositeRankingSerializer(
+            colleges, many=True, context={'region': 'INTERNATIONAL'}
+        ).data,
+    }
+    return {
+        f'by_source {source.code} ({len(rankings)} rows)': by_source,
+        f'composite international ({len(colleges)} rows)': composite,
+    }
+
+
+def bench_renderers(iterations):
+    """CPU time per response and bytes on the wire for each renderer"""
+    renderers = {
+        'drf-json': JSONRenderer(),
+        'fast-json': FastJSONRenderer(),
+    }
+    results = []
+    for payload_name, payload in _renderer_payloads().items():
+        for renderer_name, renderer in renderers.items():
+            content = renderer.render(payload)
+            row = {
+                'payload': payload_name,
+                'renderer': renderer_name,
+                'render_us': round(_time_per_call(lambda: renderer.render(payload), iterations), 1),
+                'bytes': len(content),
+                'gzip_bytes': len(gzip.compress(content, compresslevel=6)),
+                'gzip_us': round(_time_per_call(
+                    lambda: gzip.compress(content, compresslevel=6), iterations
+                ), 1),
+            }
+            if brotli is not None:
+                row['br_bytes'] = len(brotli.compress(content, quality=4))
+                row['br_us'] = round(_time_per_call(
+                    lambda: brotli.compress(content, quality=4), iterations
+                ), 1)
+            results.append(row)
+    return results
+
+
+def _synthetic_rankings(colleges, sources, years, coverage=0.6, seed=0):
+    """Random ranking rows covering ``coverage`` of the (college, source, year) cells"""
+    rng = np.random.default_rng(seed)
+    for year in years:
+        for source_id in range(1, sources + 1):
+            ranked = np.flatnonzero(rng.random(colleges) < coverage) + 1
+            scores = rng.uniform(20, 100, len(ranked)).round(2)
+            metrics = rng.uniform(0, 100, (len(ranked), len(METRIC_FIELDS))).round(2)
+            order = np.argsort(-scores)
+            for rank, i in enumerate(order, start=1):
+                yield (int(ranked[i]), source_id, year, rank, float(scores[i]), *metrics[i].tolist())
+
+
+def bench_readmodel(iterations, colleges=100_000, sources=10, years=(2023, 2024, 2025)):
+    """Build time and memory of the rankings matrix, synthetic and from the database"""
+    source_rows = [
+        (i, f'src{i}', 'INTERNATIONAL' if i <= sources // 2 else 'AMERICAN')
+        for i in range(1, sources + 1)
+    ]
+    college_rows = [(i, f'Country {i % 50}') for i in range(1, colleges + 1)]
+    rows = list(_synthetic_rankings(colleges, sources, years))
+
+    matrices = {
+        f'synthetic {colleges}x{sources}x{len(years)} ({len(rows)} rankings)': build_matrix(
+            'synthetic', college_rows, source_rows, rows
+        ),
+        'database': load_matrix('benchmark'),
+    }
+    results = []
+    for name, matrix in matrices.items():
+        spec = CompositeSpec.parse(
+            ','.join(f'{code}:{i + 1}' for i, code in enumerate(matrix.source_codes)),
+            source_codes=matrix.source_codes,
+        )
+
+        def custom_top_page():
+            composite, coverage = score_weighted(matrix, spec)
+            return CompositeRows(matrix.college_ids, composite, coverage).ordered(100)
+
+        results.append({
+            'matrix': name,
+            'shape': 'x'.join(str(n) for n in matrix.shape),
+            'load_s': round(matrix.load_seconds, 3),
+            'mib': round(matrix.nbytes / 1_048_576, 1),
+            'composite_us': round(_time_per_call(
+                lambda: average_composite(matrix, 'INTERNATIONAL'), iterations
+            ), 1),
+            'custom_top100_us': round(_time_per_call(custom_top_page, iterations), 1),
+        })
+    return results
+
+
+def _synthetic_ranks(colleges, sources, coverage=0.7, noise=0.5, seed=0):
+    """(C, S) ranks from noisy views of a shared quality score, NaN where unranked"""
+    rng = np.random.default_rng(seed)
+    quality = rng.normal(size=colleges)
+    ranks = np.empty((colleges, sources))
+    for s in range(sources):
+        ranks[np.argsort(-(quality + rng.normal(scale=noise, size=colleges))), s] = (
+            np.arange(1, colleges + 1)
+        )
+        ranks[rng.random(colleges) >= coverage, s] = np.nan
+    return ranks
+
+
+def bench_aggregation(iterations, colleges=10_000, sources=10):
+    """Wall time of each rank-aggregation method on a synthetic 10k x 10 rank matrix"""
+    ranks = _synthetic_ranks(colleges, sources)
+    results = []
+    for method in METHODS:
+        timings = []
+        for _ in range(max(iterations, 1)):
+            start = time.perf_counter()
+            order, _ = aggregate(ranks, method)
+            timings.append(time.perf_counter() - start)
+        results.append({
+            'method': method,
+            'shape': f'{colleges}x{sources}',
+            'ranked': len(order),
+            'best_s': round(min(timings), 3),
+            'mean_s': round(sum(timings) / len(timings), 3),
+        })
+    return results
+
+
+def _load_ndjson(path):
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(path, 'rb') as f:
+        return len([loads(line) for line in f])
+
+
+def _load_csv(path):
+    with open(path, newline='') as f:
+        return len(list(csv.DictReader(f)))
+
+
+EXPORT_LOADERS = {
+    'ndjson': _load_ndjson,
+    'csv': _load_csv,
+    'arrow': lambda path: pa.ipc.open_file(pa.memory_map(str(path))).read_all().num_rows,
+    'parquet': lambda path: pq.read_table(path).num_rows,
+}
+
+
+def bench_export(iterations):
+    """Generation time, file size and client load time of each export format"""
+    if not CollegeRanking.objects.exists():
+        raise CommandError('No rankings in the database; run seed_demo_data first')
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt not in COLUMNAR_FORMATS or pa is not None]
+    runs = max(1, min(iterations, 5))
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for table in EXPORT_TABLES:
+            for fmt in formats:
+                path = Path(directory) / f'{table}.{fmt}'
+                generate, load = [], []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    with open(path, 'wb') as f:
+                        for chunk in stream_export(fmt, table):
+                            f.write(chunk)
+                    generate.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    rows = EXPORT_LOADERS[fmt](path)
+                    load.append(time.perf_counter() - start)
+                results.append({
+                    'table': table,
+                    'format': fmt,
+                    'rows': rows,
+                    'generate_ms': round(min(generate) * 1000, 1),
+                    'bytes': path.stat().st_size,
+                    'load_ms': round(min(load) * 1000, 1),
+                })
+    return results
+
+
+# (endpoint, URL template filled with a ranked college id and source code)
+SNAPSHOT_ENDPOINTS = [
+    ('sources', '/api/sources/'),
+    ('colleges', '/api/colleges/'),
+    ('search', '/api/colleges/search/?q=university'),
+    ('college detail', '/api/colleges/{college}/'),
+    ('college bundle', '/api/colleges/{college}/?include=analysis,breakdown,similar'),
+    ('rankings', '/api/rankings/'),
+    ('by source', '/api/rankings/by_source/?source={source}'),
+    ('composite', '/api/composite-rankings/international/'),
+    ('aggregate composite', '/api/composite-rankings/international/?method=borda'),
+    ('compare', '/api/comparison/compare/?ids={college}'),
+    ('analysis', '/api/analysis/analyze/?college_id={college}'),
+    ('export ndjson', '/api/export/rankings/?fmt=ndjson'),
+]
+
+
+def _request_ms(client, url):
+    cache.clear()
+    start = time.perf_counter()
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise CommandError(f'GET {url} returned {response.status_code}')
+    return elapsed * 1000
+
+
+def bench_snapshot(iterations):
+    """Per-endpoint latency reading from the primary database vs the SQLite snapshot"""
+    if not settings.SERVE_SQLITE_SNAPSHOT or replica_alias() is None:
+        raise CommandError(
+            'Set SQLITE_SNAPSHOT_PATH and SERVE_SQLITE_SNAPSHOT=true to serve the snapshot'
+        )
+    ranking = CollegeRanking.objects.select_related('source').first()
+    if ranking is None:
+        raise CommandError('No rankings in the database; run seed_demo_data first')
+    from .sqlite_snapshot import build_sqlite_snapshot
+
+    build_sqlite_snapshot(settings.SQLITE_SNAPSHOT_PATH)
+    # The primary cookie pins a client's reads to the primary (rankings.routers)
+    primary = Client(HTTP_COOKIE=f'{PRIMARY_COOKIE}=1')
+    snapshot = Client()
+    runs = max(1, min(iterations, 20))
+    results = []
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for name, template in SNAPSHOT_ENDPOINTS:
+            url = template.format(college=ranking.college_id, source=ranking.source.code)
+            timings = {'primary': [], 'snapshot': []}
+            for _ in range(runs):
+                timings['primary'].append(_request_ms(primary, url))
+                timings['snapshot'].append(_request_ms(snapshot, url))
+            primary_ms = float(np.median(timings['primary']))
+            snapshot_ms = float(np.median(timings['snapshot']))
+            results.append({
+                'endpoint': name,
+                'primary_ms': round(primary_ms, 2),
+                'snapshot_ms': round(snapshot_ms, 2),
+                'speedup': f'{primary_ms / snapshot_ms:.2f}x',
+            })
+    return results
+
+
+def bench_stampede(iterations, callers=(1, 10, 100), compute_ms=50):
+    """Computations and wall time when many callers miss the same cold key at once"""
+    results = []
+    for count in callers:
+        cache.clear()
+        reset_cache_metrics()
+        start = threading.Barrier(count)
+
+        def compute():
+            time.sleep(compute_ms / 1000)
+            return 'value'
+
+        def request():
+            start.wait()
+            cached('benchmark:stampede', compute, 60, beta=0)
+
+        threads = [threading.Thread(target=request) for _ in range(count)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        metrics = cache_metrics()
+        results.append({
+            'callers': count,
+            'computations': metrics['computations'],
+            'coalesced_waits': metrics['coalesced_waits'],
+            'wall_ms': round(elapsed * 1000, 1),
+        })
+    cache.clear()
+    return results
+
+
+def _wall_us(func, iterations):
+    """Average wall time per call in microseconds (includes network round trips)"""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def bench_cache_tiers(iterations, keys=5000, lookups=50_000):
+    """Lookup latency from the in-process tier vs the shared cache, and a skewed workload"""
+    tiered = caches['default']
+    if not isinstance(tiered, TieredCache):
+        raise CommandError('The default cache is not rankings.cache_backends.TieredCache')
+    shared = tiered.shared
+    tiered.clear()
+    tiered.set(VERSION_KEY, 'benchmark')
+
+    values = {'dataset version': 'a1b2c3d4e5f6', **_renderer_payloads()}
+    results = []
+    for name, value in values.items():
+        key = f'benchmark:tier:{len(results)}'
+        tiered.set(key, value)
+        local_us = _wall_us(lambda: tiered.get(key), iterations)
+        shared_us = _wall_us(lambda: shared.get(key), iterations)
+        results.append({
+            'value': name,
+            'bytes': len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)),
+            'local_us': round(local_us, 2),
+            'shared_us': round(shared_us, 2),
+            'speedup': f'{shared_us / local_us:.1f}x',
+        })
+
+    # Zipf-distributed keys: a few hot ones, a long tail that overflows the local tier
+    tiered.clear()
+    tiered.set(VERSION_KEY, 'benchmark')
+    tiered.reset_metrics()
+    ranks = np.random.default_rng(0).zipf(1.2, lookups) % keys
+    payload = b'x' * 2048
+    start = time.perf_counter()
+    for rank in ranks:
+        key = f'benchmark:zipf:{rank}'
+        if tiered.get(key) is None:
+            tiered.set(key, payload)
+    elapsed = time.perf_counter() - start
+    metrics = tiered.metrics()
+    results.append({
+        'value': f'zipf workload ({keys} keys of 2 KiB)',
+        'bytes': metrics['bytes'],
+        'local_us': round(elapsed / lookups * 1_000_000, 2),
+        'local_hit_ratio': round(metrics['local_hit_ratio'], 3),
+        'hit_ratio': round(metrics['hit_ratio'], 3),
+        'local_entries': f"{metrics['entries']}/{metrics['max_entries']}",
+        'evictions': metrics['evictions'],
+    })
+    tiered.clear()
+    return results
+
+
+def _synthetic_presence_matrix(colleges, sources, years, coverage=0.6, seed=0):
+    """A matrix holding only which cells are ranked, enough for membership bitmaps"""
+    rng = np.random.default_rng(seed)
+    rank = np.where(rng.random((colleges, sources, len(years))) < coverage, 1.0, np.nan)
+    return RankingsMatrix(
+        version='synthetic',
+        college_ids=np.arange(1, colleges + 1, dtype=np.int64),
+        countries=[],
+        country_codes=np.zeros(colleges, dtype=np.int32),
+        source_ids=np.arange(1, sources + 1, dtype=np.int64),
+        source_codes=[f'src{i}' for i in range(1, sources + 1)],
+        source_regions=np.array(['INTERNATIONAL'] * sources, dtype=object),
+        years=np.array(years, dtype=np.int64),
+        rank=rank.astype(np.float32),
+        score=rank,
+        metrics={},
+    )
+
+
+def bench_bitmaps(iterations, colleges=100_000, sources=10, years=(2023, 2024, 2025)):
+    """Source expression filtering on membership bitsets vs joins plus DISTINCT"""
+    synthetic = _synthetic_presence_matrix(colleges, sources, years)
+    bitmaps = SourceBitmaps(synthetic)
+    expression = 'src1 & src2 & !src3'
+    ids = synthetic.college_ids
+    results = [{
+        'data': f'synthetic {colleges}x{sources}x{len(years)}',
+        'expression': expression,
+        'matches': bitmaps.count(bitmaps.evaluate(expression)),
+        'bitmap_kib': round(bitmaps.nbytes / 1024, 1),
+        'evaluate_us': round(_time_per_call(lambda: bitmaps.evaluate(expression), iterations), 1),
+        'filter_ids_us': round(_time_per_call(
+            lambda: synthetic.college_ids[bitmaps.contains(bitmaps.evaluate(expression), ids - 1)],
+            iterations,
+        ), 1),
+    }]
+
+    matrix = load_matrix('benchmark')
+    if len(matrix.source_codes) >= 3:
+        first, second, third = matrix.source_codes[:3]
+        expression = f'{first} & {second} & !{third}'
+        ranked_by = College.objects.filter(collegeranking__source__code=first).values('id')
+        also = College.objects.filter(collegeranking__source__code=second).values('id')
+        excluded = College.objects.filter(collegeranking__source__code=third).values('id')
+        orm = College.objects.filter(id__in=ranked_by).filter(id__in=also).exclude(
+            id__in=excluded
+        ).distinct()
+        ordered = name_ordered_ids(matrix)
+        results.append({
+            'data': f'database ({len(matrix.college_ids)} colleges)',
+            'expression': expression,
+            'matches': len(filter_by_sources(matrix, expression, ordered)),
+            'bitmap_kib': round(SourceBitmaps(matrix).nbytes / 1024, 1),
+            'evaluate_us': round(_time_per_call(
+                lambda: filter_by_sources(matrix, expression, ordered), iterations
+            ), 1),
+            'orm_us': round(_time_per_call(
+                lambda: list(orm.values_list('id', flat=True)), max(1, iterations // 10)
+            ), 1),
+        })
+    return results
+
+
+def _synthetic_matrix(colleges, sources, years):
+    source_rows = [
+        (i, f'src{i}', 'INTERNATIONAL' if i <= sources // 2 else 'AMERICAN')
+        for i in range(1, sources + 1)
+    ]
+    college_rows = [(i, f'Country {i % 50}') for i in range(1, colleges + 1)]
+    return build_matrix(
+        'synthetic', college_rows, source_rows, _synthetic_rankings(colleges, sources, years)
+    )
+
+
+def bench_facets(iterations, colleges=100_000, sources=10):
+    """Faceted filter latency on a synthetic matrix, index build included once"""
+    from django.http import QueryDict
+
+    matrix = _synthetic_matrix(colleges, sources, [2025])
+    # What name_ordered_ids and city_codes would read from the database
+    matrix.derived['name_ordered_ids'] = matrix.college_ids.copy()
+    matrix.derived['city_codes'] = (
+        [f'City {i}' for i in range(1000)], (matrix.college_ids % 1000).astype(np.int32)
+    )
+    started = time.perf_counter()
+    index = FacetIndex(matrix, 2025)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = {
+        'no filters': '',
+        'top 100 in src1': 'rank.src1=..100',
+        'country + metric + composite': (
+            'country=Country 1,Country 2&research_impact=60..&composite.international=50..'
+        ),
+        'every filter, sorted': (
+            'rank.src1=..20000&rank.src6=..30000&academic_reputation=30..&research_impact=40..'
+            '&composite.american=40..&country=Country 3&city=City 3,City 53&sort=-research_impact'
+        ),
+    }
+    results = []
+    for name, query in queries.items():
+        params = QueryDict(query)
+        ids, _ = index.search(params)
+        results.append({
+            'query': name,
+            'matches': len(ids),
+            'search_ms': round(_time_per_call(lambda: index.search(params), iterations) / 1000, 2),
+            'index_build_ms': round(build_ms, 1),
+        })
+    return results
+
+
+def bench_similar(iterations, colleges=100_000, sources=10, k=10):
+    """Top-k similar colleges on a synthetic matrix: index build once, then per query"""
+    matrix = _synthetic_matrix(colleges, sources, [2025])
+    started = time.perf_counter()
+    index = SimilarityIndex(matrix, 2025)
+    build_ms = (time.perf_counter() - started) * 1000
+    queries = np.flatnonzero(index.indexed)[:max(1, iterations)]
+    masks = {
+        'all colleges': None,
+        'region AMERICAN': index.mask('AMERICAN'),
+        'two countries': index.mask(countries=['Country 1', 'Country 2']),
+    }
+    results = []
+    for name, mask in masks.items():
+        timings = []
+        for position in queries:
+            start = time.perf_counter()
+            index.neighbours(position, k, mask)
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append({
+            'filter': name,
+            'colleges': int(index.indexed.sum() if mask is None else mask.sum()),
+            'features': index.vectors.shape[1],
+            f'top{k}_median_ms': round(float(np.median(timings)), 2),
+            f'top{k}_p99_ms': round(float(np.percentile(timings, 99)), 2),
+            'index_mib': round(index.nbytes / 1_048_576, 1),
+            'build_ms': round(build_ms, 1),
+        })
+    return results
+
+
+def bench_agreement(iterations, colleges=100_000, sources=10):
+    """Source agreement on a synthetic matrix: rank correlations per pair and disagreement scores"""
+    matrix = _synthetic_matrix(colleges, sources, [2025])
+    ranks = matrix.rank[:, :, 0].astype(np.float64)
+    both = np.flatnonzero(~np.isnan(ranks[:, 0]) & ~np.isnan(ranks[:, 1]))
+    a, b = ranks[both, 0], ranks[both, 1]
+    runs = max(1, min(iterations, 20))
+    steps = [
+        (f'spearman, one pair ({len(both)} shared)', lambda: spearman(a, b), runs),
+        (f'kendall tau-b, one pair ({len(both)} shared)', lambda: kendall_tau(a, b), runs),
+        (f'all {sources * (sources + 1) // 2} pairs + disagreement',
+         lambda: SourceAgreement(matrix, 2025), max(1, runs // 10)),
+    ]
+    results = []
+    for name, step, repeats in steps:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            step()
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append({'step': name, 'median_ms': round(float(np.median(timings)), 1)})
+    return results
+
+
+SUITES = {
+    'renderers': bench_renderers,
+    'readmodel': bench_readmodel,
+    'aggregation': bench_aggregation,
+    'export': bench_export,
+    'snapshot': bench_snapshot,
+    'stampede': bench_stampede,
+    'cache': bench_cache_tiers,
+    'bitmaps': bench_bitmaps,
+    'facets': bench_facets,
+    'similar': bench_similar,
+    'agreement': bench_agreement,
+}
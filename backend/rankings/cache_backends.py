@@ -0,0 +1,266 @@
+"""
+Two-tier cache backend
+
+``TieredCache`` keeps a bounded per-process LRU of recently used entries in
+front of a shared cache (``LOCATION`` names its alias in ``CACHES``), so hot
+keys are answered from process memory instead of a round trip to Redis for
+every lookup. Writes go to both tiers; reads fill the local tier from the
+shared one.
+
+The local tier is bounded by entry count (``MAX_ENTRIES``) and by the
+pickled size of its values (``MAX_BYTES``), evicting the least recently
+used entries first; each entry also expires after ``LOCAL_TIMEOUT`` seconds
+(or its own timeout, if shorter). Values are stored pickled, so callers get
+a private copy, as with any other backend.
+
+Every local entry is tagged with the dataset version that was current when
+it was stored (``VERSION_KEY`` in the shared cache, see
+``rankings.dataset``). The tier re-reads that key at most every
+``VERSION_CHECK_INTERVAL`` seconds and drops its entries when it changes, so
+an ingest in any process invalidates every worker's local tier without a
+pub/sub channel; until the version is known again, reads bypass the local
+tier. Keys starting with one of ``SHARED_ONLY_PREFIXES`` (the version
+itself, cross-worker locks) are never kept locally.
+
+``metrics()`` reports hits per tier, evictions and the local tier's size.
+"""
+
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+LOCAL_MAX_ENTRIES = 1000
+LOCAL_MAX_BYTES = 32 * 1024 * 1024
+LOCAL_TIMEOUT = 60
+VERSION_KEY = 'rankings:dataset_version'
+VERSION_CHECK_INTERVAL = 1.0
+SHARED_ONLY_PREFIXES = (VERSION_KEY, 'rankings:lock:')
+
+_tiers = {}                 # shared alias -> this process's _LocalTier
+_tiers_lock = threading.Lock()
+
+
+class _LocalTier:
+    """LRU of ``key -> (pickled value, expiry, dataset version)``, shared by a process's threads"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.version = None
+        self.version_known = False
+        self.checked_at = float('-inf')
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+    def get(self, key, version):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] > now and entry[2] == version:
+                    self.entries.move_to_end(key)
+                    self.counts['local_hits'] += 1
+                    return entry[0]
+                self._drop(key)
+            self.counts['local_misses'] += 1
+        return None
+
+    def set(self, key, pickled, timeout, version):
+        if len(pickled) > self.max_bytes:
+            return
+        with self.lock:
+            self._drop(key)
+            self.entries[key] = (pickled, time.monotonic() + timeout, version)
+            self.bytes += len(pickled)
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (evicted, _, _) = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.counts['evictions'] += 1
+
+    def delete(self, key):
+        with self.lock:
+            self._drop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def observe_version(self, version):
+        """Adopt the shared dataset version, dropping every entry if it changed"""
+        with self.lock:
+            self.checked_at = time.monotonic()
+            self.version_known = version is not None
+            if version is not None and version != self.version:
+                if self.version is not None:
+                    self.counts['invalidations'] += 1
+                self.entries.clear()
+                self.bytes = 0
+                self.version = version
+
+
+def _local_tier(alias, max_entries, max_bytes):
+    with _tiers_lock:
+        tier = _tiers.get(alias)
+        if tier is None:
+            tier = _tiers[alias] = _LocalTier(max_entries, max_bytes)
+        return tier
+
+
+class TieredCache(BaseCache):
+    """
+    ``CACHES`` backend: ``LOCATION`` is the alias of the shared cache;
+    ``OPTIONS`` takes ``MAX_ENTRIES``, ``MAX_BYTES``, ``LOCAL_TIMEOUT``,
+    ``VERSION_KEY``, ``VERSION_CHECK_INTERVAL`` and ``SHARED_ONLY_PREFIXES``
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__({**params, 'OPTIONS': {'MAX_ENTRIES': LOCAL_MAX_ENTRIES, **options}})
+        self.shared_alias = location
+        self.local_timeout = options.get('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        self.version_key = options.get('VERSION_KEY', VERSION_KEY)
+        self.version_check_interval = options.get('VERSION_CHECK_INTERVAL', VERSION_CHECK_INTERVAL)
+        self.shared_only_prefixes = tuple(options.get('SHARED_ONLY_PREFIXES', SHARED_ONLY_PREFIXES))
+        self.local = _local_tier(
+            location, self._max_entries, int(options.get('MAX_BYTES', LOCAL_MAX_BYTES))
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        if key.startswith(self.shared_only_prefixes):
+            return None
+        return self.make_and_validate_key(key, version=version)
+
+    def _dataset_version(self):
+        local = self.local
+        if time.monotonic() - local.checked_at >= self.version_check_interval:
+            local.observe_version(self.shared.get(self.version_key))
+        return local.version if local.version_known else None
+
+    def _store_locally(self, local_key, value, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is not None and timeout <= 0:
+            self.local.delete(local_key)
+            return
+        dataset_version = self._dataset_version()
+        if dataset_version is None:
+            return
+        timeout = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        self.local.set(
+            local_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), timeout, dataset_version
+        )
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            dataset_version = self._dataset_version()
+            if dataset_version is not None:
+                pickled = self.local.get(local_key, dataset_version)
+                if pickled is not None:
+                    return pickle.loads(pickled)
+
+        value = self.shared.get(key, self._missing_key, version=version)
+        if value is self._missing_key:
+            self.local.count('shared_misses')
+            return default
+        self.local.count('shared_hits')
+        if local_key is not None:
+            self._store_locally(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if key == self.version_key:
+            self.local.observe_version(value)
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self._store_locally(local_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        local_key = self._local_key(key, version)
+        if added and local_key is not None:
+            self._store_locally(local_key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        if key == self.version_key:
+            # Re-read on the next lookup instead of waiting for the check interval
+            self.local.checked_at = float('-inf')
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.local.delete(local_key)
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing_key, version=version) is not self._missing_key
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.local.delete(local_key)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def refresh_local(self, key, default=None, version=None):
+        """Read ``key`` from the shared tier, replacing this process's copy"""
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.local.delete(local_key)
+        return self.get(key, default, version=version)
+
+    def clear_local(self):
+        """Empty this process's tier only"""
+        self.local.clear()
+
+    def metrics(self):
+        """Hit counts per tier, evictions and the local tier's size"""
+        local = self.local
+        with local.lock:
+            metrics = {
+                name: local.counts[name]
+                for name in ('local_hits', 'local_misses', 'shared_hits', 'shared_misses',
+                             'evictions', 'invalidations')
+            }
+            metrics.update({
+                'entries': len(local.entries),
+                'bytes': local.bytes,
+                'max_entries': local.max_entries,
+                'max_bytes': local.max_bytes,
+            })
+        lookups = metrics['local_hits'] + metrics['shared_hits'] + metrics['shared_misses']
+        metrics['local_hit_ratio'] = metrics['local_hits'] / lookups if lookups else 0.0
+        metrics['hit_ratio'] = (
+            (metrics['local_hits'] + metrics['shared_hits']) / lookups if lookups else 0.0
+        )
+        return metrics
+
+    def reset_metrics(self):
+        with self.local.lock:
+            self.local.counts.clear()
@@ -0,0 +1,217 @@
+"""
+Stampede-safe caching of expensive rankings computations
+
+``cached(key, compute, timeout)`` keeps ``compute()``'s result in the
+Django cache and protects it against many requests recomputing the same
+value at once, which is what happens when a hot key expires and, after
+every ingest, to all keys together (they embed the dataset version):
+
+* single flight: on a miss one caller computes and the others wait for its
+  result. Threads of one process wait on an event; across workers the
+  computing process holds a lock key taken with ``cache.add`` (atomic on
+  the shared backends), and the other workers poll for the value;
+* early probabilistic refresh (XFetch): a fresh entry is recomputed in the
+  background before it expires, with a probability that rises as expiry
+  nears and with how long the value took to compute, so hot keys rarely
+  expire at all;
+* stale-while-revalidate: an expired entry is kept ``stale_timeout``
+  seconds longer and served while a background thread recomputes it.
+
+Only one background refresh runs per key across workers (it takes the
+same lock). ``cache_metrics()`` returns this process's counters.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+STALE_TIMEOUT = 5 * 60
+EARLY_REFRESH_BETA = 1.0
+LOCK_TIMEOUT = 60           # longest a computation may hold a key's lock
+WAIT_TIMEOUT = 15           # longest a caller waits for another's computation
+POLL_INTERVAL = 0.05
+LOCK_PREFIX = 'rankings:lock:'
+
+METRICS = (
+    'hits',
+    'misses',
+    'stale_hits',
+    'early_refreshes',
+    'coalesced_waits',
+    'computations',
+    'errors',
+)
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+_flights = {}               # key -> threading.Event of this process's computation
+_flights_lock = threading.Lock()
+
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+
+def cache_metrics():
+    """This process's counters, plus the share of lookups answered from the cache"""
+    with _metrics_lock:
+        metrics = {name: _metrics[name] for name in METRICS}
+    lookups = metrics['hits'] + metrics['stale_hits'] + metrics['misses']
+    metrics['hit_ratio'] = (metrics['hits'] + metrics['stale_hits']) / lookups if lookups else 0.0
+    return metrics
+
+
+def reset_cache_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _compute(key, compute, timeout, stale_timeout):
+    started = time.perf_counter()
+    try:
+        value = compute()
+    except Exception:
+        _count('errors')
+        raise
+    seconds = time.perf_counter() - started
+    _count('computations')
+    # (value, soft expiry, compute time); the backend keeps it through the stale window
+    cache.set(key, (value, time.time() + timeout, seconds), timeout + stale_timeout)
+    return value
+
+
+def _acquire(key):
+    token = uuid.uuid4().hex
+    return token if cache.add(LOCK_PREFIX + key, token, LOCK_TIMEOUT) else None
+
+
+def _release(key, token):
+    # Not atomic, but a lock that expired and was re-taken is at worst released early
+    if cache.get(LOCK_PREFIX + key) == token:
+        cache.delete(LOCK_PREFIX + key)
+
+
+def _fresh_entry(key):
+    """
+    ``key``'s entry if another worker has refreshed it meanwhile; with the
+    two-tier backend this looks past the process-local copy
+    """
+    entry = getattr(cache, 'refresh_local', cache.get)(key)
+    return entry if entry is not None and time.time() < entry[1] else None
+
+
+def _refresh_in_background(key, compute, timeout, stale_timeout):
+    """Recompute ``key`` in a thread unless another caller already is; returns whether it started"""
+    token = _acquire(key)
+    if token is None:
+        return False
+
+    def run():
+        try:
+            if _fresh_entry(key) is None:
+                _compute(key, compute, timeout, stale_timeout)
+        except Exception:
+            logger.exception('Background refresh of %s failed', key)
+        finally:
+            _release(key, token)
+            close_old_connections()
+
+    threading.Thread(target=run, name='rankings-cache-refresh', daemon=True).start()
+    return True
+
+
+def refresh_early(expires_at, compute_seconds, beta=EARLY_REFRESH_BETA, now=None):
+    """
+    XFetch: refresh once ``now - compute_seconds * beta * log(u)`` reaches
+    the expiry, ``u`` uniform in (0, 1]
+    """
+    now = time.time() if now is None else now
+    return now - compute_seconds * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def _lead(key, compute, timeout, stale_timeout, deadline):
+    """Compute ``key`` under its cross-worker lock, or wait for the worker holding it"""
+    while True:
+        token = _acquire(key)
+        if token is not None:
+            try:
+                # Another worker may have stored it between our miss and the lock
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+                return _compute(key, compute, timeout, stale_timeout)
+            finally:
+                _release(key, token)
+
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            _count('coalesced_waits')
+            return entry[0]
+        if time.monotonic() >= deadline:
+            # The lock holder is too slow or died: stop waiting for it
+            return _compute(key, compute, timeout, stale_timeout)
+
+
+def _single_flight(key, compute, timeout, stale_timeout):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = threading.Event()
+
+        if leader:
+            try:
+                return _lead(key, compute, timeout, stale_timeout, deadline)
+            finally:
+                with _flights_lock:
+                    del _flights[key]
+                flight.set()
+
+        flight.wait(max(0.0, deadline - time.monotonic()))
+        entry = cache.get(key)
+        if entry is not None:
+            _count('coalesced_waits')
+            return entry[0]
+        if time.monotonic() >= deadline:
+            return _compute(key, compute, timeout, stale_timeout)
+        # The leader failed; try to lead the next attempt
+
+
+def cached(key, compute, timeout, stale_timeout=STALE_TIMEOUT, beta=EARLY_REFRESH_BETA):
+    """
+    ``compute()``'s value for ``key``, cached ``timeout`` seconds.
+
+    Expired values are served for ``stale_timeout`` more seconds while they
+    are recomputed in the background; ``beta`` scales how early fresh ones
+    are refreshed (0 disables early refresh). Exceptions from ``compute``
+    propagate to the caller that ran it.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        _count('misses')
+        return _single_flight(key, compute, timeout, stale_timeout)
+
+    value, expires_at, compute_seconds = entry
+    if time.time() >= expires_at:
+        _count('stale_hits')
+        _refresh_in_background(key, compute, timeout, stale_timeout)
+        return value
+
+    _count('hits')
+    if beta and refresh_early(expires_at, compute_seconds, beta):
+        if _refresh_in_background(key, compute, timeout, stale_timeout):
+            _count('early_refreshes')
+    return value
@@ -0,0 +1,168 @@
+"""
+Ranking category derivation
+
+Derives ``RankingCategory`` rows (ACADEMIC, RESEARCH, ...) for every
+ranking of a staged dataset version while it is activated (before readers
+see it), in one vectorized pass over the rankings matrix:
+
+* a category's score is the mean of the metric columns mapped to it
+  (``CATEGORY_METRICS``), for each (college, source, year) cell;
+* its strength level comes from the percentile of that score among every
+  college the same source ranked in the same year, so thresholds follow
+  the population rather than fixed cut-offs on each source's scale.
+
+Categories without mapped metrics (infrastructure, affordability) are not
+derived. Rows are written with chunked bulk upserts.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .models import CollegeRanking, RankingCategory, active_version_subquery
+
+CATEGORY_METRICS = {
+    'ACADEMIC': ['academic_reputation', 'teaching_quality', 'faculty_student_ratio'],
+    'RESEARCH': ['research_impact'],
+    'EMPLOYMENT': ['employer_reputation'],
+    'STUDENT_LIFE': ['student_satisfaction'],
+    'DIVERSITY': ['international_diversity'],
+    'INTERNATIONAL': ['international_diversity', 'academic_reputation'],
+}
+
+# Minimum percentile for each strength level, checked in order
+STRENGTH_THRESHOLDS = [
+    (90, 'EXCEPTIONAL'),
+    (60, 'STRONG'),
+    (25, 'AVERAGE'),
+    (0, 'WEAK'),
+]
+
+UPSERT_CHUNK_SIZE = 2000
+
+
+def category_scores(matrix, metrics):
+    """(C, S, Y) mean of the given metric cubes; NaN where none is present"""
+    cubes = np.stack([matrix.metrics[name].astype(np.float64) for name in metrics])
+    present = ~np.isnan(cubes)
+    counts = present.sum(axis=0)
+    scores = np.full(matrix.shape, np.nan)
+    np.divide(np.where(present, cubes, 0.0).sum(axis=0), counts, out=scores, where=counts > 0)
+    return scores
+
+
+def population_percentiles(scores):
+    """Mid-rank percentile of each cell within its (source, year) column of colleges"""
+    percentiles = np.full(scores.shape, np.nan)
+    for s in range(scores.shape[1]):
+        for y in range(scores.shape[2]):
+            column = scores[:, s, y]
+            present = ~np.isnan(column)
+            if not present.any():
+                continue
+            population = np.sort(column[present])
+            below = np.searchsorted(population, column[present], side='left')
+            at_or_below = np.searchsorted(population, column[present], side='right')
+            percentiles[present, s, y] = (below + at_or_below) / 2 / len(population) * 100
+    return percentiles
+
+
+def strength_levels(percentiles):
+    """Strength level name per percentile (object array, ``None`` for NaN)"""
+    levels = np.full(percentiles.shape, None, dtype=object)
+    assigned = np.isnan(percentiles)
+    for minimum, level in STRENGTH_THRESHOLDS:
+        matches = ~assigned & (percentiles >= minimum)
+        levels[matches] = level
+        assigned |= matches
+    return levels
+
+
+def derive_categories(matrix):
+    """``{category: (scores, percentiles, levels)}`` cubes for every derived category"""
+    derived = {}
+    for category, metrics in CATEGORY_METRICS.items():
+        scores = np.round(category_scores(matrix, metrics), 2)
+        percentiles = population_percentiles(scores)
+        derived[category] = (scores, percentiles, strength_levels(percentiles))
+    return derived
+
+
+def _ranking_cells(matrix, rankings):
+    """Ranking ids with their (college, source, year) cell positions in the matrix"""
+    rows = np.array(
+        list(rankings.order_by().values_list(
+            'id', 'college_id', 'source_id', 'ranking_year'
+        )),
+        dtype=np.int64,
+    ).reshape(-1, 4)
+    source_lookup = {source_id: i for i, source_id in enumerate(matrix.source_ids.tolist())}
+    c = matrix.college_positions(rows[:, 1])
+    s = np.array([source_lookup.get(i, -1) for i in rows[:, 2].tolist()], dtype=np.int64)
+    y = np.searchsorted(matrix.years, rows[:, 3]).clip(max=max(len(matrix.years) - 1, 0))
+    known = (c >= 0) & (s >= 0)
+    if len(matrix.years):
+        known &= matrix.years[y] == rows[:, 3]
+    return rows[known, 0], c[known], s[known], y[known]
+
+
+def _category_rows(derived, matrix, ranking_ids, c, s, y):
+    for category, (scores, percentiles, levels) in derived.items():
+        cell_scores = scores[c, s, y]
+        cell_percentiles = percentiles[c, s, y]
+        cell_levels = levels[c, s, y]
+        for i in np.flatnonzero(~np.isnan(cell_scores)).tolist():
+            yield RankingCategory(
+                college_ranking_id=int(ranking_ids[i]),
+                category_type=category,
+                strength_level=cell_levels[i],
+                score=Decimal(f'{cell_scores[i]:.2f}'),
+                description=(
+                    f'Percentile {cell_percentiles[i]:.0f} among '
+                    f'{matrix.source_codes[s[i]]} {int(matrix.years[y[i]])} rankings'
+                ),
+            )
+
+
+def _stale_categories(version):
+    """Categories in ``version`` whose ranking no longer has any of the mapped metrics"""
+    stale = Q(pk__in=[])
+    for category, metrics in CATEGORY_METRICS.items():
+        missing = Q(category_type=category)
+        for name in metrics:
+            missing &= Q(**{f'college_ranking__{name}__isnull': True})
+        stale |= missing
+    return RankingCategory.objects.filter(stale, college_ranking__version=version)
+
+
+def rebuild_categories(matrix, version=None, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Derive and upsert categories for every ranking in ``matrix``, which
+    holds the rankings of ``version`` (default: the active version).
+
+    Returns the number of category rows written.
+    """
+    if version is None:
+        rankings, version = CollegeRanking.objects.all(), active_version_subquery()
+    else:
+        rankings = CollegeRanking.all_versions.filter(version=version)
+    derived = derive_categories(matrix)
+    ranking_ids, c, s, y = _ranking_cells(matrix, rankings)
+    written = 0
+    with transaction.atomic():
+        for start in range(0, len(ranking_ids), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            rows = list(_category_rows(
+                derived, matrix, ranking_ids[chunk], c[chunk], s[chunk], y[chunk]
+            ))
+            RankingCategory.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['college_ranking', 'category_type'],
+                update_fields=['strength_level', 'score', 'description'],
+            )
+            written += len(rows)
+        _stale_categories(version).delete()
+    return written
@@ -0,0 +1,221 @@
+"""
+Composite rankings computed on the in-memory rankings matrix
+
+Composite endpoints score every college with one vectorized pass over the
+read model, partially sort only as far as the requested page reaches, and
+load just the colleges on that page.
+"""
+
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from .aggregation import HIGHER_IS_BETTER, aggregate, region_ranks
+from .caching import cached
+from .dataset import get_dataset_version
+from .models import College
+from .queries import aggregate_queryset
+
+MISSING_POLICIES = ('renormalize', 'zero', 'exclude')
+CUSTOM_CACHE_TIMEOUT = 60 * 60
+AGGREGATE_CACHE_TIMEOUT = 60 * 60
+
+
+class CompositeRows(Sequence):
+    """
+    Lazily ordered, lazily materialized composite results.
+
+    Behaves like a list for ``Paginator``: ``len()`` is free, and slicing
+    orders only the top of the list (``argpartition`` plus a sort of the
+    candidates) and loads just the sliced colleges, annotated with
+    ``avg_score`` and ``rankings_count`` like ``composite_queryset`` rows.
+    Colleges whose score is NaN are left out. Ties are ordered by id.
+    Pass ``higher_is_better=False`` for rank-like scores.
+    """
+
+    def __init__(self, college_ids, scores, counts, queryset=None, higher_is_better=True):
+        valid = ~np.isnan(scores)
+        self.college_ids = college_ids[valid]
+        self.scores = scores[valid]
+        self.counts = counts[valid]
+        self.queryset = queryset if queryset is not None else College.objects.all()
+        self._keys = -self.scores if higher_is_better else self.scores
+        self._order = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.college_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._materialize(range(len(self))[index])
+        return self._materialize([range(len(self))[index]])[0]
+
+    def ordered(self, stop):
+        """Row positions of the best ``stop`` colleges, best first"""
+        stop = min(stop, len(self))
+        if stop > len(self._order):
+            if stop < len(self):
+                top = np.argpartition(self._keys, stop - 1)[:stop]
+                # Keep every college tied with the cut-off so ties order by id
+                candidates = np.flatnonzero(self._keys <= self._keys[top].max())
+            else:
+                candidates = np.arange(len(self))
+            self._order = candidates[
+                np.lexsort((self.college_ids[candidates], self._keys[candidates]))
+            ]
+        return self._order[:stop]
+
+    def _materialize(self, ranks):
+        ranks = list(ranks)
+        if not ranks:
+            return []
+        positions = self.ordered(max(ranks) + 1)[ranks]
+        ids = [int(self.college_ids[p]) for p in positions]
+        colleges = self.queryset.in_bulk(ids)
+        rows = []
+        for position, college_id in zip(positions, ids):
+            college = colleges.get(college_id)
+            if college is None:
+                continue
+            college.avg_score = float(self.scores[position])
+            college.rankings_count = int(self.counts[position])
+            rows.append(college)
+        return rows
+
+
+def average_composite(matrix, region, year=None, queryset=None):
+    """Unweighted mean score per college over a region's sources"""
+    averages, counts = matrix.region_average(region, year)
+    return CompositeRows(matrix.college_ids, averages, counts, queryset)
+
+
+def aggregate_composite(matrix, region, year, method, optimize=None):
+    """
+    Rank-aggregation composite for a region and year.
+
+    Served from the ``AggregateRanking`` rows of the current dataset
+    version; computed on the matrix when they are missing or stale (e.g.
+    after an edit that bypassed ingestion). ``optimize`` is applied to the
+    college queryset either way (see ``optimize_queryset``).
+    """
+    optimize = optimize or (lambda queryset: queryset)
+    precomputed = optimize(aggregate_queryset(region, year, method, get_dataset_version()))
+    if precomputed.exists():
+        return precomputed
+
+    def compute():
+        ranks = region_ranks(matrix, region, year)
+        _, values = aggregate(ranks, method)
+        return values, (~np.isnan(ranks)).sum(axis=1)
+
+    # Right after an ingest every request lands here until the aggregates are rebuilt
+    key = f'rankings:aggregate-composite:{matrix.version}:{region}:{year}:{method}'
+    values, counts = cached(key, compute, AGGREGATE_CACHE_TIMEOUT)
+    return CompositeRows(
+        matrix.college_ids, values, counts, optimize(College.objects.all()),
+        higher_is_better=HIGHER_IS_BETTER[method],
+    )
+
+
+@dataclass(frozen=True)
+class CompositeSpec:
+    """A user-defined weighting, normalized so equivalent requests share a cache entry"""
+
+    weights: tuple          # ((source code, weight), ...) sorted by code, summing to 1
+    year: int = None
+    min_sources: int = 1
+    missing: str = 'renormalize'
+
+    @classmethod
+    def parse(cls, weights, year=None, min_sources=None, missing=None, source_codes=()):
+        """
+        Build a spec from query parameters.
+
+        ``weights`` is ``code:weight`` pairs separated by commas (e.g.
+        ``qs:40,the:40,arwu:20``); weights are relative. Raises
+        ``ValueError`` with a client-facing message on bad input.
+        """
+        if not weights:
+            raise ValueError('weights parameter required (e.g. qs:40,the:40,arwu:20)')
+        parsed = {}
+        for item in weights.split(','):
+            code, sep, value = item.strip().partition(':')
+            code = code.strip().lower()
+            try:
+                weight = float(value) if sep else 1.0
+            except ValueError:
+                raise ValueError(f"Invalid weight for '{code}': {value}")
+            if code not in source_codes:
+                raise ValueError(f"Unknown source '{code}'")
+            if weight < 0 or not np.isfinite(weight):
+                raise ValueError(f"Weight for '{code}' must be a non-negative number")
+            if weight:
+                parsed[code] = parsed.get(code, 0.0) + weight
+        total = sum(parsed.values())
+        if not total:
+            raise ValueError('At least one source needs a positive weight')
+
+        missing = missing or 'renormalize'
+        if missing not in MISSING_POLICIES:
+            raise ValueError(f"missing must be one of: {', '.join(MISSING_POLICIES)}")
+        try:
+            year = int(year) if year else None
+            min_sources = int(min_sources) if min_sources else 1
+        except ValueError:
+            raise ValueError('year and min_sources must be integers')
+        if not 1 <= min_sources <= len(parsed):
+            raise ValueError(f'min_sources must be between 1 and {len(parsed)}')
+        if missing == 'exclude':
+            min_sources = len(parsed)
+
+        return cls(
+            weights=tuple((code, round(parsed[code] / total, 6)) for code in sorted(parsed)),
+            year=year,
+            min_sources=min_sources,
+            missing=missing,
+        )
+
+    def cache_key(self, version):
+        digest = hashlib.sha1(repr((self.weights, self.year, self.min_sources, self.missing))
+                              .encode()).hexdigest()
+        return f'rankings:custom-composite:{version}:{digest}'
+
+
+def score_weighted(matrix, spec):
+    """
+    Weighted score and source coverage per college in one pass.
+
+    ``renormalize`` and ``exclude`` average over the sources a college has
+    (rescaling the weights), ``zero`` counts a missing source as a score of
+    zero. Colleges below ``min_sources`` get NaN.
+    """
+    positions = [matrix.source_position(code) for code, _ in spec.weights]
+    weights = np.array([weight for _, weight in spec.weights])
+    scores = matrix.source_scores(spec.year)[:, positions]
+    present = ~np.isnan(scores)
+    coverage = present.sum(axis=1)
+    totals = np.where(present, scores, 0.0) @ weights
+
+    if spec.missing == 'zero':
+        composite = totals
+    else:
+        composite = np.full(len(totals), np.nan)
+        weight_present = present @ weights
+        np.divide(totals, weight_present, out=composite, where=weight_present > 0)
+    composite[coverage < spec.min_sources] = np.nan
+    return composite, coverage
+
+
+def weighted_composite(matrix, spec, queryset=None):
+    """Ranked ``CompositeRows`` for a spec, cached per dataset version and spec"""
+    def compute():
+        composite, coverage = score_weighted(matrix, spec)
+        valid = ~np.isnan(composite)
+        return matrix.college_ids[valid], composite[valid], coverage[valid]
+
+    return CompositeRows(
+        *cached(spec.cache_key(matrix.version), compute, CUSTOM_CACHE_TIMEOUT),
+        queryset=queryset,
+    )
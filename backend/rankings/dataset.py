@@ -0,0 +1,55 @@
+"""
+Dataset version tracking
+
+Anything derived from the rankings tables (published snapshots, cached
+composites, in-memory read models) is keyed on the dataset version so it
+is thrown away as soon as an ingest changes the underlying data.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import College, CollegeRanking, RankingSource, active_version_id
+
+VERSION_CACHE_KEY = 'rankings:dataset_version'
+VERSION_CACHE_TIMEOUT = 30  # seconds
+LATEST_YEAR_CACHE_KEY = 'rankings:latest_year'
+LATEST_YEAR_CACHE_TIMEOUT = 60 * 60
+
+
+def compute_dataset_version():
+    """Fingerprint the active rankings data from its version, row counts and update times"""
+    parts = [active_version_id()]
+    for model in (RankingSource, College, CollegeRanking):
+        field = 'last_updated' if model is RankingSource else 'updated_at'
+        stats = model.objects.aggregate(count=Count('id'), latest=Max(field))
+        parts.extend([stats['count'], stats['latest']])
+
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def get_dataset_version():
+    """Return the current dataset version, memoized briefly in the cache"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = compute_dataset_version()
+        cache.set(VERSION_CACHE_KEY, version, VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def get_latest_year():
+    """Most recent ``ranking_year`` in the data (``None`` without rankings), memoized per version"""
+    key = f'{LATEST_YEAR_CACHE_KEY}:{get_dataset_version()}'
+    year = cache.get(key)
+    if year is None:
+        year = CollegeRanking.objects.aggregate(year=Max('ranking_year'))['year'] or 0
+        cache.set(key, year, LATEST_YEAR_CACHE_TIMEOUT)
+    return year or None
+
+
+def invalidate_dataset_version():
+    """Forget the memoized version so the next reader recomputes it"""
+    cache.delete(VERSION_CACHE_KEY)
@@ -0,0 +1,313 @@
+"""
+Streaming bulk export of the rankings dataset
+
+Every ranking, joined with its college and source (or every precomputed
+composite position), is read through a server-side cursor
+(``.iterator(chunk_size=...)``) as flat tuples and encoded as it goes, so
+an export of any size holds at most one batch of rows in memory. Used by
+``/api/export/<table>/`` (streamed over HTTP) and the ``export_rankings``
+management command (streamed to a file).
+
+Formats:
+
+    ndjson      one JSON object per line
+    csv         header line, then one line per row
+    arrow       Arrow IPC file of record batches; memory-map it with
+                ``pyarrow.ipc.open_file(pyarrow.memory_map(path))``
+    parquet     Parquet file with one row group per record batch
+
+Decimal columns are written as float64 in the columnar formats. ``arrow``
+and ``parquet`` need the optional ``pyarrow`` package.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import router
+from rest_framework.utils.encoders import JSONEncoder
+
+from .aggregation import METHODS
+from .models import METRIC_FIELDS, AggregateRanking, CollegeRanking, RankingSource
+from .renderers import json_default
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# pyarrow is optional and imported by the first columnar export
+# (``load_pyarrow``): it would add ~20ms to every worker's start-up
+pa = pq = None
+
+EXPORT_CHUNK_SIZE = 2000
+RECORD_BATCH_SIZE = 10_000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.file',
+    'parquet': 'application/vnd.apache.parquet',
+}
+COLUMNAR_FORMATS = ('arrow', 'parquet')
+
+# (output column, ORM lookup)
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('college_id', 'college_id'),
+    ('college_name', 'college__name'),
+    ('country', 'college__country'),
+    ('city', 'college__city'),
+    ('source_code', 'source__code'),
+    ('source_name', 'source__name'),
+    ('region', 'source__region'),
+    ('ranking_year', 'ranking_year'),
+    ('rank', 'rank'),
+    ('score', 'score'),
+    ('overall_score', 'overall_score'),
+] + [(name, name) for name in METRIC_FIELDS] + [
+    ('updated_at', 'updated_at'),
+]
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+COMPOSITE_COLUMNS = [
+    ('region', 'region'),
+    ('ranking_year', 'ranking_year'),
+    ('method', 'method'),
+    ('position', 'position'),
+    ('college_id', 'college_id'),
+    ('college_name', 'college__name'),
+    ('country', 'college__country'),
+    ('value', 'value'),
+    ('sources_count', 'sources_count'),
+    ('dataset_version', 'dataset_version'),
+]
+
+INTEGER_COLUMNS = {'id', 'college_id', 'ranking_year', 'rank', 'position', 'sources_count'}
+DECIMAL_COLUMNS = {'score', 'overall_score', *METRIC_FIELDS}
+FLOAT_COLUMNS = {'value'}
+
+
+def _check_region(region):
+    regions = [code for code, _ in RankingSource.REGION_CHOICES]
+    if region not in regions:
+        raise ValidationError(f"region must be one of: {', '.join(regions)}")
+
+
+def export_queryset(source=None, region=None, year=None):
+    """
+    Flat export rows, optionally filtered, in primary-key order.
+
+    Raises ``ValidationError`` for an unknown source or region.
+    """
+    rankings = CollegeRanking.objects.all()
+    if source:
+        if not RankingSource.objects.filter(code=source).exists():
+            raise ValidationError(f"Unknown source '{source}'")
+        rankings = rankings.filter(source__code=source)
+    if region:
+        _check_region(region)
+        rankings = rankings.filter(source__region=region)
+    if year:
+        rankings = rankings.filter(ranking_year=year)
+    return rankings.order_by('id').values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+
+
+def composite_export_queryset(region=None, year=None, method=None):
+    """
+    Precomputed composite positions in (region, year, method, position) order.
+
+    Raises ``ValidationError`` for an unknown region or method.
+    """
+    composites = AggregateRanking.objects.all()
+    if region:
+        _check_region(region)
+        composites = composites.filter(region=region)
+    if year:
+        composites = composites.filter(ranking_year=year)
+    if method:
+        if method not in METHODS:
+            raise ValidationError(f"method must be one of: {', '.join(METHODS)}")
+        composites = composites.filter(method=method)
+    return composites.order_by('region', 'ranking_year', 'method', 'position').values_list(
+        *(lookup for _, lookup in COMPOSITE_COLUMNS)
+    )
+
+
+# table: (columns, queryset factory)
+EXPORT_TABLES = {
+    'rankings': (EXPORT_COLUMNS, export_queryset),
+    'composites': (COMPOSITE_COLUMNS, composite_export_queryset),
+}
+
+
+def iter_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def _ndjson_line(row, names):
+    record = dict(zip(names, row))
+    if orjson is not None:
+        return orjson.dumps(record, default=json_default, option=orjson.OPT_UTC_Z) + b'\n'
+    return (json.dumps(record, cls=JSONEncoder) + '\n').encode('utf-8')
+
+
+def ndjson_chunks(rows, names=COLUMN_NAMES, lines_per_chunk=500):
+    """One JSON object per line, yielded as byte chunks of ``lines_per_chunk`` lines"""
+    buffer = []
+    for row in rows:
+        buffer.append(_ndjson_line(row, names))
+        if len(buffer) >= lines_per_chunk:
+            yield b''.join(buffer)
+            buffer = []
+    if buffer:
+        yield b''.join(buffer)
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(rows, names=COLUMN_NAMES, lines_per_chunk=500):
+    """A header line then one CSV line per row, yielded as byte chunks"""
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(names)]
+    for row in rows:
+        buffer.append(writer.writerow([_csv_value(value) for value in row]))
+        if len(buffer) >= lines_per_chunk:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def load_pyarrow():
+    """Import pyarrow on first use; returns whether it is installed"""
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # pragma: no cover - optional dependency
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+
+def arrow_schema(names):
+    def field_type(name):
+        if name in INTEGER_COLUMNS:
+            return pa.int64()
+        if name in DECIMAL_COLUMNS or name in FLOAT_COLUMNS:
+            return pa.float64()
+        if name == 'updated_at':
+            return pa.timestamp('us', tz='UTC')
+        return pa.string()
+
+    return pa.schema([(name, field_type(name)) for name in names])
+
+
+def record_batch(rows, schema):
+    """One Arrow record batch from a list of row tuples, built column by column"""
+    arrays = []
+    for field, values in zip(schema, zip(*rows)):
+        if field.name in DECIMAL_COLUMNS:
+            # Decimal -> decimal128 is converted in C; cast rather than float() per value
+            arrays.append(pa.array(values, type=pa.decimal128(5, 2)).cast(pa.float64()))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def record_batches(rows, schema, batch_size=RECORD_BATCH_SIZE):
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield record_batch(batch, schema)
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def arrow_chunks(rows, names=COLUMN_NAMES, batch_size=RECORD_BATCH_SIZE):
+    """An Arrow IPC file, yielded as each record batch is written"""
+    schema = arrow_schema(names)
+    sink = _ChunkSink()
+    with pa.ipc.new_file(sink, schema) as writer:
+        for batch in record_batches(rows, schema, batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def parquet_chunks(rows, names=COLUMN_NAMES, batch_size=RECORD_BATCH_SIZE):
+    """A Parquet file, yielded as each row group is written"""
+    schema = arrow_schema(names)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for batch in record_batches(rows, schema, batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {
+    'ndjson': ndjson_chunks,
+    'csv': csv_chunks,
+    'arrow': arrow_chunks,
+    'parquet': parquet_chunks,
+}
+
+
+def stream_export(fmt, table='rankings', chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """
+    Byte chunks of ``table`` in ``fmt``; filters are validated before streaming starts.
+
+    ``filters`` are the keyword arguments of the table's queryset function.
+    """
+    if fmt not in ENCODERS:
+        raise ValidationError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt in COLUMNAR_FORMATS and not load_pyarrow():
+        raise ValidationError(f'{fmt} export requires pyarrow')
+    if table not in EXPORT_TABLES:
+        raise ValidationError(f"table must be one of: {', '.join(EXPORT_TABLES)}")
+    columns, export = EXPORT_TABLES[table]
+    queryset = export(**filters)
+    # Pick the database now: an HTTP response body streams after the request's
+    # routing context (rankings.routers) has ended
+    queryset = queryset.using(router.db_for_read(queryset.model))
+    return ENCODERS[fmt](iter_rows(queryset, chunk_size), [name for name, _ in columns])
@@ -0,0 +1,200 @@
+"""
+Faceted filtering over the rankings matrix
+
+``GET /api/colleges/filter/`` combines any of these filters for one year
+(the latest by default):
+
+    rank.<source>=1..100            rank range in a source (either end optional)
+    <metric>=80..                   a metric averaged across sources, for each
+                                    of the seven ``METRIC_FIELDS``
+    composite.international=70..    regional composite score
+    composite.american=..90
+    country=USA,Canada              one of these countries (repeatable)
+    city=Boston                     one of these cities (repeatable)
+    sort=-research_impact           any range key, or ``name`` (default)
+
+Each range key is a precomputed column of a ``FacetIndex``, built once per
+matrix (dataset version) and year with data and memoized in
+``matrix.derived`` (one index per year at most), so a filter is a
+vectorized comparison per key and any combination answers in milliseconds
+without touching the database until the page is loaded.
+
+Facet counts per country, city and source describe the matching colleges.
+Country and city counts ignore the filter on their own field, so a client
+can show how many colleges each other country or city would add.
+"""
+
+import numpy as np
+
+from .bitmaps import name_ordered_ids
+from .models import METRIC_FIELDS, College
+from .percentiles import college_metric_averages
+
+DEFAULT_FACET_LIMIT = 20
+MAX_FACET_LIMIT = 200
+
+
+def parse_range(key, value):
+    """``'lo..hi'`` (either end optional) or a single value, as ``(lo, hi)`` floats or ``None``"""
+    try:
+        if '..' not in value:
+            return float(value), float(value)
+        low, high = value.split('..', 1)
+        return (
+            float(low) if low.strip() else None,
+            float(high) if high.strip() else None,
+        )
+    except ValueError:
+        raise ValueError(f'{key} must be a number or a range like 10..100, ..100 or 10..')
+
+
+def _values(params, key):
+    """Comma-separated and repeated values of a query parameter"""
+    return [
+        value.strip()
+        for raw in params.getlist(key)
+        for value in raw.split(',')
+        if value.strip()
+    ]
+
+
+def city_codes(matrix):
+    """``(cities, (C,) index into cities)`` for the matrix's colleges, once per matrix"""
+    return matrix.memo('city_codes', lambda: _city_codes(matrix))
+
+
+def _city_codes(matrix):
+    ids, cities = [], []
+    for college_id, city in College.objects.values_list('id', 'city').iterator():
+        ids.append(college_id)
+        cities.append(city or '')
+    names, inverse = np.unique(np.array(cities, dtype=object), return_inverse=True)
+    positions = matrix.college_positions(ids)
+    known = positions >= 0
+    codes = np.zeros(len(matrix.college_ids), dtype=np.int32)
+    codes[positions[known]] = inverse[known]
+    return names.tolist(), codes
+
+
+class FacetIndex:
+    """Per-year filter columns over the rows of a rankings matrix"""
+
+    def __init__(self, matrix, year):
+        colleges = len(matrix.college_ids)
+        position = matrix.year_position(year) if year is not None else None
+        self.college_ids = matrix.college_ids
+        self.source_codes = list(matrix.source_codes)
+        self.columns = {}
+        for s, code in enumerate(self.source_codes):
+            self.columns[f'rank.{code}'] = (
+                matrix.rank[:, s, position] if position is not None
+                else np.full(colleges, np.nan, dtype=np.float32)
+            )
+        averages = college_metric_averages(matrix, np.arange(colleges), year)
+        for m, name in enumerate(METRIC_FIELDS):
+            self.columns[name] = averages[:, m]
+        for region in sorted(set(matrix.source_regions.tolist())):
+            self.columns[f'composite.{region.lower()}'] = matrix.region_average(region, year)[0]
+
+        self.ranked = (
+            matrix.present[:, :, position] if position is not None
+            else np.zeros((colleges, len(self.source_codes)), dtype=bool)
+        )
+        self.countries = list(matrix.countries)
+        self.country_codes = matrix.country_codes
+        self.cities, self.city_codes = city_codes(matrix)
+
+        name_order = matrix.college_positions(name_ordered_ids(matrix))
+        self.name_order = name_order[name_order >= 0]
+        # Position of each row in name order, to break ties when sorting by a column
+        self.name_rank = np.full(colleges, colleges, dtype=np.int64)
+        self.name_rank[self.name_order] = np.arange(len(self.name_order))
+
+    @staticmethod
+    def _lookup(names, values):
+        codes = {name.lower(): i for i, name in enumerate(names)}
+        return np.array([codes.get(value.lower(), -1) for value in values], dtype=np.int64)
+
+    @staticmethod
+    def _counts(names, codes, mask, limit):
+        """The ``limit`` most frequent non-empty values among the masked rows"""
+        counts = np.bincount(codes[mask], minlength=len(names))
+        order = np.lexsort((np.arange(len(names)), -counts))
+        order = order[counts[order] > 0]
+        facet = [{'value': names[i], 'count': int(counts[i])} for i in order[:limit + 1] if names[i]]
+        return facet[:limit]
+
+    def search(self, params, facet_limit=DEFAULT_FACET_LIMIT):
+        """
+        Apply the filters in ``params`` (a ``QueryDict``); returns the
+        matching college ids in ``sort`` order and the facet counts.
+        Raises ``ValueError`` for malformed or unknown filters.
+        """
+        matched = np.ones(len(self.college_ids), dtype=bool)
+        for key in params:
+            if not (key.startswith(('rank.', 'composite.')) or key in METRIC_FIELDS):
+                continue
+            column = self.columns.get(key)
+            if column is None:
+                raise ValueError(f'Unknown filter: {key}')
+            low, high = parse_range(key, params[key])
+            keep = ~np.isnan(column)
+            if low is not None:
+                keep &= column >= low
+            if high is not None:
+                keep &= column <= high
+            matched &= keep
+
+        in_country = in_city = True
+        countries = _values(params, 'country')
+        if countries:
+            in_country = np.isin(self.country_codes, self._lookup(self.countries, countries))
+        cities = _values(params, 'city')
+        if cities:
+            in_city = np.isin(self.city_codes, self._lookup(self.cities, cities))
+
+        facets = {
+            'country': self._counts(self.countries, self.country_codes, matched & in_city, facet_limit),
+            'city': self._counts(self.cities, self.city_codes, matched & in_country, facet_limit),
+        }
+        matched &= in_country & in_city
+        ranked_by = self.ranked[matched].sum(axis=0)
+        facets['source'] = [
+            {'value': code, 'count': int(count)}
+            for code, count in zip(self.source_codes, ranked_by) if count
+        ]
+        return self.college_ids[self._order(matched, params.get('sort', 'name'))], facets
+
+    def _order(self, matched, sort):
+        if sort in ('name', ''):
+            return self.name_order[matched[self.name_order]]
+        descending = sort.startswith('-')
+        column = self.columns.get(sort.lstrip('-'))
+        if column is None:
+            raise ValueError(
+                f"sort must be name or one of: {', '.join(self.columns)} (prefix - for descending)"
+            )
+        positions = np.flatnonzero(matched)
+        keys = column[positions].astype(np.float64)
+        if descending:
+            keys = -keys
+        # NaN sorts last either way; ties keep name order
+        return positions[np.lexsort((self.name_rank[positions], keys))]
+
+
+def facet_index(matrix, year):
+    """The matrix's ``FacetIndex`` for ``year``, built on first use"""
+    return matrix.memo_per_year('facet_index', year, lambda: FacetIndex(matrix, year))
+
+
+def faceted_search(matrix, params, year):
+    """
+    ``(college ids, facets)`` for the filters in ``params`` and ``year``;
+    ``facet_limit`` caps the values listed per facet
+    """
+    try:
+        facet_limit = int(params.get('facet_limit', DEFAULT_FACET_LIMIT))
+    except ValueError:
+        raise ValueError('facet_limit must be an integer')
+    facet_limit = max(1, min(facet_limit, MAX_FACET_LIMIT))
+    return facet_index(matrix, year).search(params, facet_limit)
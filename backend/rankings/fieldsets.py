@@ -0,0 +1,140 @@
+"""
+Sparse fieldsets for API serializers
+
+Clients can shape list rows with query parameters:
+
+    ?fields=rank,score,college.name     only these fields (dotted = nested)
+    ?exclude=source_code                everything except these
+    ?expand=college                     nest only these relations; the rest
+                                        collapse to their primary key
+    ?preset=slim                        a named shape declared on the
+                                        serializer's ``Meta.presets``
+
+Without any of these parameters serializers behave exactly as before.
+Serializers that support fieldsets also expose ``optimize_queryset`` so
+views can drop joins for relations that will not be rendered.
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+FIELDSET_PARAMS = ('fields', 'exclude', 'expand', 'preset')
+
+
+def _split(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    return [item.strip() for item in value if item and item.strip()]
+
+
+class Fieldset:
+    """Parsed ``fields`` / ``exclude`` / ``expand`` selection for one serializer level"""
+
+    def __init__(self, fields=None, exclude=None, expand=None):
+        self.fields = _split(fields) or None
+        self.exclude = set(_split(exclude) or [])
+        self.expand = None if expand is None else set(_split(expand))
+
+    def __repr__(self):
+        return f'Fieldset(fields={self.fields}, exclude={self.exclude}, expand={self.expand})'
+
+    @classmethod
+    def from_request(cls, request, serializer_class):
+        """Build a fieldset from query params, or ``None`` if the client asked for nothing"""
+        if request is None:
+            return None
+        params = request.query_params
+        if not any(name in params for name in FIELDSET_PARAMS):
+            return None
+
+        spec = {}
+        preset = params.get('preset')
+        if preset:
+            presets = getattr(serializer_class.Meta, 'presets', {})
+            if preset not in presets:
+                raise ParseError(
+                    f"Unknown preset '{preset}'. Available: {', '.join(sorted(presets)) or 'none'}"
+                )
+            spec.update(presets[preset])
+
+        for name in ('fields', 'exclude', 'expand'):
+            if name in params:
+                spec[name] = params.get(name)
+        return cls(**spec)
+
+    def top_level_fields(self):
+        if self.fields is None:
+            return None
+        return list(dict.fromkeys(name.split('.', 1)[0] for name in self.fields))
+
+    def includes(self, name):
+        top_level = self.top_level_fields()
+        if name in self.exclude:
+            return False
+        return top_level is None or name in top_level
+
+    def is_expanded(self, name, default=True):
+        if self.fields and any(f.startswith(f'{name}.') for f in self.fields):
+            return True
+        if self.expand is None:
+            return default
+        return name in self.expand or any(e.startswith(f'{name}.') for e in self.expand)
+
+    def child(self, name):
+        """Fieldset for the nested serializer behind relation ``name``"""
+        prefix = f'{name}.'
+        nested_fields = [f[len(prefix):] for f in self.fields or [] if f.startswith(prefix)]
+        nested_exclude = [f[len(prefix):] for f in self.exclude if f.startswith(prefix)]
+        nested_expand = None
+        if self.expand is not None:
+            nested_expand = [e[len(prefix):] for e in self.expand if e.startswith(prefix)]
+        return Fieldset(
+            fields=nested_fields or None,
+            exclude=nested_exclude,
+            expand=nested_expand,
+        )
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin applying a ``Fieldset`` passed as the ``fieldset`` kwarg.
+
+    ``Meta.expandable_fields`` maps relation names to the serializer class
+    used when the relation is expanded; collapsed relations render as the
+    related primary key without loading the related row.
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fieldset = fieldset
+        if fieldset is not None:
+            self._apply_fieldset(fieldset)
+
+    def _apply_fieldset(self, fieldset):
+        for name in list(self.fields):
+            if not fieldset.includes(name):
+                self.fields.pop(name)
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name, serializer_class in expandable.items():
+            if name not in self.fields:
+                continue
+            if fieldset.is_expanded(name):
+                self.fields[name] = self.build_expanded_field(
+                    name, serializer_class, fieldset.child(name)
+                )
+            else:
+                self.fields[name] = self.build_collapsed_field(name)
+
+    def build_expanded_field(self, name, serializer_class, fieldset):
+        return serializer_class(read_only=True, fieldset=fieldset)
+
+    def build_collapsed_field(self, name):
+        return serializers.PrimaryKeyRelatedField(read_only=True)
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fieldset):
+        """Hook for views: trim joins/columns the fieldset will not render"""
+        return queryset
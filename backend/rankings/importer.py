@@ -0,0 +1,299 @@
+"""
+Streaming bulk import of ranking files
+
+Official ranking spreadsheets (CSV, including CSV exported from Excel) and
+NDJSON dumps are read one row at a time, validated and normalized with the
+same rules as the scrapers (``scrapers.normalize``), and written in chunks:
+
+* colleges are resolved per chunk with one lookup for the names not seen
+  yet and one ``bulk_create`` for the new ones;
+* rankings are upserted on (college, source, year, version) with
+  ``bulk_create`` conflict updates, one transaction per chunk, into a
+  staging dataset version that is activated once the file is done;
+* after each committed chunk the number of rows consumed and the staging
+  version are written to a checkpoint file, so an interrupted import can
+  resume where it stopped. Upserts are idempotent, so replaying the chunk
+  in flight is harmless.
+
+Memory is bounded by the chunk size and the college-name cache, not by the
+size of the file.
+"""
+
+import csv
+import json
+import os
+import re
+from itertools import islice
+
+from django.db import reset_queries, transaction
+
+from scrapers.normalize import clean_text, normalize_rank, normalize_score
+
+from .models import METRIC_FIELDS, College, CollegeRanking, RankingSource, active_version_id
+
+IMPORT_CHUNK_SIZE = 2000
+COLLEGE_CACHE_MAX = 200_000
+MAX_REPORTED_ERRORS = 100
+# Largest value an ``IntegerField`` column holds on every supported database
+MAX_INTEGER = 2**31 - 1
+
+# Spreadsheet headers accepted for each field, after lower-casing and
+# replacing runs of non-alphanumerics with '_'
+COLUMN_ALIASES = {
+    'college': 'college_name',
+    'name': 'college_name',
+    'institution': 'college_name',
+    'university': 'college_name',
+    'source_code': 'source',
+    'year': 'ranking_year',
+    'url': 'data_source_url',
+}
+SCORE_FIELDS = ['score', 'overall_score', *METRIC_FIELDS]
+UPSERT_FIELDS = ['rank', *SCORE_FIELDS, 'data_source_url', 'updated_at']
+FILE_FORMATS = {
+    '.csv': 'csv',
+    '.tsv': 'csv',
+    '.txt': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+def normalize_header(name):
+    key = re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def read_csv(path):
+    """Rows of a CSV file as dicts; the delimiter is sniffed and a UTF-8 BOM is dropped"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        reader.fieldnames = [normalize_header(name) for name in reader.fieldnames or []]
+        yield from reader
+
+
+def read_ndjson(path):
+    """One dict per non-blank line; a line that is not valid JSON is yielded as the raw text"""
+    with open(path, encoding='utf-8-sig') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            if isinstance(record, dict):
+                record = {normalize_header(key): value for key, value in record.items()}
+            yield record
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+def detect_format(path):
+    """Import format from the file extension; raises ``ValueError`` if unknown"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_FORMATS:
+        raise ValueError(
+            f"Cannot tell the format of '{path}'; expected one of: {', '.join(FILE_FORMATS)}"
+        )
+    return FILE_FORMATS[extension]
+
+
+def _limited(model, field, value):
+    """``value``, or ``ValueError`` if it does not fit the column"""
+    max_length = model._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise ValueError(f'{field} is longer than {max_length} characters')
+    return value
+
+
+def clean_row(record, sources, source=None, year=None):
+    """
+    Validate and normalize one raw record into ``CollegeRanking`` field values.
+
+    ``sources`` maps source codes to ids; ``source`` and ``year`` fill in
+    columns the file leaves out. Raises ``ValueError`` describing the first
+    problem found.
+    """
+    if not isinstance(record, dict):
+        raise ValueError('not a JSON object')
+
+    college_name = clean_text(str(record.get('college_name') or ''))
+    if not college_name:
+        raise ValueError('college_name is required')
+
+    code = clean_text(str(record.get('source') or source or '')).lower()
+    if code not in sources:
+        raise ValueError(f"Unknown source '{code}'" if code else 'source is required')
+
+    try:
+        ranking_year = int(str(record.get('ranking_year') or year or '').strip())
+    except ValueError:
+        raise ValueError('ranking_year must be an integer')
+    if not 0 < ranking_year <= MAX_INTEGER:
+        raise ValueError(f'ranking_year {ranking_year} is out of range')
+
+    rank = normalize_rank(record.get('rank'))
+    if rank is None:
+        raise ValueError(f"Invalid rank {record.get('rank')!r}")
+    if rank > MAX_INTEGER:
+        raise ValueError(f'rank {rank} is out of range')
+
+    country = _limited(College, 'country', clean_text(str(record.get('country') or '')))
+    city = _limited(College, 'city', clean_text(str(record.get('city') or '')))
+    url = _limited(
+        CollegeRanking, 'data_source_url', str(record.get('data_source_url') or '').strip()
+    )
+
+    row = {
+        'college_name': college_name[:200],
+        'country': country or 'Unknown',
+        'city': city,
+        'source_id': sources[code],
+        'ranking_year': ranking_year,
+        'rank': rank,
+        'data_source_url': url,
+    }
+    for field in SCORE_FIELDS:
+        value = normalize_score(record.get(field))
+        row[field] = round(value, 2) if value is not None else None
+    return row
+
+
+def chunked(records, size):
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+def resolve_colleges(rows, cache):
+    """
+    Fill ``cache`` (college name -> id) for every college in ``rows``.
+
+    Unknown names are looked up in one query and the remaining ones created
+    in one ``bulk_create``. Returns the number of colleges created.
+    """
+    names = {row['college_name'] for row in rows}
+    if len(cache) + len(names - cache.keys()) > COLLEGE_CACHE_MAX:
+        cache.clear()
+    missing = names - cache.keys()
+    if not missing:
+        return 0
+
+    cache.update(College.objects.filter(name__in=missing).values_list('name', 'id'))
+    new = {}
+    for row in rows:
+        if row['college_name'] not in cache:
+            new.setdefault(row['college_name'], College(
+                name=row['college_name'], country=row['country'], city=row['city'],
+            ))
+    if new:
+        College.objects.bulk_create(new.values(), ignore_conflicts=True)
+        cache.update(College.objects.filter(name__in=new).values_list('name', 'id'))
+    return len(new)
+
+
+def upsert_rankings(rows, colleges, version_id):
+    """Insert or update one ranking per (college, source, year) in a version; the last duplicate wins"""
+    rankings = {}
+    for row in rows:
+        college_id = colleges[row['college_name']]
+        rankings[(college_id, row['source_id'], row['ranking_year'])] = CollegeRanking(
+            college_id=college_id,
+            source_id=row['source_id'],
+            ranking_year=row['ranking_year'],
+            version_id=version_id,
+            rank=row['rank'],
+            data_source_url=row['data_source_url'],
+            **{field: row[field] for field in SCORE_FIELDS},
+        )
+    CollegeRanking.all_versions.bulk_create(
+        rankings.values(),
+        update_conflicts=True,
+        unique_fields=['college', 'source', 'ranking_year', 'version'],
+        update_fields=UPSERT_FIELDS,
+    )
+    return len(rankings)
+
+
+def import_records(records, source=None, year=None, chunk_size=IMPORT_CHUNK_SIZE,
+                   start=0, on_chunk=None, version=None):
+    """
+    Import raw records into ``version`` (default: the active version),
+    skipping the first ``start`` (already imported).
+
+    ``on_chunk(results)`` is called after each chunk commits. Returns a
+    results dict: ``rows`` consumed (including ``start``), ``imported``,
+    ``colleges_created``, ``error_count`` and the first ``errors`` as
+    ``(row number, message)``.
+    """
+    sources = dict(RankingSource.objects.values_list('code', 'id'))
+    if source and source not in sources:
+        raise ValueError(f"Unknown source '{source}'")
+
+    version_id = version.pk if version is not None else active_version_id()
+    colleges = {}
+    results = {
+        'rows': start,
+        'imported': 0,
+        'colleges_created': 0,
+        'error_count': 0,
+        'errors': [],
+    }
+    for chunk in chunked(islice(records, start, None), chunk_size):
+        rows = []
+        for number, record in enumerate(chunk, start=results['rows'] + 1):
+            try:
+                rows.append(clean_row(record, sources, source, year))
+            except ValueError as e:
+                results['error_count'] += 1
+                if len(results['errors']) < MAX_REPORTED_ERRORS:
+                    results['errors'].append((number, str(e)))
+
+        with transaction.atomic():
+            results['colleges_created'] += resolve_colleges(rows, colleges)
+            results['imported'] += upsert_rankings(rows, colleges, version_id)
+        results['rows'] += len(chunk)
+        reset_queries()  # with DEBUG on, the query log would otherwise grow with the file
+        if on_chunk is not None:
+            on_chunk(results)
+    return results
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def read_checkpoint(checkpoint, path):
+    """
+    ``(rows, version_id)`` already imported from ``path``, or ``(0, None)``
+    if there is no checkpoint for this file
+    """
+    try:
+        with open(checkpoint) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0, None
+    if state.get('file') != file_fingerprint(path):
+        return 0, None
+    return int(state.get('rows', 0)), state.get('version')
+
+
+def write_checkpoint(checkpoint, path, rows, version_id=None):
+    """Atomically record that the first ``rows`` rows of ``path`` are in ``version_id``"""
+    temporary = f'{checkpoint}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({'file': file_fingerprint(path), 'rows': rows, 'version': version_id}, f)
+    os.replace(temporary, checkpoint)
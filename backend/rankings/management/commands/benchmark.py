@@ -0,0 +1,42 @@
+"""
+Management Command to Run Performance Benchmarks
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.benchmarks import SUITES, format_table
+
+
+class Command(BaseCommand):
+    help = 'Run performance benchmark suites against the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suites',
+            nargs='*',
+            help=f'Suites to run (default: all). Available: {", ".join(sorted(SUITES))}',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Iterations per measurement',
+        )
+
+    def handle(self, *args, **options):
+        suites = options['suites'] or sorted(SUITES)
+        unknown = set(suites) - set(SUITES)
+        if unknown:
+            raise CommandError(f'Unknown suite(s): {", ".join(sorted(unknown))}')
+        for name in suites:
+            self.stdout.write(f"\n{'='*70}")
+            self.stdout.write(f'{name.upper()} ({options["iterations"]} iterations)')
+            self.stdout.write('='*70)
+            self._print_table(SUITES[name](options['iterations']))
+
+    def _print_table(self, rows):
+        if not rows:
+            self.stdout.write(self.style.WARNING('  No results'))
+            return
+        for line in format_table(rows):
+            self.stdout.write(line)
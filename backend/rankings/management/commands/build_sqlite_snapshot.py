@@ -0,0 +1,30 @@
+"""
+Management Command to Build the Read-Only SQLite Snapshot
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.sqlite_snapshot import build_sqlite_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Compile the active dataset into an immutable, indexed SQLite file for read serving'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Snapshot file (default: SQLITE_SNAPSHOT_PATH)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.SQLITE_SNAPSHOT_PATH
+        if not path:
+            raise CommandError('Pass --output or set SQLITE_SNAPSHOT_PATH')
+        snapshot = build_sqlite_snapshot(path)
+        for table, rows in snapshot['tables'].items():
+            self.stdout.write(f'  {table}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Built {snapshot['path']} ({snapshot['bytes'] // 1024} KiB) "
+            f"in {snapshot['seconds']:.1f}s"
+        ))
@@ -0,0 +1,53 @@
+"""
+Management Command to Verify Precomputed College Profiles
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.profiles import check_profiles, rebuild_profiles
+
+
+class Command(BaseCommand):
+    help = 'Diff stored college profile documents against a live computation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--college',
+            type=int,
+            action='append',
+            dest='college_ids',
+            help='Only check this college id (repeatable)',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rebuild every profile that is missing or differs',
+        )
+        parser.add_argument(
+            '--max-diffs',
+            type=int,
+            default=5,
+            help='Differences to print per college',
+        )
+
+    def handle(self, *args, **options):
+        mismatched = []
+        for college_id, problems in check_profiles(options['college_ids']):
+            mismatched.append(college_id)
+            self.stdout.write(self.style.WARNING(f'College {college_id}:'))
+            for problem in problems[:options['max_diffs']]:
+                self.stdout.write(f'  {problem}')
+            if len(problems) > options['max_diffs']:
+                self.stdout.write(f"  ... {len(problems) - options['max_diffs']} more")
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS('✓ All profiles match the live computation'))
+            return
+
+        if options['fix']:
+            rebuilt = rebuild_profiles(mismatched)
+            self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {rebuilt} profiles'))
+        else:
+            raise CommandError(
+                f'{len(mismatched)} profile(s) out of date; rerun with --fix to rebuild them'
+            )
@@ -0,0 +1,103 @@
+"""
+Management Command to Inspect and Switch Dataset Versions
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.models import DatasetVersion, active_version_id
+from rankings.pipeline import run_post_ingest
+from rankings.versions import (
+    KEEP_VERSIONS,
+    STAGING_MAX_AGE,
+    activate_version,
+    discard_version,
+    prune_versions,
+    rollback_version,
+)
+
+
+class Command(BaseCommand):
+    help = 'List, activate, roll back, discard or prune dataset versions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['list', 'activate', 'rollback', 'discard', 'prune'],
+        )
+        parser.add_argument('version', nargs='?', type=int, help='Version id (activate, discard)')
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=KEEP_VERSIONS,
+            help='Validated versions to keep when pruning',
+        )
+        parser.add_argument(
+            '--staging-days',
+            type=float,
+            default=STAGING_MAX_AGE.total_seconds() / 86400,
+            help='Prune staging versions (abandoned ingests) older than this many days',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Activate even if the version drops sources or most rankings',
+        )
+        parser.add_argument(
+            '--skip-publish',
+            action='store_true',
+            help='Do not publish the static API snapshot after switching versions',
+        )
+
+    def handle(self, *args, **options):
+        action = options['action']
+        try:
+            if action == 'list':
+                self._list()
+            elif action == 'activate':
+                activate_version(self._version(options), force=options['force'])
+                self._rebuild(options)
+            elif action == 'rollback':
+                version = rollback_version()
+                self.stdout.write(f'Rolled back to v{version.pk}')
+                self._rebuild(options)
+            elif action == 'discard':
+                discard_version(self._version(options))
+            else:
+                deleted = prune_versions(
+                    options['keep'], timedelta(days=options['staging_days'])
+                )
+                self.stdout.write(f'Pruned {deleted} versions')
+        except ValueError as e:
+            raise CommandError(str(e))
+        if action != 'list':
+            self.stdout.write(self.style.SUCCESS(f'✓ Active version: v{active_version_id()}'))
+
+    def _version(self, options):
+        if options['version'] is None:
+            raise CommandError(f"{options['action']} needs a version id")
+        try:
+            return DatasetVersion.objects.get(pk=options['version'])
+        except DatasetVersion.DoesNotExist:
+            raise CommandError(f"No version {options['version']}")
+
+    def _rebuild(self, options):
+        run_post_ingest(publish=not options['skip_publish'], log=self.stdout.write)
+
+    def _list(self):
+        active = active_version_id()
+        for version in DatasetVersion.objects.all():
+            marker = '*' if version.pk == active else ' '
+            activated = version.activated_at.strftime('%Y-%m-%d %H:%M') if version.activated_at else '-'
+            self.stdout.write(
+                f'{marker} v{version.pk:<5} {version.status:<10} {version.rankings_count:>9} '
+                f'rankings  activated {activated}  {version.label}'
+            )
+            if version.notes:
+                self.stdout.write(f'         {version.notes}')
+            if version.status == 'STAGING':
+                self.stdout.write(
+                    f"         staged {version.created_at.strftime('%Y-%m-%d %H:%M')}; if its "
+                    f'ingest is no longer running: dataset_versions discard {version.pk}'
+                )
@@ -0,0 +1,58 @@
+"""
+Management Command to Export the Rankings Dataset
+"""
+
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_TABLES, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream the rankings (or composites) table to NDJSON, CSV, Arrow IPC or Parquet '
+        'without loading it into memory'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--table', choices=list(EXPORT_TABLES), default='rankings')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--source', help='Only rankings from this source code')
+        parser.add_argument('--region', help='Only rankings from sources in this region')
+        parser.add_argument('--year', type=int, help='Only rankings for this year')
+        parser.add_argument('--method', help='Only composites from this aggregation method')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        filters = {'region': options['region'], 'year': options['year']}
+        if options['table'] == 'rankings':
+            filters['source'] = options['source']
+        else:
+            filters['method'] = options['method']
+        try:
+            chunks = stream_export(
+                options['format'],
+                options['table'],
+                chunk_size=options['chunk_size'],
+                **filters,
+            )
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Exported {written} bytes of {options['table']} as {options['format']} "
+            f"to {options['output']}"
+        ))
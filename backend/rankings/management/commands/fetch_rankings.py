@@ -5,6 +5,14 @@ Management Command to Fetch Rankings Data
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from rankings.models import College, CollegeRanking, RankingSource, CacheMetadata
+from rankings.pipeline import run_post_ingest
+from rankings.versions import (
+    DatasetValidationError,
+    activate_version,
+    create_staging_version,
+    discard_version,
+    prune_versions,
+)
 from scrapers import QSScraper, ARWUScraper, USNewsScraper, ForbesScraper, NicheScraper
 import logging
 from datetime import datetime
@@ -31,6 +39,16 @@ class Command(BaseCommand):
             action='store_true',
             help='Only initialize ranking sources without fetching data',
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Activate the new dataset version even if it drops sources or most rankings',
+        )
+        parser.add_argument(
+            '--skip-publish',
+            action='store_true',
+            help='Do not publish the static API snapshot after fetching',
+        )
     
     def handle(self, *args, **options):
         source_filter = options.get('source')
@@ -64,12 +82,33 @@ class Command(BaseCommand):
             )
             return
         
-        for source_code, scraper in scrapers.items():
-            self.stdout.write(f"\n{'='*50}")
-            self.stdout.write(f"Fetching {source_code.upper()} rankings...")
-            self._fetch_from_scraper(scraper, source_code)
+        # Readers keep seeing the active version until the staged one is activated
+        self.version = create_staging_version(f"fetch {', '.join(scrapers)}")
+        self.touched_college_ids = set()
+        try:
+            for source_code, scraper in scrapers.items():
+                self.stdout.write(f"\n{'='*50}")
+                self.stdout.write(f"Fetching {source_code.upper()} rankings...")
+                self._fetch_from_scraper(scraper, source_code)
+        except BaseException:
+            discard_version(self.version)
+            raise
         
         self.stdout.write(f"\n{'='*50}")
+        if not self.touched_college_ids:
+            discard_version(self.version)
+        else:
+            try:
+                activate_version(self.version, force=options.get('force', False))
+            except DatasetValidationError as e:
+                self.stdout.write(self.style.ERROR(f'✗ v{self.version.pk} not activated: {e}'))
+                return
+            self.stdout.write(f'Activated dataset v{self.version.pk}')
+            prune_versions()
+            run_post_ingest(
+                publish=not options.get('skip_publish', False),
+                log=self.stdout.write,
+            )
         self.stdout.write(self.style.SUCCESS('✓ Rankings fetch complete!'))
     
     def _init_sources(self):
@@ -196,12 +235,14 @@ class Command(BaseCommand):
                     
                     if created:
                         colleges_created += 1
+                    self.touched_college_ids.add(college.pk)
                     
                     # Create or update ranking entry
-                    college_ranking, ranking_created = CollegeRanking.objects.update_or_create(
+                    college_ranking, ranking_created = CollegeRanking.all_versions.update_or_create(
                         college=college,
                         source=source,
                         ranking_year=ranking_year,
+                        version=self.version,
                         defaults={
                             'rank': ranking_data.get('rank', 999),
                             'score': ranking_data.get('score'),
@@ -0,0 +1,129 @@
+"""
+Management Command to Import Ranking Files
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.importer import (
+    IMPORT_CHUNK_SIZE,
+    READERS,
+    detect_format,
+    import_records,
+    read_checkpoint,
+    write_checkpoint,
+)
+from rankings.models import DatasetVersion
+from rankings.pipeline import run_post_ingest
+from rankings.versions import (
+    DatasetValidationError,
+    activate_version,
+    create_staging_version,
+    discard_version,
+    prune_versions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream rankings from a CSV or NDJSON file into a staging dataset version in chunked '
+        'upserts, then activate it'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (or Excel-exported CSV) or NDJSON file')
+        parser.add_argument(
+            '--format',
+            choices=list(READERS),
+            help='File format (default: from the extension)',
+        )
+        parser.add_argument('--source', help='Source code for rows without a source column')
+        parser.add_argument('--year', type=int, help='Ranking year for rows without a year column')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Rows per transaction',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <path>.checkpoint.json)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and import from the first row',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Activate even if the new version drops sources or most rankings',
+        )
+        parser.add_argument(
+            '--skip-publish',
+            action='store_true',
+            help='Do not publish the static API snapshot after importing',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file: {path}')
+        try:
+            fmt = options['format'] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint.json'
+        start, version_id = (0, None) if options['restart'] else read_checkpoint(checkpoint, path)
+        version = DatasetVersion.objects.filter(pk=version_id, status='STAGING').first()
+        if version is not None:
+            self.stdout.write(f'Resuming after row {start} into v{version.pk} ({checkpoint})')
+        else:
+            start = 0
+            version = create_staging_version(f'import {os.path.basename(path)}')
+            self.stdout.write(f'Staging v{version.pk} ({version.rankings_count} rankings copied)')
+
+        def on_chunk(results):
+            write_checkpoint(checkpoint, path, results['rows'], version.pk)
+            self.stdout.write(f"  {results['rows']} rows, {results['imported']} rankings upserted")
+
+        try:
+            results = import_records(
+                READERS[fmt](path),
+                source=options['source'],
+                year=options['year'],
+                chunk_size=options['chunk_size'],
+                start=start,
+                on_chunk=on_chunk,
+                version=version,
+            )
+        except ValueError as e:
+            discard_version(version)
+            raise CommandError(str(e))
+
+        for number, message in results['errors']:
+            self.stdout.write(self.style.WARNING(f'  Row {number}: {message}'))
+        if results['error_count'] > len(results['errors']):
+            self.stdout.write(self.style.WARNING(
+                f"  ... {results['error_count'] - len(results['errors'])} more invalid rows"
+            ))
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        if not results['imported'] and not start:
+            discard_version(version)
+        else:
+            try:
+                activate_version(version, force=options['force'])
+            except DatasetValidationError as e:
+                raise CommandError(f'v{version.pk} not activated: {e}')
+            self.stdout.write(f'Activated v{version.pk}')
+            prune_versions()
+            run_post_ingest(publish=not options['skip_publish'], log=self.stdout.write)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Imported {results['imported']} rankings from {results['rows'] - start} rows "
+            f"({results['colleges_created']} new colleges, {results['error_count']} invalid rows)"
+        ))
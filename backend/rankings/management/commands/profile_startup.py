@@ -0,0 +1,108 @@
+"""
+Management Command to Profile Worker Cold Starts
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rankings.benchmarks import format_table
+from rankings.startup import package_totals, parse_importtime
+from rankings.warmup import WARM_UP_PATHS
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Start fresh interpreters that load the WSGI application and report import time per '
+        'module and time to first byte, without and with the worker warm-up'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help='Paths to request (default: the warm-up paths)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help='Packages and modules to list',
+        )
+
+    def _run(self, paths, warm):
+        command = [sys.executable, '-X', 'importtime', '-m', 'rankings.startup', *paths]
+        if warm:
+            command.append('--warm-up')
+        started_at = time.time()
+        result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Profiled process failed:\n{result.stderr[-2000:]}')
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        timings['first_byte'] = (timings['first_byte_at'] or time.time()) - started_at
+        return timings, parse_importtime(result.stderr)
+
+    def _table(self, title, rows):
+        self.stdout.write(f"\n{title}")
+        for line in format_table(rows):
+            self.stdout.write(f'  {line}')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or WARM_UP_PATHS
+        top = options['top']
+        cold, imports = self._run(paths, warm=False)
+        warmed, _ = self._run(paths, warm=True)
+
+        phases = {'interpreter': None, **cold['phases']}
+        phases.update((f"GET {r['path']}", r['cold']) for r in cold['requests'])
+        phase_rows = []
+        for phase, seconds in phases.items():
+            phase_imports = imports.get(phase, [])
+            phase_rows.append({
+                'phase': phase,
+                'ms': _ms(seconds) if seconds is not None else '',
+                'modules': len(phase_imports),
+                'import_ms': _ms(sum(i[1] for i in phase_imports) / 1_000_000),
+            })
+        self._table('Phases (imports by the phase that paid for them)', phase_rows)
+
+        all_imports = [(phase, *i) for phase, phase_imports in imports.items() for i in phase_imports]
+        totals = package_totals([i[1:] for i in all_imports])
+        self._table('Import time by top-level package', [
+            {'package': name, 'modules': count, 'self_ms': _ms(us / 1_000_000)}
+            for name, (count, us) in sorted(totals.items(), key=lambda t: -t[1][1])[:top]
+        ])
+        self._table('Slowest modules (self time)', [
+            {
+                'module': module,
+                'phase': phase,
+                'self_ms': _ms(self_us / 1_000_000),
+                'cumulative_ms': _ms(cumulative_us / 1_000_000),
+            }
+            for phase, module, self_us, cumulative_us, _ in sorted(all_imports, key=lambda i: -i[2])[:top]
+        ])
+
+        warm_requests = {r['path']: r for r in warmed['requests']}
+        self._table('Time to first byte', [
+            {
+                'path': r['path'],
+                'status': r['status'],
+                'first_ms': _ms(r['cold']),
+                'first_after_warm_up_ms': _ms(warm_requests[r['path']]['cold']),
+                'repeat_ms': _ms(r['warm']),
+            }
+            for r in cold['requests']
+        ])
+        self.stdout.write(
+            f"\nProcess start to first byte: {_ms(cold['first_byte'])}ms without warm-up, "
+            f"{_ms(warmed['first_byte'])}ms with warm-up "
+            f"({_ms(warmed['phases']['warm up'])}ms of it warming up before serving)"
+        )
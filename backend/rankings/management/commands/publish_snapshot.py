@@ -0,0 +1,26 @@
+"""
+Management Command to Publish Static API Snapshots
+"""
+
+from django.core.management.base import BaseCommand
+
+from rankings.publish import publish_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Render read-only API resources to pre-compressed static JSON files'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Publishing API snapshot...')
+        manifest = publish_snapshot()
+
+        resources = manifest['resources']
+        self.stdout.write(f"  Sources: {resources['sources']}")
+        for region, pages in resources['composite'].items():
+            self.stdout.write(f'  Composite {region}: {pages} pages')
+        self.stdout.write(f"  Per-source pages: {sum(resources['rankings'].values())}")
+        self.stdout.write(f"  College details: {resources['colleges']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Snapshot {manifest['dataset_version']} published to {manifest['path']}"
+        ))
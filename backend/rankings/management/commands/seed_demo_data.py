@@ -4,7 +4,9 @@ Top 100+ universities across all 10 ranking systems
 """
 
 from django.core.management.base import BaseCommand
-from rankings.models import College, CollegeRanking, RankingSource
+from rankings.models import College, CollegeRanking, RankingSource, active_version_id
+from rankings.pipeline import run_post_ingest
+from rankings.versions import NothingStaged, staged_version
 
 
 # Top 100+ universities with real rankings from various sources
@@ -199,20 +201,48 @@ class Command(BaseCommand):
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Clear existing data before seeding',
+            help='Seed into an empty dataset version instead of a copy of the active one',
+        )
+        parser.add_argument(
+            '--skip-publish',
+            action='store_true',
+            help='Do not publish the static API snapshot after seeding',
         )
 
     def handle(self, *args, **options):
-        if options['clear']:
-            self.stdout.write('Clearing existing data...')
-            CollegeRanking.objects.all().delete()
-            College.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('✓ Cleared existing data'))
-
         # Ensure ranking sources exist
         sources = self._ensure_sources()
         
-        # Create colleges and rankings
+        label = 'seed demo data' + (' (clear)' if options['clear'] else '')
+        with staged_version(label, clone=not options['clear'], force=options['clear']) as version:
+            created_colleges, created_rankings = self._seed(sources, version)
+            if not created_rankings:
+                raise NothingStaged
+        if not created_rankings:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Seed data already present; dataset v{active_version_id()} unchanged'
+            ))
+            return
+        self.stdout.write(f'Activated dataset v{version.pk}')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Seeded {created_colleges} colleges and {created_rankings} rankings'
+        ))
+        
+        # Print summary by source
+        self.stdout.write('\nRankings by source:')
+        for code, info in SOURCES.items():
+            count = CollegeRanking.objects.filter(source__code=code).count()
+            self.stdout.write(f'  {info["name"]}: {count} colleges')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'\nTotal: {College.objects.count()} colleges, {CollegeRanking.objects.count()} rankings'
+        ))
+
+        run_post_ingest(publish=not options['skip_publish'], log=self.stdout.write)
+
+    def _seed(self, sources, version):
+        """Create colleges and their rankings in ``version``"""
         created_colleges = 0
         created_rankings = 0
         
@@ -248,10 +278,11 @@ class Command(BaseCommand):
                 else:
                     score = max(20, 50 - (rank - 100) * 0.15)
                 
-                ranking, created = CollegeRanking.objects.get_or_create(
+                ranking, created = CollegeRanking.all_versions.get_or_create(
                     college=college,
                     source=source,
                     ranking_year=2025,
+                    version=version,
                     defaults={
                         'rank': rank,
                         'score': round(score, 1),
@@ -260,19 +291,7 @@ class Command(BaseCommand):
                 if created:
                     created_rankings += 1
         
-        self.stdout.write(self.style.SUCCESS(
-            f'✓ Seeded {created_colleges} colleges and {created_rankings} rankings'
-        ))
-        
-        # Print summary by source
-        self.stdout.write('\nRankings by source:')
-        for code, info in SOURCES.items():
-            count = CollegeRanking.objects.filter(source__code=code).count()
-            self.stdout.write(f'  {info["name"]}: {count} colleges')
-        
-        self.stdout.write(self.style.SUCCESS(
-            f'\nTotal: {College.objects.count()} colleges, {CollegeRanking.objects.count()} rankings'
-        ))
+        return created_colleges, created_rankings
 
     def _ensure_sources(self):
         """Ensure all ranking sources exist with correct URLs"""
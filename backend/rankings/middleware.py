@@ -0,0 +1,161 @@
+"""
+API middleware
+
+``CompressionMiddleware`` negotiates brotli or gzip from ``Accept-Encoding``
+for API responses larger than ``API_COMPRESSION_MIN_BYTES``. Static files
+never reach it because WhiteNoise (which sits above it) serves its own
+pre-compressed variants.
+
+``ReadReplicaMiddleware`` sets up read/write database routing for each
+request (see ``rankings.routers``).
+"""
+
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .routers import PRIMARY_COOKIE, SAFE_METHODS, replica_alias, routed_reads
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+)
+
+
+def parse_accept_encoding(header):
+    """Return ``{coding: qvalue}`` for an Accept-Encoding header"""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(header):
+    """Pick the best supported coding, preferring brotli on ties"""
+    codings = parse_accept_encoding(header or '')
+    wildcard = codings.get('*', 0.0)
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress API responses with brotli or gzip above a size threshold"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'API_COMPRESSION_MIN_BYTES', 1024)
+        self.gzip_level = getattr(settings, 'API_COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'API_COMPRESSION_BROTLI_QUALITY', 4)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def _is_compressible(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        if response.streaming:
+            return not response.is_async
+        return len(response.content) >= self.min_bytes
+
+    def process_response(self, request, response):
+        if not self._is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                stream = _brotli_stream(response.streaming_content, self.brotli_quality)
+            else:
+                stream = _gzip_stream(response.streaming_content, self.gzip_level)
+            response.streaming_content = stream
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(response.content, compresslevel=self.gzip_level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class ReadReplicaMiddleware:
+    """
+    Let safe requests read from the replica, and keep a client that just
+    wrote on the primary for ``READ_YOUR_WRITES_SECONDS``
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica = request.method in SAFE_METHODS and PRIMARY_COOKIE not in request.COOKIES
+        with routed_reads(replica=replica) as state:
+            response = self.get_response(request)
+        if state.wrote and replica_alias() is not None:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                '1',
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rankings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollegeProfile',
+            fields=[
+                ('college', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to='rankings.college')),
+                ('detail', models.JSONField()),
+                ('breakdown', models.JSONField()),
+                ('analysis', models.JSONField()),
+                ('dataset_version', models.CharField(blank=True, max_length=40)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-19 19:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rankings', '0002_college_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregateRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(choices=[('INTERNATIONAL', 'International'), ('AMERICAN', 'American')], max_length=20)),
+                ('ranking_year', models.IntegerField()),
+                ('method', models.CharField(choices=[('borda', 'Borda count'), ('median', 'Median rank'), ('geomean', 'Geometric-mean rank'), ('kemeny', 'Kemeny-Young (approximate)')], max_length=20)),
+                ('position', models.IntegerField()),
+                ('value', models.FloatField()),
+                ('sources_count', models.IntegerField()),
+                ('dataset_version', models.CharField(blank=True, max_length=40)),
+                ('college', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate_rankings', to='rankings.college')),
+            ],
+            options={
+                'ordering': ['region', 'ranking_year', 'method', 'position'],
+                'indexes': [models.Index(fields=['region', 'ranking_year', 'method', 'position'], name='rankings_ag_region_980f82_idx')],
+                'unique_together': {('region', 'ranking_year', 'method', 'college')},
+            },
+        ),
+    ]
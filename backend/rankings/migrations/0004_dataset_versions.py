@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-19 19:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_initial_version(apps, schema_editor):
+    """Put every existing ranking into an initial, active version"""
+    DatasetVersion = apps.get_model('rankings', 'DatasetVersion')
+    ActiveDataset = apps.get_model('rankings', 'ActiveDataset')
+    CollegeRanking = apps.get_model('rankings', 'CollegeRanking')
+    version = DatasetVersion.objects.create(
+        label='initial',
+        status='VALIDATED',
+        rankings_count=CollegeRanking.objects.count(),
+        activated_at=timezone.now(),
+    )
+    ActiveDataset.objects.create(pk=1, version=version)
+    CollegeRanking.objects.update(version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rankings', '0003_aggregate_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('STAGING', 'Staging'), ('VALIDATED', 'Validated'), ('FAILED', 'Failed validation')], default='STAGING', max_length=20)),
+                ('rankings_count', models.IntegerField(default=0)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ActiveDataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='rankings.datasetversion')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='collegeranking',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='collegeranking',
+            name='version',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='rankings.datasetversion'),
+        ),
+        migrations.RunPython(create_initial_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-19 19:28
+
+import django.db.models.deletion
+import rankings.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Kept apart from 0004 so the data migration commits before the table is altered"""
+
+    dependencies = [
+        ('rankings', '0004_dataset_versions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collegeranking',
+            name='version',
+            field=models.ForeignKey(default=rankings.models.active_version_id, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='rankings.datasetversion'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='collegeranking',
+            unique_together={('college', 'source', 'ranking_year', 'version')},
+        ),
+        migrations.AddIndex(
+            model_name='collegeranking',
+            index=models.Index(fields=['version', 'source', 'ranking_year'], name='rankings_co_version_40567b_idx'),
+        ),
+    ]
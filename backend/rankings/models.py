@@ -3,6 +3,7 @@ Django Models for College Rankings
 """
 
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -51,11 +52,28 @@ class College(models.Model):
     def __str__(self):
         return self.name
     
-    @property
-    def composite_score_international(self):
-        """Calculate average score from international rankings"""
+    def composite_score(self, region, year=None):
+        """
+        Average score across a region's rankings for ``year`` (default: the
+        latest year in the data), using prefetched rows when present
+        """
+        if year is None:
+            from .dataset import get_latest_year
+            year = get_latest_year()
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('collegeranking_set')
+        if prefetched is not None:
+            scores = [
+                r.score for r in prefetched
+                if r.score is not None and r.ranking_year == year and r.source.region == region
+            ]
+            if scores:
+                avg = sum(scores) / len(scores)
+                return round(avg, 2) if avg else None
+            return None
+        
         rankings = self.collegeranking_set.filter(
-            source__region='INTERNATIONAL'
+            source__region=region,
+            ranking_year=year
         ).exclude(score__isnull=True)
         
         if rankings.exists():
@@ -65,19 +83,104 @@ class College(models.Model):
             return round(avg, 2) if avg else None
         return None
     
+    def composite_scores(self, year=None):
+        """Both regional composites for ``year`` (default: the latest)"""
+        return {
+            'international': self.composite_score('INTERNATIONAL', year),
+            'american': self.composite_score('AMERICAN', year),
+        }
+    
+    @property
+    def composite_score_international(self):
+        """Calculate average score from the latest year's international rankings"""
+        return self.composite_score('INTERNATIONAL')
+    
     @property
     def composite_score_american(self):
-        """Calculate average score from American rankings"""
-        rankings = self.collegeranking_set.filter(
-            source__region='AMERICAN'
-        ).exclude(score__isnull=True)
-        
-        if rankings.exists():
-            avg = rankings.aggregate(
-                avg_score=models.Avg('score')
-            )['avg_score']
-            return round(avg, 2) if avg else None
-        return None
+        """Calculate average score from the latest year's American rankings"""
+        return self.composite_score('AMERICAN')
+
+
+class DatasetVersion(models.Model):
+    """An immutable snapshot of the rankings table, staged by an ingest"""
+    STATUS_CHOICES = [
+        ('STAGING', 'Staging'),
+        ('VALIDATED', 'Validated'),
+        ('FAILED', 'Failed validation'),
+    ]
+    
+    label = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='STAGING')
+    # The active version this one was cloned from; activation is refused once
+    # another version has been activated since
+    base_version = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    rankings_count = models.IntegerField(default=0)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-id']
+    
+    def __str__(self):
+        return f"v{self.pk} {self.label} ({self.status})"
+
+
+class ActiveDataset(models.Model):
+    """Single-row pointer to the dataset version readers see"""
+    version = models.ForeignKey(DatasetVersion, on_delete=models.PROTECT)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Active: v{self.version_id}"
+
+
+ACTIVE_POINTER_ID = 1
+
+
+def active_version_subquery():
+    """The active version id as a subquery, resolved by the database in the same statement"""
+    return models.Subquery(
+        ActiveDataset.objects.filter(pk=ACTIVE_POINTER_ID).values('version_id')[:1]
+    )
+
+
+def active_version_id():
+    """
+    Id of the active dataset version, creating the initial version on an
+    empty database. Rankings saved without a version go into it.
+    """
+    pointer = ActiveDataset.objects.filter(pk=ACTIVE_POINTER_ID).values_list(
+        'version_id', flat=True
+    ).first()
+    if pointer is None:
+        version = DatasetVersion.objects.create(
+            label='initial', status='VALIDATED', activated_at=timezone.now()
+        )
+        ActiveDataset.objects.create(pk=ACTIVE_POINTER_ID, version=version)
+        pointer = version.pk
+    return pointer
+
+
+class ActiveVersionManager(models.Manager):
+    """Rankings of the active dataset version only"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(version_id=active_version_subquery())
+
+
+# Per-ranking performance metrics shared by analysis and the read model
+METRIC_FIELDS = [
+    'academic_reputation',
+    'employer_reputation',
+    'faculty_student_ratio',
+    'research_impact',
+    'international_diversity',
+    'teaching_quality',
+    'student_satisfaction',
+]
 
 
 class CollegeRanking(models.Model):
@@ -105,17 +208,27 @@ class CollegeRanking(models.Model):
     # Additional metadata
     ranking_year = models.IntegerField()
     data_source_url = models.URLField(blank=True)
+    version = models.ForeignKey(
+        DatasetVersion,
+        on_delete=models.CASCADE,
+        default=active_version_id,
+        related_name='rankings'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ActiveVersionManager()
+    all_versions = models.Manager()
+    
     class Meta:
-        unique_together = ('college', 'source', 'ranking_year')
+        unique_together = ('college', 'source', 'ranking_year', 'version')
         ordering = ['rank']
         indexes = [
             models.Index(fields=['college', 'source']),
             models.Index(fields=['ranking_year']),
             models.Index(fields=['rank']),
+            models.Index(fields=['version', 'source', 'ranking_year']),
         ]
     
     def __str__(self):
@@ -179,3 +292,54 @@ class CacheMetadata(models.Model):
     
     def __str__(self):
         return f"Cache: {self.source.name}"
+
+
+class CollegeProfile(models.Model):
+    """Pre-rendered API documents for a college, rebuilt by ingestion"""
+    college = models.OneToOneField(
+        College,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile'
+    )
+    detail = models.JSONField()
+    breakdown = models.JSONField()
+    analysis = models.JSONField()
+    dataset_version = models.CharField(max_length=40, blank=True)
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Profile: {self.college_id}"
+
+
+class AggregateRanking(models.Model):
+    """Precomputed rank-aggregation composite position, rebuilt by ingestion"""
+    METHOD_CHOICES = [
+        ('borda', 'Borda count'),
+        ('median', 'Median rank'),
+        ('geomean', 'Geometric-mean rank'),
+        ('kemeny', 'Kemeny-Young (approximate)'),
+    ]
+    
+    region = models.CharField(max_length=20, choices=RankingSource.REGION_CHOICES)
+    ranking_year = models.IntegerField()
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES)
+    college = models.ForeignKey(
+        College,
+        on_delete=models.CASCADE,
+        related_name='aggregate_rankings'
+    )
+    position = models.IntegerField()
+    value = models.FloatField()
+    sources_count = models.IntegerField()
+    dataset_version = models.CharField(max_length=40, blank=True)
+    
+    class Meta:
+        unique_together = ('region', 'ranking_year', 'method', 'college')
+        ordering = ['region', 'ranking_year', 'method', 'position']
+        indexes = [
+            models.Index(fields=['region', 'ranking_year', 'method', 'position']),
+        ]
+    
+    def __str__(self):
+        return f"{self.college_id} - {self.region} {self.ranking_year} {self.method} #{self.position}"
@@ -0,0 +1,103 @@
+"""
+Year-over-year rank movement
+
+Compares the positions colleges hold in one source (or a regional
+composite) in two years, using the in-memory rankings matrix, and returns
+the biggest gains and drops. Results are cached per dataset version,
+source and year pair.
+"""
+
+import numpy as np
+
+from .caching import cached
+from .composites import average_composite
+from .models import College
+from .serializers import CollegeSerializer
+
+COMPOSITE_SOURCES = {
+    'composite-international': 'INTERNATIONAL',
+    'composite-american': 'AMERICAN',
+}
+MAX_MOVERS = 100
+MOVERS_CACHE_TIMEOUT = 60 * 60
+
+
+def positions(matrix, source, year):
+    """(C,) rank of every college in ``source`` for ``year``; NaN where unranked"""
+    if source in COMPOSITE_SOURCES:
+        rows = average_composite(matrix, COMPOSITE_SOURCES[source], year)
+        ranked = np.full(len(matrix.college_ids), np.nan)
+        order = rows.ordered(len(rows))
+        ranked[matrix.college_positions(rows.college_ids[order])] = np.arange(1, len(order) + 1)
+        return ranked
+
+    s = matrix.source_position(source)
+    y = matrix.year_position(year)
+    if s is None:
+        raise ValueError(f"Unknown source '{source}'")
+    if y is None:
+        return np.full(len(matrix.college_ids), np.nan)
+    return matrix.rank[:, s, y].astype(np.float64)
+
+
+def default_years(matrix, from_year=None, to_year=None):
+    """Fill in ``to_year`` (latest) and ``from_year`` (the year of data before it)"""
+    to_year = to_year or matrix.latest_year
+    if from_year is None:
+        earlier = matrix.years[matrix.years < (to_year or 0)]
+        from_year = int(earlier[-1]) if len(earlier) else None
+    if from_year is None or to_year is None:
+        raise ValueError('Movers need rankings from two different years')
+    if from_year == to_year:
+        raise ValueError('from_year and to_year must differ')
+    return from_year, to_year
+
+
+def compute_movers(matrix, source, from_year, to_year, limit=MAX_MOVERS):
+    """
+    Colleges ranked in both years, split into gainers and decliners.
+
+    ``change`` is positive when the college moved up (its rank number
+    fell). Ties are broken by college id.
+    """
+    before = positions(matrix, source, from_year)
+    after = positions(matrix, source, to_year)
+    change = before - after
+    both = np.flatnonzero(~np.isnan(change))
+
+    def pick(rows, sign):
+        rows = rows[np.lexsort((matrix.college_ids[rows], -sign * change[rows]))][:limit]
+        return [
+            {
+                'college_id': int(matrix.college_ids[row]),
+                'from_rank': int(before[row]),
+                'to_rank': int(after[row]),
+                'change': int(change[row]),
+            }
+            for row in rows
+        ]
+
+    return {
+        'ranked_both_years': len(both),
+        'gainers': pick(both[change[both] > 0], 1),
+        'decliners': pick(both[change[both] < 0], -1),
+    }
+
+
+def get_movers(matrix, source, from_year, to_year, limit=20):
+    """Serialized movers, cached per (dataset version, source, year pair)"""
+    def compute():
+        data = compute_movers(matrix, source, from_year, to_year, MAX_MOVERS)
+        ids = [m['college_id'] for m in data['gainers'] + data['decliners']]
+        colleges = College.objects.only(*CollegeSerializer.Meta.fields).in_bulk(ids)
+        for side in ('gainers', 'decliners'):
+            # Skip colleges deleted since the matrix was loaded
+            data[side] = [mover for mover in data[side] if mover['college_id'] in colleges]
+            for mover in data[side]:
+                mover['college'] = CollegeSerializer(colleges[mover.pop('college_id')]).data
+        data.update({'source': source, 'from_year': from_year, 'to_year': to_year})
+        return data
+
+    key = f'rankings:movers:{matrix.version}:{source}:{from_year}:{to_year}'
+    data = cached(key, compute, MOVERS_CACHE_TIMEOUT)
+    return dict(data, gainers=data['gainers'][:limit], decliners=data['decliners'][:limit])
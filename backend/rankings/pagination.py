@@ -0,0 +1,161 @@
+"""
+Pagination with cached and estimated counts
+
+A page of a queryset normally costs two queries: the page itself and a
+``COUNT(*)`` of the whole filtered queryset, which for annotated or
+``DISTINCT`` querysets repeats the full join or aggregate. Counts only
+change when the data does, so ``CachedCountPaginator`` keeps them in the
+cache under the queryset's SQL and parameters (its filter signature) and
+the dataset version; ingests change the version and so invalidate them.
+
+Querysets that add no filter to their model's default manager skip
+counting altogether once the estimate reaches
+``PAGINATION_ESTIMATE_MIN_ROWS``. For rankings (whose manager always
+filters on the active dataset version, and whose table holds every
+retained version) the estimate is the active version's ``rankings_count``,
+recorded at activation and cached per dataset version, so it costs no
+query per page; for other tables on PostgreSQL it is the planner's row
+estimate (``pg_class.reltuples``, refreshed by ``ANALYZE``/autovacuum).
+Responses say which one they got in ``count_exact``. A page past the end
+of an estimate falls back to the exact count rather than answering 404.
+
+Sequences such as ``CompositeRows`` know their length already and are
+counted with ``len()``.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, FullResultSet
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from .caching import cached
+from .dataset import get_dataset_version
+from .models import CollegeRanking, DatasetVersion, active_version_subquery
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+
+
+def count_signature(queryset):
+    """Digest of the SQL and parameters that identify a queryset's rows"""
+    sql, params = queryset.query.sql_with_params()
+    return hashlib.sha1(f'{queryset.db}|{sql}|{params!r}'.encode('utf-8')).hexdigest()[:16]
+
+
+def _where_sql(queryset):
+    """The compiled ``WHERE`` clause of a queryset, ``('', [])`` without one"""
+    compiler = queryset.query.get_compiler(queryset.db)
+    try:
+        return compiler.compile(queryset.query.where)
+    except FullResultSet:
+        return '', []
+
+
+def _active_rankings_count(using):
+    """The active version's ``rankings_count``, recorded at activation"""
+    return DatasetVersion.objects.using(using).filter(
+        pk=active_version_subquery()
+    ).values_list('rankings_count', flat=True).first() or 0
+
+
+def estimated_count(queryset):
+    """
+    A row estimate for a queryset that filters no further than its model's
+    default manager, or ``None`` (filtered querysets, other databases than
+    PostgreSQL for unversioned tables, never-analyzed tables)
+    """
+    query = queryset.query
+    model = queryset.model
+    if query.distinct or query.is_sliced:
+        return None
+    try:
+        if _where_sql(queryset) != _where_sql(model._default_manager.using(queryset.db).all()):
+            return None
+    except EmptyResultSet:
+        return None
+
+    if model is CollegeRanking:
+        # Admin edits since activation make this approximate, hence an estimate
+        key = f'rankings:estimate:{get_dataset_version()}:{queryset.db}'
+        return cached(key, lambda: _active_rankings_count(queryset.db), COUNT_CACHE_TIMEOUT) or None
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 (PostgreSQL 14+) or 0 before the first ANALYZE
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+def exact_count(queryset):
+    """``queryset.count()``, cached per filter signature and dataset version"""
+    try:
+        signature = count_signature(queryset)
+    except EmptyResultSet:
+        return 0
+    key = f'rankings:count:{get_dataset_version()}:{signature}'
+    return cached(key, queryset.count, COUNT_CACHE_TIMEOUT)
+
+
+class CachedCountPaginator(Paginator):
+    """``Paginator`` whose ``count`` is cached, or estimated for huge unfiltered tables"""
+
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= settings.PAGINATION_ESTIMATE_MIN_ROWS:
+            self.count_exact = False
+            return estimate
+        return exact_count(self.object_list)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_exact:
+                raise
+        # Past the end of an estimate: count for real and check again
+        self.count_exact = True
+        self.__dict__['count'] = exact_count(self.object_list)
+        self.__dict__.pop('num_pages', None)
+        return super().validate_number(number)
+
+
+class CachedCountPagination(PageNumberPagination):
+    """Page-number pagination that adds ``count_exact`` to the response"""
+
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_exact'] = {'type': 'boolean', 'example': True}
+        return schema
+
+
+class StandardResultsSetPagination(CachedCountPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
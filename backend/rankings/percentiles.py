@@ -0,0 +1,129 @@
+"""
+Percentile-based strengths and weaknesses
+
+A raw metric value says little on its own (85 in research can be below the
+median while 60 in diversity is top 5%), so strengths are judged by where
+a college's metric stands among all colleges for the same year.
+
+For each metric and year the population is every college's average of
+that metric across sources, sorted once per rankings matrix (i.e. once per
+dataset version). A lookup is then a binary search. Percentiles use the
+mid-rank convention: the share of colleges below the value plus half of
+those tied with it.
+"""
+
+import numpy as np
+
+from .models import METRIC_FIELDS
+
+STRENGTHS_COUNT = 3
+# Metric averages are reported to two decimals; values this close count as tied
+TIE_TOLERANCE = 1e-6
+
+
+def college_metric_averages(matrix, rows, year):
+    """(len(rows), M) average of each metric across sources for ``year``; NaN if missing"""
+    position = matrix.year_position(year)
+    averages = np.full((len(rows), len(METRIC_FIELDS)), np.nan)
+    if position is None:
+        return averages
+    for m, name in enumerate(METRIC_FIELDS):
+        values = matrix.metrics[name][rows, :, position].astype(np.float64)
+        present = ~np.isnan(values)
+        counts = present.sum(axis=1)
+        np.divide(
+            np.where(present, values, 0.0).sum(axis=1), counts,
+            out=averages[:, m], where=counts > 0,
+        )
+    return averages
+
+
+def metric_distributions(matrix, year):
+    """Sorted population per metric for ``year``, memoized on the matrix"""
+    return matrix.memo_per_year('metric_distributions', year, lambda: _distributions(matrix, year))
+
+
+def _distributions(matrix, year):
+    averages = np.round(
+        college_metric_averages(matrix, np.arange(len(matrix.college_ids)), year), 2
+    )
+    return [np.sort(column[~np.isnan(column)]) for column in averages.T]
+
+
+def percentiles(matrix, year, values):
+    """(N, M) percentile of each value against its metric's population; NaN stays NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    for m, population in enumerate(metric_distributions(matrix, year)):
+        column = values[:, m]
+        present = ~np.isnan(column)
+        if not len(population) or not present.any():
+            continue
+        below = np.searchsorted(population, column[present] - TIE_TOLERANCE, side='left')
+        at_or_below = np.searchsorted(population, column[present] + TIE_TOLERANCE, side='right')
+        result[present, m] = (below + at_or_below) / 2 / len(population) * 100
+    return result
+
+
+def summarize(avg_metrics, metric_percentiles):
+    """
+    Strengths (highest percentiles) and weaknesses (lowest), three of each.
+
+    Ties are broken by the raw value. As before, weaknesses are only
+    reported once a college has at least three metrics.
+    """
+    ranked = sorted(
+        ((name, avg_metrics[name], metric_percentiles[name]) for name in avg_metrics
+         if name in metric_percentiles),
+        key=lambda item: (item[2], item[1]),
+        reverse=True,
+    )
+
+    def entry(item):
+        return {'metric': item[0], 'score': item[1], 'percentile': item[2]}
+
+    strengths = ranked[:STRENGTHS_COUNT]
+    weaknesses = ranked[-STRENGTHS_COUNT:] if len(ranked) >= STRENGTHS_COUNT else []
+    return [entry(s) for s in strengths], [entry(w) for w in weaknesses]
+
+
+def metric_percentiles(matrix, year, avg_metrics):
+    """Percentile per metric for one college's ``{metric: average}``"""
+    values = [[avg_metrics.get(name, np.nan) for name in METRIC_FIELDS]]
+    row = percentiles(matrix, year, values)[0]
+    return {
+        name: round(float(row[m]), 1)
+        for m, name in enumerate(METRIC_FIELDS)
+        if name in avg_metrics and not np.isnan(row[m])
+    }
+
+
+def bulk_analysis(matrix, college_ids, year):
+    """
+    Percentile analysis for many colleges in one vectorized pass.
+
+    Returns ``{college_id: {'all_metrics', 'percentiles', 'strengths',
+    'weaknesses'}}`` for the ids found in the matrix.
+    """
+    positions = matrix.college_positions(college_ids)
+    known = positions >= 0
+    rows = positions[known]
+    averages = np.round(college_metric_averages(matrix, rows, year), 2)
+    scores = np.round(percentiles(matrix, year, averages), 1)
+
+    results = {}
+    for i, college_id in enumerate(np.asarray(college_ids)[known].tolist()):
+        avg_metrics = {
+            name: float(averages[i, m])
+            for m, name in enumerate(METRIC_FIELDS) if not np.isnan(averages[i, m])
+        }
+        metric_pcts = {name: float(scores[i, m]) for m, name in enumerate(METRIC_FIELDS)
+                       if name in avg_metrics}
+        strengths, weaknesses = summarize(avg_metrics, metric_pcts)
+        results[int(college_id)] = {
+            'strengths': strengths,
+            'weaknesses': weaknesses,
+            'all_metrics': avg_metrics,
+            'percentiles': metric_pcts,
+        }
+    return results
@@ -0,0 +1,60 @@
+"""
+Post-ingest pipeline
+
+Every command that activates a dataset version (``fetch_rankings``,
+``import_rankings``, ``seed_demo_data``, ``dataset_versions``) calls
+``run_post_ingest`` once it has finished, so derived data is rebuilt in one
+place and in a fixed order.
+"""
+
+import logging
+
+from django.conf import settings
+
+from .dataset import get_dataset_version, invalidate_dataset_version
+
+logger = logging.getLogger(__name__)
+
+
+def run_post_ingest(publish=True, log=None):
+    """
+    Rebuild derived data after an ingest.
+
+    Everything is rebuilt from the new dataset version: profiles embed
+    percentiles across all colleges, so per-college work cannot be limited
+    to the colleges an ingest touched. Ranking categories belong to the
+    version and were derived by ``activate_version``. ``log`` is an
+    optional callable used by management commands to report progress.
+    """
+    log = log or logger.info
+    invalidate_dataset_version()
+    version = get_dataset_version()
+    results = {'dataset_version': version}
+
+    from .aggregation import rebuild_aggregates
+    from .profiles import rebuild_profiles
+    from .readmodel import load_matrix, set_matrix
+
+    matrix = load_matrix(version)
+    set_matrix(matrix)
+    results['aggregates'] = rebuild_aggregates(matrix)
+    log(f"Rebuilt {results['aggregates']} rank-aggregation positions")
+
+    results['profiles'] = rebuild_profiles()
+    log(f"Rebuilt {results['profiles']} college profiles")
+
+    if getattr(settings, 'SQLITE_SNAPSHOT_PATH', ''):
+        from .sqlite_snapshot import build_sqlite_snapshot
+
+        snapshot = build_sqlite_snapshot(settings.SQLITE_SNAPSHOT_PATH)
+        results['sqlite_snapshot'] = snapshot['path']
+        log(f"Built SQLite snapshot ({snapshot['bytes'] // 1024} KiB) at {snapshot['path']}")
+
+    if publish and getattr(settings, 'API_SNAPSHOT_PUBLISH_ON_INGEST', True):
+        from .publish import publish_snapshot
+
+        manifest = publish_snapshot()
+        results['snapshot'] = manifest['path']
+        log(f"Published static snapshot ({len(manifest['files'])} files) to {manifest['path']}")
+
+    return results
@@ -0,0 +1,158 @@
+"""
+Precomputed college profile documents
+
+``CollegeProfile`` rows hold the fully rendered detail, breakdown and
+analysis JSON for each college. Ingestion rebuilds all of them in bulk,
+and the detail / ``rankings_breakdown`` / ``analyze`` endpoints serve them
+with a single primary-key lookup.
+
+Documents depend on more than their own college: analysis percentiles are
+relative to every college, and composites to the latest year in the data.
+So a profile is only served while its ``dataset_version`` is the current
+one; any edit that bypasses ingestion (admin, shell) changes the version,
+and views fall back to live computation until the next rebuild.
+"""
+
+import json
+
+from django.utils import timezone
+
+from .analysis import analyze_strengths, build_breakdown, rankings_prefetch
+from .dataset import get_dataset_version
+from .models import College, CollegeProfile
+from .renderers import FastJSONRenderer
+from .serializers import CollegeDetailSerializer
+
+DOCUMENT_FIELDS = ['detail', 'breakdown', 'analysis']
+REBUILD_BATCH_SIZE = 200
+
+_renderer = FastJSONRenderer()
+
+
+def to_document(data):
+    """Normalize serializer output to plain JSON types, exactly as the API renders it"""
+    return json.loads(_renderer.render(data))
+
+
+def build_documents(college):
+    """Live-compute every profile document for a college with rankings prefetched"""
+    rankings = list(college.collegeranking_set.all())
+    return {
+        'detail': to_document(CollegeDetailSerializer(college).data),
+        'breakdown': to_document(build_breakdown(college, rankings)),
+        'analysis': to_document(analyze_strengths(college, rankings)),
+    }
+
+
+def _batched_colleges(college_ids, batch_size):
+    queryset = College.objects.order_by('pk')
+    if college_ids is not None:
+        queryset = queryset.filter(pk__in=list(college_ids))
+    pks = list(queryset.values_list('pk', flat=True))
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start:start + batch_size]
+        yield College.objects.filter(pk__in=batch).order_by('pk').prefetch_related(
+            rankings_prefetch()
+        )
+
+
+def rebuild_profiles(college_ids=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Regenerate profiles for ``college_ids`` (all colleges when ``None``).
+
+    Documents are computed batch by batch and written with one bulk upsert
+    per batch. Returns the number of profiles written.
+    """
+    version = get_dataset_version()
+    written = 0
+    for colleges in _batched_colleges(college_ids, batch_size):
+        now = timezone.now()
+        profiles = [
+            CollegeProfile(
+                college=college,
+                dataset_version=version,
+                generated_at=now,
+                **build_documents(college),
+            )
+            for college in colleges
+        ]
+        CollegeProfile.objects.bulk_create(
+            profiles,
+            update_conflicts=True,
+            unique_fields=['college'],
+            update_fields=DOCUMENT_FIELDS + ['dataset_version', 'generated_at'],
+        )
+        written += len(profiles)
+    return written
+
+
+def get_profile_documents(college_id, documents):
+    """
+    Fetch the named documents for a college in one lookup; ``None`` without
+    a profile built from the current dataset version
+    """
+    try:
+        college_id = int(college_id)
+    except (TypeError, ValueError):
+        return None
+    return CollegeProfile.objects.filter(
+        pk=college_id, dataset_version=get_dataset_version()
+    ).values(*documents).first()
+
+
+def diff_documents(expected, actual, path=''):
+    """List the JSON paths where two documents differ"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            child = f'{path}.{key}' if path else str(key)
+            if key not in actual:
+                differences.append(f'{child}: missing')
+            elif key not in expected:
+                differences.append(f'{child}: unexpected')
+            else:
+                differences.extend(diff_documents(expected[key], actual[key], child))
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f'{path}: length {len(actual)} != {len(expected)}']
+        differences = []
+        for index, (e, a) in enumerate(zip(expected, actual)):
+            differences.extend(diff_documents(e, a, f'{path}[{index}]'))
+        return differences
+    if expected != actual:
+        return [f'{path}: {actual!r} != {expected!r}']
+    return []
+
+
+def check_profiles(college_ids=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Compare stored profiles with a live computation.
+
+    Yields ``(college_id, problems)`` for each college whose profile is
+    missing, differs or was built from another dataset version (and so is
+    not served); ``problems`` is a list of human-readable diffs.
+    """
+    version = get_dataset_version()
+    for colleges in _batched_colleges(college_ids, batch_size):
+        colleges = list(colleges)
+        stored = {
+            profile.pk: profile
+            for profile in CollegeProfile.objects.filter(pk__in=[c.pk for c in colleges])
+        }
+        for college in colleges:
+            profile = stored.get(college.pk)
+            if profile is None:
+                yield college.pk, ['profile missing']
+                continue
+            expected = build_documents(college)
+            problems = []
+            if profile.dataset_version != version:
+                problems.append(f'stale dataset_version {profile.dataset_version!r} != {version!r}')
+            for name in DOCUMENT_FIELDS:
+                problems.extend(
+                    f'{name}.{diff}' for diff in
+                    diff_documents(expected[name], getattr(profile, name))
+                )
+            if problems:
+                yield college.pk, problems
@@ -0,0 +1,257 @@
+"""
+Static JSON snapshot publishing
+
+Renders the read-mostly API resources (source list, composite pages,
+per-source pages and college details) to pre-compressed JSON files so they
+can be served without running the API views.
+
+Layout under API_SNAPSHOT_ROOT (outside STATIC_ROOT):
+
+    current -> versions/<version>-<timestamp>/   (symlink)
+        manifest.json
+        sources.json
+        composite/international/page-1.json
+        composite/american/page-1.json
+        rankings/<source code>/page-1.json
+        colleges/<id>.json
+
+Every file is written next to a ``.gz`` and (when the ``brotli`` package is
+installed) a ``.br`` variant. ``snapshot_file`` resolves the ``current``
+symlink on every request, so a worker serves a newly published snapshot
+as soon as the link is swapped; static-file servers such as WhiteNoise
+index files once at start-up and would keep serving stale sizes and
+ETags. Only files inside the current snapshot are reachable; staging and
+older trees are not.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils import timezone
+
+from .analysis import rankings_prefetch
+from .dataset import get_dataset_version
+from .models import College, CollegeRanking, RankingSource
+from .queries import composite_queryset
+from .renderers import FastJSONRenderer
+from .serializers import (
+    CollegeDetailSerializer,
+    CollegeRankingSerializer,
+    CompositeRankingSerializer,
+    RankingSourceSerializer,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+REGIONS = {
+    'international': 'INTERNATIONAL',
+    'american': 'AMERICAN',
+}
+
+
+SNAPSHOT_MAX_AGE = 60
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def get_snapshot_settings():
+    root = Path(settings.API_SNAPSHOT_ROOT)
+    return {
+        'root': root,
+        'link': root / 'current',
+        'store': root / 'versions',
+        'page_size': getattr(settings, 'API_SNAPSHOT_PAGE_SIZE', 100),
+        'keep': getattr(settings, 'API_SNAPSHOT_KEEP', 2),
+    }
+
+
+def snapshot_file(relative_path, encoding=None):
+    """
+    ``(snapshot directory, file, content encoding)`` for a ``.json`` path in
+    the currently published snapshot, preferring its ``encoding`` variant
+    (``'br'`` or ``'gzip'``) when one was written; ``None`` if there is no
+    such file
+    """
+    parts = PurePosixPath(relative_path).parts
+    if not relative_path.endswith('.json') or any(
+        part in ('/', '.', '..') or part.startswith('.') for part in parts
+    ):
+        return None
+    try:
+        snapshot = get_snapshot_settings()['link'].resolve(strict=True)
+    except (OSError, RuntimeError):
+        return None
+    path = snapshot.joinpath(*parts)
+    suffix = ENCODING_SUFFIXES.get(encoding)
+    if suffix and path.with_name(path.name + suffix).is_file():
+        return snapshot, path.with_name(path.name + suffix), encoding
+    return (snapshot, path, None) if path.is_file() else None
+
+
+class SnapshotWriter:
+    """Writes rendered JSON plus compressed variants and records the manifest"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.renderer = FastJSONRenderer()
+        self.files = {}
+
+    def write(self, relative_path, data):
+        content = self.renderer.render(data)
+        path = self.directory / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+        entry = {
+            'bytes': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+
+        gz_content = gzip.compress(content, compresslevel=9, mtime=0)
+        path.with_name(path.name + '.gz').write_bytes(gz_content)
+        entry['gzip_bytes'] = len(gz_content)
+
+        if brotli is not None:
+            br_content = brotli.compress(content, quality=11)
+            path.with_name(path.name + '.br').write_bytes(br_content)
+            entry['br_bytes'] = len(br_content)
+
+        self.files[relative_path] = entry
+        return entry
+
+
+def _page_link(prefix, number):
+    return f'{prefix}/page-{number}.json'
+
+
+def _write_paginated(writer, prefix, items, serialize, page_size, extra=None):
+    """Write every page of ``items`` in the same shape as the paginated API"""
+    paginator = Paginator(items, page_size)
+    for number in paginator.page_range:
+        page = paginator.page(number)
+        data = {
+            'count': paginator.count,
+            'next': _page_link(prefix, number + 1) if page.has_next() else None,
+            'previous': _page_link(prefix, number - 1) if page.has_previous() else None,
+            'results': serialize(page.object_list),
+        }
+        if extra:
+            data.update(extra)
+        writer.write(_page_link(prefix, number), data)
+    return paginator.num_pages
+
+
+def render_snapshot(directory, page_size=100):
+    """Render every snapshot resource into ``directory`` and return the manifest"""
+    writer = SnapshotWriter(directory)
+    resources = {}
+
+    sources = list(RankingSource.objects.all().order_by('region', 'name'))
+    writer.write('sources.json', RankingSourceSerializer(sources, many=True).data)
+    resources['sources'] = len(sources)
+
+    resources['composite'] = {}
+    for slug, region in REGIONS.items():
+        resources['composite'][slug] = _write_paginated(
+            writer,
+            f'composite/{slug}',
+            composite_queryset(region),
+            lambda page, region=region: CompositeRankingSerializer(
+                page, many=True, context={'region': region}
+            ).data,
+            page_size,
+        )
+
+    resources['rankings'] = {}
+    for source in sources:
+        rankings = CollegeRanking.objects.filter(source=source).select_related(
+            'college', 'source'
+        ).prefetch_related('categories').order_by('rank', 'id')
+        resources['rankings'][source.code] = _write_paginated(
+            writer,
+            f'rankings/{source.code}',
+            rankings,
+            lambda page: CollegeRankingSerializer(page, many=True).data,
+            page_size,
+            extra={'source': RankingSourceSerializer(source).data},
+        )
+
+    colleges = 0
+    colleges_with_rankings = College.objects.prefetch_related(rankings_prefetch())
+    for college in colleges_with_rankings.iterator(chunk_size=500):
+        writer.write(f'colleges/{college.pk}.json', CollegeDetailSerializer(college).data)
+        colleges += 1
+    resources['colleges'] = colleges
+
+    manifest = {
+        'dataset_version': get_dataset_version(),
+        'generated_at': timezone.now().isoformat(),
+        'page_size': page_size,
+        'resources': resources,
+        'files': writer.files,
+    }
+    writer.write('manifest.json', manifest)
+    return manifest
+
+
+def _swap_symlink(link, target):
+    """Atomically point ``link`` at ``target`` via rename of a temp symlink"""
+    temp_link = link.with_name(f'.{link.name}.tmp-{os.getpid()}')
+    if temp_link.is_symlink() or temp_link.exists():
+        temp_link.unlink()
+    os.symlink(os.path.relpath(target, link.parent), temp_link)
+    os.replace(temp_link, link)
+
+
+def _prune_old_snapshots(store, current, keep):
+    snapshots = sorted(
+        (p for p in store.iterdir() if p.is_dir() and not p.name.startswith('.')),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[keep:]:
+        if old.resolve() != current.resolve():
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def publish_snapshot():
+    """
+    Render a fresh snapshot and atomically make it the served one.
+
+    The snapshot is built in a hidden staging directory, then the public
+    ``api-snapshot`` symlink is swapped to it, so readers never see a
+    half-written tree.
+    """
+    config = get_snapshot_settings()
+    config['store'].mkdir(parents=True, exist_ok=True)
+
+    version = get_dataset_version()
+    name = f"{version}-{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+    staging = config['store'] / f'.{name}'
+    target = config['store'] / name
+    if staging.exists():
+        shutil.rmtree(staging)
+
+    try:
+        manifest = render_snapshot(staging, page_size=config['page_size'])
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    link = config['link']
+    if link.exists() and not link.is_symlink():
+        # A real directory from an older layout would block the swap
+        shutil.rmtree(link)
+    _swap_symlink(link, target)
+    _prune_old_snapshots(config['store'], target, config['keep'])
+
+    manifest['path'] = str(target)
+    return manifest
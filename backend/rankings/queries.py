@@ -0,0 +1,34 @@
+"""
+Shared querysets used by the API views and offline publishers
+"""
+
+from django.db.models import Avg, Count, F, Q
+
+from .dataset import get_latest_year
+from .models import College, active_version_subquery
+
+
+def composite_queryset(region, year=None):
+    """Colleges annotated with their average score for a region and year (default: latest), best first"""
+    in_region = Q(
+        collegeranking__version=active_version_subquery(),
+        collegeranking__source__region=region,
+        collegeranking__ranking_year=year or get_latest_year(),
+    )
+    return College.objects.annotate(
+        avg_score=Avg('collegeranking__score', filter=in_region),
+        rankings_count=Count('collegeranking', filter=in_region),
+    ).filter(avg_score__isnull=False).order_by('-avg_score', 'pk')
+
+
+def aggregate_queryset(region, year, method, dataset_version):
+    """Colleges in their precomputed rank-aggregation order, annotated like ``composite_queryset``"""
+    return College.objects.filter(
+        aggregate_rankings__region=region,
+        aggregate_rankings__ranking_year=year,
+        aggregate_rankings__method=method,
+        aggregate_rankings__dataset_version=dataset_version,
+    ).annotate(
+        avg_score=F('aggregate_rankings__value'),
+        rankings_count=F('aggregate_rankings__sources_count'),
+    ).order_by('aggregate_rankings__position')
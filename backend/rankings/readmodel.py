@@ -0,0 +1,327 @@
+"""
+In-memory columnar read model of the rankings matrix
+
+The rankings data is a sparse colleges x sources x years cube. This module
+loads ``CollegeRanking`` once per dataset version into dense NumPy arrays
+so analytical endpoints (composites, filters, comparisons) can run as
+vectorized array operations instead of ORM aggregates:
+
+    matrix.rank[c, s, y]      rank of college c in source s for year y
+    matrix.score[c, s, y]     score (NaN where the college is not ranked)
+    matrix.metrics[name]      the seven metric columns, same shape
+
+Each worker process keeps one matrix. When the dataset version changes
+(after an ingest) readers keep getting the previous matrix while a
+background thread loads the new one, so no request ever waits on a reload
+except the very first.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+
+from .dataset import get_dataset_version
+from .models import METRIC_FIELDS, College, CollegeRanking, RankingSource
+
+logger = logging.getLogger(__name__)
+
+LOAD_CHUNK_SIZE = 10000
+RANKING_COLUMNS = ['college_id', 'source_id', 'ranking_year', 'rank', 'score'] + METRIC_FIELDS
+
+
+@dataclass
+class RankingsMatrix:
+    version: str
+    college_ids: np.ndarray          # (C,) sorted primary keys
+    countries: list                  # distinct country names
+    country_codes: np.ndarray        # (C,) index into ``countries``
+    source_ids: np.ndarray           # (S,)
+    source_codes: list
+    source_regions: np.ndarray       # (S,) region per source
+    years: np.ndarray                # (Y,) ascending
+    rank: np.ndarray                 # (C, S, Y) float32, NaN = not ranked
+    score: np.ndarray                # (C, S, Y) float64
+    metrics: dict                    # name -> (C, S, Y) float32
+    load_seconds: float = 0.0
+    derived: dict = field(default_factory=dict, repr=False)   # memo for derived arrays
+    _source_index: dict = field(default_factory=dict, repr=False)
+    _memo_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self._source_index = {code: i for i, code in enumerate(self.source_codes)}
+
+    def memo(self, name, build):
+        """``build()``, computed once per matrix and kept in ``derived``"""
+        value = self.derived.get(name)
+        if value is None:
+            value = self.derived[name] = build()
+        return value
+
+    def memo_per_year(self, name, year, build):
+        """
+        ``build()`` for ``year``, kept in ``derived[name]`` per year.
+
+        At most one entry per year of data plus one for ``None`` (all years)
+        is kept, least recently used out first, so request parameters cannot
+        grow the memo.
+        """
+        with self._memo_lock:
+            values = self.derived.setdefault(name, OrderedDict())
+            if year in values:
+                values.move_to_end(year)
+                return values[year]
+        value = build()
+        with self._memo_lock:
+            values[year] = value
+            while len(values) > len(self.years) + 1:
+                values.popitem(last=False)
+        return value
+
+    @property
+    def shape(self):
+        return self.rank.shape
+
+    @property
+    def nbytes(self):
+        arrays = [self.college_ids, self.country_codes, self.source_ids, self.years,
+                  self.rank, self.score, *self.metrics.values()]
+        return sum(a.nbytes for a in arrays)
+
+    @property
+    def present(self):
+        """Boolean (C, S, Y) mask of cells that hold a ranking"""
+        return ~np.isnan(self.rank)
+
+    def source_position(self, code):
+        return self._source_index.get(code)
+
+    def region_sources(self, region):
+        """Boolean (S,) mask of the sources in a region"""
+        return self.source_regions == region
+
+    def year_position(self, year):
+        """Index of ``year`` on the year axis, or ``None`` if there is no data for it"""
+        matches = np.flatnonzero(self.years == year)
+        return int(matches[0]) if len(matches) else None
+
+    @property
+    def latest_year(self):
+        return int(self.years[-1]) if len(self.years) else None
+
+    def college_positions(self, college_ids):
+        """Row positions for college primary keys (-1 for unknown ids)"""
+        college_ids = np.asarray(college_ids, dtype=np.int64)
+        if not len(self.college_ids):
+            return np.full(len(college_ids), -1, dtype=np.int64)
+        positions = np.minimum(
+            np.searchsorted(self.college_ids, college_ids), len(self.college_ids) - 1
+        )
+        return np.where(self.college_ids[positions] == college_ids, positions, -1)
+
+    def source_scores(self, year=None):
+        """
+        (C, S) score per college and source for ``year``.
+
+        Without a year each source's scores are averaged over the years the
+        college was ranked in; NaN where it never was.
+        """
+        if year is not None:
+            position = self.year_position(year)
+            if position is None:
+                return np.full(self.shape[:2], np.nan)
+            return self.score[:, :, position]
+        scored = ~np.isnan(self.score)
+        counts = scored.sum(axis=2)
+        totals = np.where(scored, self.score, 0.0).sum(axis=2)
+        averages = np.full(self.shape[:2], np.nan)
+        np.divide(totals, counts, out=averages, where=counts > 0)
+        return averages
+
+    def region_average(self, region, year=None):
+        """
+        Mean score and ranking count per college for a region.
+
+        Averages over every (source, year) cell of the region, or a single
+        year when given. Colleges without any score get NaN; the count
+        includes rankings that have no score, like the ORM composite did.
+        """
+        sources = self.region_sources(region)
+        scores = self.score[:, sources, :]
+        ranks = self.rank[:, sources, :]
+        if year is not None:
+            position = self.year_position(year)
+            if position is None:
+                empty = np.full(len(self.college_ids), np.nan)
+                return empty, np.zeros(len(self.college_ids), dtype=np.int64)
+            scores = scores[:, :, position:position + 1]
+            ranks = ranks[:, :, position:position + 1]
+        scored = ~np.isnan(scores)
+        scored_counts = scored.sum(axis=(1, 2))
+        totals = np.where(scored, scores, 0.0).sum(axis=(1, 2))
+        averages = np.full(len(self.college_ids), np.nan)
+        np.divide(totals, scored_counts, out=averages, where=scored_counts > 0)
+        return averages, (~np.isnan(ranks)).sum(axis=(1, 2))
+
+
+def build_matrix(version, colleges, sources, rows):
+    """
+    Assemble a ``RankingsMatrix``.
+
+    ``colleges`` is an iterable of ``(id, country)``, ``sources`` of
+    ``(id, code, region)`` and ``rows`` of tuples in ``RANKING_COLUMNS``
+    order (Decimals and ``None`` are fine).
+    """
+    started = time.perf_counter()
+
+    college_rows = sorted(colleges)
+    college_ids = np.fromiter((c[0] for c in college_rows), dtype=np.int64, count=len(college_rows))
+    country_codes_by_name = {}
+    country_codes = np.fromiter(
+        (country_codes_by_name.setdefault(c[1], len(country_codes_by_name)) for c in college_rows),
+        dtype=np.int32,
+        count=len(college_rows),
+    )
+    countries = list(country_codes_by_name)
+
+    source_rows = list(sources)
+    source_ids = np.array([s[0] for s in source_rows], dtype=np.int64)
+    source_codes = [s[1] for s in source_rows]
+    source_regions = np.array([s[2] for s in source_rows], dtype=object)
+    source_lookup = {source_id: i for i, source_id in enumerate(source_ids.tolist())}
+
+    columns = [[] for _ in RANKING_COLUMNS]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+
+    row_college = np.array(columns[0], dtype=np.int64)
+    row_source = np.array([source_lookup.get(s, -1) for s in columns[1]], dtype=np.int64)
+    row_year = np.array(columns[2], dtype=np.int64)
+    years = np.unique(row_year)
+
+    c_pos = np.searchsorted(college_ids, row_college)
+    keep = (c_pos < len(college_ids)) & (row_source >= 0)
+    keep[keep] &= college_ids[c_pos[keep]] == row_college[keep]
+    c_pos, s_pos = c_pos[keep], row_source[keep]
+    y_pos = np.searchsorted(years, row_year[keep])
+
+    shape = (len(college_ids), len(source_ids), len(years))
+
+    def scatter(values, dtype):
+        cube = np.full(shape, np.nan, dtype=dtype)
+        cube[c_pos, s_pos, y_pos] = np.array(values, dtype=dtype)[keep]
+        return cube
+
+    rank = scatter(columns[3], np.float32)
+    score = scatter(columns[4], np.float64)
+    metrics = {
+        name: scatter(columns[5 + i], np.float32)
+        for i, name in enumerate(METRIC_FIELDS)
+    }
+
+    return RankingsMatrix(
+        version=version,
+        college_ids=college_ids,
+        countries=countries,
+        country_codes=country_codes,
+        source_ids=source_ids,
+        source_codes=source_codes,
+        source_regions=source_regions,
+        years=years,
+        rank=rank,
+        score=score,
+        metrics=metrics,
+        load_seconds=time.perf_counter() - started,
+    )
+
+
+def load_matrix(version=None, rankings=None):
+    """
+    Read the rankings tables into a new matrix; ``rankings`` (default: the
+    active version's) is a ``CollegeRanking`` queryset
+    """
+    started = time.perf_counter()
+    version = version or get_dataset_version()
+    rankings = CollegeRanking.objects.all() if rankings is None else rankings
+    matrix = build_matrix(
+        version,
+        College.objects.values_list('id', 'country').iterator(chunk_size=LOAD_CHUNK_SIZE),
+        RankingSource.objects.order_by('region', 'name').values_list('id', 'code', 'region'),
+        rankings.order_by().values_list(*RANKING_COLUMNS).iterator(chunk_size=LOAD_CHUNK_SIZE),
+    )
+    matrix.load_seconds = time.perf_counter() - started
+    logger.info(
+        f"Loaded rankings matrix {version}: shape={matrix.shape} "
+        f"{matrix.nbytes / 1_048_576:.1f} MiB in {matrix.load_seconds:.2f}s"
+    )
+    return matrix
+
+
+class _ReadModelState:
+    lock = threading.Lock()
+    matrix = None
+    reloading = False
+
+
+def _reload_in_background(version):
+    def run():
+        try:
+            matrix = load_matrix(version)
+            with _ReadModelState.lock:
+                _ReadModelState.matrix = matrix
+        except Exception:
+            logger.exception('Background read model reload failed')
+        finally:
+            _ReadModelState.reloading = False
+            close_old_connections()
+
+    thread = threading.Thread(target=run, name='rankings-readmodel-reload', daemon=True)
+    thread.start()
+    return thread
+
+
+def get_matrix():
+    """
+    Return the matrix for the current dataset version.
+
+    The first call in a process loads synchronously. After that a version
+    change starts a background reload and the previous matrix is returned
+    until it finishes (set ``READ_MODEL_BACKGROUND_RELOAD = False`` to
+    reload inline instead).
+    """
+    version = get_dataset_version()
+    matrix = _ReadModelState.matrix
+    if matrix is not None and matrix.version == version:
+        return matrix
+
+    if matrix is not None and getattr(settings, 'READ_MODEL_BACKGROUND_RELOAD', True):
+        with _ReadModelState.lock:
+            if not _ReadModelState.reloading:
+                _ReadModelState.reloading = True
+                _reload_in_background(version)
+        return matrix
+
+    with _ReadModelState.lock:
+        matrix = _ReadModelState.matrix
+        if matrix is None or matrix.version != version:
+            matrix = load_matrix(version)
+            _ReadModelState.matrix = matrix
+    return matrix
+
+
+def set_matrix(matrix):
+    """Install an already loaded matrix (the ingest pipeline shares the one it built)"""
+    with _ReadModelState.lock:
+        _ReadModelState.matrix = matrix
+
+
+def reset_matrix():
+    """Drop the cached matrix (tests, or after swapping databases)"""
+    with _ReadModelState.lock:
+        _ReadModelState.matrix = None
@@ -0,0 +1,76 @@
+"""
+Fast JSON renderer for the REST API
+
+DRF's ``JSONRenderer`` walks every payload through the stdlib ``json``
+encoder. ``FastJSONRenderer`` produces the same compact output with orjson,
+which handles dicts, lists and UUIDs natively and only calls back into
+Python for Decimals, lazy strings and dates and times (formatted as DRF's
+encoder does, e.g. ``Z`` for UTC). Like DRF it escapes U+2028 and U+2029,
+which are valid in JSON but end a line in JavaScript.
+"""
+
+import datetime
+import decimal
+import uuid
+
+from django.utils import timezone
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def json_default(obj):
+    """Mirror ``rest_framework.utils.encoders.JSONEncoder`` for non-native types"""
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if isinstance(obj, datetime.time):
+        if timezone.is_aware(obj):
+            raise ValueError("JSON can't represent timezone-aware times.")
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, 'tolist'):
+        # numpy arrays and scalars
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """orjson-backed drop-in for ``JSONRenderer``; falls back to it when orjson is missing"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson always writes compact UTF-8, DRF's default output
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        # The browsable API asks for indented output; regular clients never do
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        content = orjson.dumps(data, default=json_default, option=option)
+        return content.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
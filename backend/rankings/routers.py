@@ -0,0 +1,117 @@
+"""
+Read/write database routing
+
+With a read replica configured (``REPLICA_DATABASE_URL`` adds the
+``READ_REPLICA_ALIAS`` database), ``ReadReplicaRouter`` sends the reads of
+safe (GET/HEAD/OPTIONS) requests to the replica and everything else to the
+primary (``default``):
+
+* writes always go to the primary;
+* reads outside a request (ingest commands, the post-ingest pipeline,
+  background matrix reloads) use the primary, so an ingest never reads its
+  own writes back from a replica that has not caught up;
+* unsafe requests (admin saves) read from the primary throughout;
+* read-your-writes: once a request writes, the rest of it reads from the
+  primary and ``ReadReplicaMiddleware`` sets a cookie that keeps the same
+  client on the primary for ``READ_YOUR_WRITES_SECONDS``;
+* a replica that cannot be connected to is marked down for
+  ``REPLICA_RETRY_SECONDS`` and reads fall back to the primary meanwhile;
+* ``READ_REPLICA_APP_LABELS`` limits the replica to some apps' models, for
+  a replica that is not a full copy (the SQLite snapshot of
+  ``rankings.sqlite_snapshot``).
+
+The routing state of the request being served lives in a context variable
+set by ``routed_reads``. Without a replica every method returns ``None``
+and Django uses ``default`` as usual.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_COOKIE = 'db_primary'
+
+_state = ContextVar('db_routing', default=None)
+# alias -> time.monotonic() before which the replica is not retried
+_down_until = {}
+
+
+class RoutingState:
+    """Routing of one request: whether reads may use the replica, and whether it wrote"""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+def replica_alias():
+    """The configured replica alias, or ``None`` without a replica database"""
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def replica_available(alias):
+    """
+    Whether ``alias`` accepts connections.
+
+    A failed connection marks the replica down for ``REPLICA_RETRY_SECONDS``
+    so requests do not each wait on it; an open connection is reused as is.
+    """
+    now = time.monotonic()
+    if _down_until.get(alias, 0) > now:
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError as e:
+        logger.warning('Read replica %r unavailable, reading from the primary: %s', alias, e)
+        _down_until[alias] = now + settings.REPLICA_RETRY_SECONDS
+        return False
+    _down_until.pop(alias, None)
+    return True
+
+
+@contextmanager
+def routed_reads(replica=True):
+    """
+    Route the reads of the block to the replica (if ``replica``) until it
+    writes; yields the ``RoutingState`` so the caller can see if it wrote.
+    """
+    state = RoutingState(replica)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote:
+            return None
+        app_labels = getattr(settings, 'READ_REPLICA_APP_LABELS', None)
+        if app_labels is not None and model._meta.app_label not in app_labels:
+            return None
+        alias = replica_alias()
+        if alias is None or not replica_available(alias):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
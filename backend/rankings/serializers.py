@@ -3,10 +3,11 @@ Django REST Serializers
 """
 
 from rest_framework import serializers
+from .fieldsets import SparseFieldsetMixin
 from .models import College, CollegeRanking, RankingSource, RankingCategory, CacheMetadata
 
 
-class RankingSourceSerializer(serializers.ModelSerializer):
+class RankingSourceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = RankingSource
         fields = ['id', 'name', 'code', 'region', 'website_url', 'last_updated']
@@ -20,34 +21,69 @@ class RankingCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'category_type', 'category_display', 'strength_level', 'score', 'description']
 
 
-class CollegeRankingSerializer(serializers.ModelSerializer):
+class CollegeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = College
+        fields = ['id', 'name', 'country', 'city', 'established_year', 'logo_url']
+        presets = {
+            'slim': {'fields': ['id', 'name', 'country', 'city']},
+        }
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, fieldset):
+        if fieldset is None or fieldset.fields is None:
+            return queryset
+        fields = [f for f in cls.Meta.fields if fieldset.includes(f)]
+        return queryset.only(*(fields or ['id']))
+
+
+class CollegeRankingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     source = RankingSourceSerializer(read_only=True)
     source_code = serializers.CharField(source='source.code', read_only=True)
-    college = serializers.SerializerMethodField()
+    college = CollegeSerializer(read_only=True)
+    categories = RankingCategorySerializer(many=True, read_only=True)
     
     class Meta:
         model = CollegeRanking
         fields = [
             'id', 'college', 'source', 'source_code', 'rank', 'score', 'ranking_year',
             'academic_reputation', 'employer_reputation', 'faculty_student_ratio',
-            'research_impact', 'international_diversity', 'teaching_quality'
+            'research_impact', 'international_diversity', 'teaching_quality',
+            'categories'
         ]
+        expandable_fields = {
+            'college': CollegeSerializer,
+            'source': RankingSourceSerializer,
+        }
+        presets = {
+            # Row shape used by the frontend ranking tables
+            'slim': {
+                'fields': ['id', 'rank', 'score', 'ranking_year', 'college'],
+                'expand': ['college'],
+            },
+        }
     
-    def get_college(self, obj):
-        from .serializers import CollegeSerializer
-        return CollegeSerializer(obj.college).data if obj.college else None
+    @classmethod
+    def optimize_queryset(cls, queryset, fieldset):
+        if fieldset is None:
+            return queryset.select_related('college', 'source').prefetch_related('categories')
+        if not fieldset.includes('categories'):
+            queryset = queryset.prefetch_related(None)
+        else:
+            queryset = queryset.prefetch_related('categories')
+        related = []
+        if fieldset.includes('college') and fieldset.is_expanded('college'):
+            related.append('college')
+        if ((fieldset.includes('source') and fieldset.is_expanded('source'))
+                or fieldset.includes('source_code')):
+            related.append('source')
+        return queryset.select_related(None).select_related(*related)
 
 
-class CollegeSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = College
-        fields = ['id', 'name', 'country', 'city', 'established_year', 'logo_url']
-
-
-class CollegeDetailSerializer(serializers.ModelSerializer):
+class CollegeDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     rankings = serializers.SerializerMethodField()
-    composite_score_international = serializers.ReadOnlyField()
-    composite_score_american = serializers.ReadOnlyField()
+    composite_score_international = serializers.SerializerMethodField()
+    composite_score_american = serializers.SerializerMethodField()
     
     class Meta:
         model = College
@@ -57,19 +93,42 @@ class CollegeDetailSerializer(serializers.ModelSerializer):
             'composite_score_international', 'composite_score_american'
         ]
     
+    def get_composite_score_international(self, obj):
+        return obj.composite_score('INTERNATIONAL', self.context.get('year'))
+    
+    def get_composite_score_american(self, obj):
+        return obj.composite_score('AMERICAN', self.context.get('year'))
+    
     def get_rankings(self, obj):
-        rankings = obj.collegeranking_set.all().select_related('source')
-        return CollegeRankingSerializer(rankings, many=True).data
+        rankings = obj.collegeranking_set.all()
+        if 'collegeranking_set' not in getattr(obj, '_prefetched_objects_cache', {}):
+            rankings = rankings.select_related('source').prefetch_related('categories')
+        fieldset = self.fieldset.child('rankings') if self.fieldset else None
+        return CollegeRankingSerializer(rankings, many=True, fieldset=fieldset).data
 
 
-class CompositeRankingSerializer(serializers.Serializer):
-    college = CollegeSerializer(read_only=True)
+class CompositeRankingSerializer(SparseFieldsetMixin, serializers.Serializer):
+    college = CollegeSerializer(source='*', read_only=True)
     composite_score = serializers.SerializerMethodField()
     region = serializers.SerializerMethodField()
     rankings_count = serializers.SerializerMethodField()
     
+    class Meta:
+        expandable_fields = {
+            'college': CollegeSerializer,
+        }
+        presets = {
+            # Row shape used by the frontend composite views
+            'slim': {'fields': ['college', 'composite_score']},
+        }
+    
+    def build_expanded_field(self, name, serializer_class, fieldset):
+        return serializer_class(source='*', read_only=True, fieldset=fieldset)
+    
+    def build_collapsed_field(self, name):
+        return serializers.IntegerField(source='pk', read_only=True)
+    
     def get_composite_score(self, obj):
-        from django.db.models import Avg
         # Get the annotated avg_score if available, otherwise calculate
         if hasattr(obj, 'avg_score') and obj.avg_score is not None:
             return round(float(obj.avg_score), 2)
@@ -79,18 +138,16 @@ class CompositeRankingSerializer(serializers.Serializer):
         return self.context.get('region', 'INTERNATIONAL')
     
     def get_rankings_count(self, obj):
+        if hasattr(obj, 'rankings_count'):
+            return obj.rankings_count
         region = self.context.get('region', 'INTERNATIONAL')
         return obj.collegeranking_set.filter(source__region=region).count()
     
-    def to_representation(self, instance):
-        """Custom representation to include college data"""
-        data = {
-            'college': CollegeSerializer(instance).data,
-            'composite_score': self.get_composite_score(instance),
-            'region': self.get_region(instance),
-            'rankings_count': self.get_rankings_count(instance),
-        }
-        return data
+    @classmethod
+    def optimize_queryset(cls, queryset, fieldset):
+        if fieldset is None or not fieldset.includes('college'):
+            return queryset
+        return CollegeSerializer.optimize_queryset(queryset, fieldset.child('college'))
 
 
 class CacheMetadataSerializer(serializers.ModelSerializer):
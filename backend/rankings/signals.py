@@ -0,0 +1,57 @@
+"""
+Model and database signal handlers
+"""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .dataset import invalidate_dataset_version
+from .models import College, CollegeProfile, CollegeRanking, RankingSource, active_version_id
+from .sqlite_snapshot import SNAPSHOT_MMAP_BYTES, is_snapshot_connection
+
+
+def _staged(sender, instance):
+    """Whether ``instance`` is a ranking of a version readers do not see yet"""
+    return sender is CollegeRanking and instance.version_id != active_version_id()
+
+
+@receiver(post_save, sender=College)
+@receiver(post_save, sender=CollegeRanking)
+@receiver(post_save, sender=RankingSource)
+@receiver(post_delete, sender=College)
+@receiver(post_delete, sender=CollegeRanking)
+@receiver(post_delete, sender=RankingSource)
+def invalidate_on_change(sender, instance, **kwargs):
+    """
+    Row-level edits (admin, get_or_create) change the dataset version;
+    writes into a staging version only do once it is activated
+    """
+    if not _staged(sender, instance):
+        invalidate_dataset_version()
+
+
+@receiver(post_save, sender=College)
+@receiver(post_save, sender=CollegeRanking)
+@receiver(post_delete, sender=CollegeRanking)
+def drop_stale_profile(sender, instance, **kwargs):
+    """Views fall back to live computation until the profile is rebuilt"""
+    if _staged(sender, instance):
+        return
+    college_id = instance.pk if sender is College else instance.college_id
+    CollegeProfile.objects.filter(pk=college_id).delete()
+
+
+@receiver(post_save, sender=RankingSource)
+def drop_all_profiles(sender, created, **kwargs):
+    """Every profile embeds source details"""
+    if not created:
+        CollegeProfile.objects.all().delete()
+
+
+@receiver(connection_created)
+def tune_snapshot_connection(sender, connection, **kwargs):
+    """Memory-map the read-only SQLite snapshot and refuse writes to it"""
+    if is_snapshot_connection(connection):
+        connection.connection.execute(f'PRAGMA mmap_size = {SNAPSHOT_MMAP_BYTES}')
+        connection.connection.execute('PRAGMA query_only = 1')
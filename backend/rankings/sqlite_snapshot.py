@@ -0,0 +1,165 @@
+"""
+Read-only SQLite snapshot of the active dataset
+
+Between ingests the rankings data does not change, so it can be served
+from a local file instead of paying a network round trip to Postgres per
+query. ``build_sqlite_snapshot`` compiles every table of the rankings app
+(only the active version's rankings and categories, plus the precomputed
+composite positions and college profiles) into a fresh SQLite file with
+the same schema and indexes, then:
+
+* runs ``ANALYZE`` so the query planner has statistics;
+* switches the journal back to ``DELETE`` (no WAL) and ``VACUUM``\\ s the
+  file, leaving one compact self-contained file;
+* moves it over the previous snapshot with an atomic rename.
+
+With ``SERVE_SQLITE_SNAPSHOT`` on, settings point the read-replica alias
+at the file opened with ``mode=ro&immutable=1`` (no locking or change
+detection) and ``rankings.routers`` sends the reads of GET requests to
+it; writes still go to the primary. Connections to it are opened per
+request, so a request started after the rename reads the new file, and are
+memory-mapped (``SNAPSHOT_MMAP_BYTES``).
+
+The post-ingest pipeline rebuilds the snapshot when
+``SQLITE_SNAPSHOT_PATH`` is set; ``python manage.py build_sqlite_snapshot``
+builds it on demand (e.g. when a web instance starts).
+"""
+
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from .models import (
+    ActiveDataset,
+    CollegeRanking,
+    DatasetVersion,
+    RankingCategory,
+    active_version_subquery,
+)
+
+SNAPSHOT_CHUNK_SIZE = 5000
+SNAPSHOT_MMAP_BYTES = 256 * 1024 * 1024
+
+# Field types whose Python values need the backend's adaptation before insert
+PREPARED_TYPES = {'DateField', 'DateTimeField', 'DecimalField', 'JSONField', 'TimeField', 'UUIDField'}
+
+
+def is_snapshot_connection(connection):
+    """Whether ``connection`` opens a snapshot (settings use ``mode=ro&immutable=1``)"""
+    return connection.vendor == 'sqlite' and 'immutable=1' in str(connection.settings_dict['NAME'])
+
+
+def _writable_connection(path):
+    return DatabaseWrapper({
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(path),
+        'OPTIONS': {},
+        'TIME_ZONE': None,
+        'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False,
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'USER': '',
+        'PASSWORD': '',
+        'HOST': '',
+        'PORT': '',
+        'TEST': {},
+    }, alias='sqlite_snapshot')
+
+
+def snapshot_querysets():
+    """``(model, queryset)`` for every rankings table, limited to the active version"""
+    scoped = {
+        DatasetVersion: DatasetVersion.objects.filter(
+            pk__in=ActiveDataset.objects.values('version_id')
+        ),
+        CollegeRanking: CollegeRanking.objects.all(),
+        RankingCategory: RankingCategory.objects.filter(
+            college_ranking__version=active_version_subquery()
+        ),
+    }
+    return [
+        (model, scoped.get(model, model._default_manager.all()))
+        for model in apps.get_app_config('rankings').get_models()
+    ]
+
+
+def _copy_table(model, queryset, target, chunk_size):
+    fields = model._meta.concrete_fields
+    quote = target.ops.quote_name
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} '
+        f'({", ".join(quote(f.column) for f in fields)}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))})'
+    )
+    prepared = [(i, f) for i, f in enumerate(fields) if f.get_internal_type() in PREPARED_TYPES]
+    rows = queryset.order_by('pk').values_list(*(f.attname for f in fields)).iterator(chunk_size)
+    copied = 0
+    with target.cursor() as cursor:
+        while chunk := list(islice(rows, chunk_size)):
+            if prepared:
+                chunk = [list(row) for row in chunk]
+                for row in chunk:
+                    for i, field in prepared:
+                        row[i] = field.get_db_prep_save(row[i], target)
+            cursor.executemany(sql, chunk)
+            copied += len(chunk)
+    return copied
+
+
+def build_sqlite_snapshot(path, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    Compile the active dataset into a read-only SQLite file at ``path``.
+
+    The file is built next to ``path`` and renamed over it when complete,
+    so readers see either the previous snapshot or the new one. Returns
+    ``{'path', 'bytes', 'tables': {table: rows}, 'seconds'}``.
+    """
+    started = time.perf_counter()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f'{path.name}.building')
+    temporary.unlink(missing_ok=True)
+
+    tables = {}
+    target = _writable_connection(temporary)
+    try:
+        with target.cursor() as cursor:
+            # Nothing to recover if the build dies: the file is thrown away
+            cursor.execute('PRAGMA journal_mode = OFF')
+            cursor.execute('PRAGMA synchronous = OFF')
+        querysets = snapshot_querysets()
+        with target.schema_editor(atomic=False) as editor:
+            for model, _ in querysets:
+                editor.create_model(model)
+
+        with target.constraint_checks_disabled():
+            target.set_autocommit(False)
+            for model, queryset in querysets:
+                tables[model._meta.db_table] = _copy_table(model, queryset, target, chunk_size)
+            target.commit()
+            target.set_autocommit(True)
+
+        with target.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('PRAGMA journal_mode = DELETE')
+            cursor.execute('VACUUM')
+    except BaseException:
+        target.close()
+        temporary.unlink(missing_ok=True)
+        raise
+    target.close()
+
+    with open(temporary, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return {
+        'path': str(path),
+        'bytes': path.stat().st_size,
+        'tables': tables,
+        'seconds': time.perf_counter() - started,
+    }
@@ -0,0 +1,107 @@
+"""
+Cold-start profiling
+
+``python manage.py profile_startup`` runs this module in a fresh
+interpreter with ``python -X importtime -m rankings.startup``. The
+interpreter imports Django and loads the WSGI application the way gunicorn
+does, optionally warms up (``rankings.warmup``), then serves each path
+twice in-process and prints its timings as JSON:
+
+* ``phases``: seconds spent importing Django, in ``django.setup()`` and
+  the WSGI handler, and warming up;
+* ``requests``: status and time to first byte of the cold (first) and the
+  warm (repeated) request for each path;
+* ``first_byte_at``: wall-clock time of the first response byte, which the
+  parent compares with the time it started the process.
+
+A marker line on stderr before each phase lets ``parse_importtime``
+attribute every import to the phase that paid for it, so imports that are
+deferred until the first request show up separately.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+PHASE_MARKER = 'startup-phase: '
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def _phase(name):
+    sys.stderr.write(f'{PHASE_MARKER}{name}\n')
+    sys.stderr.flush()
+
+
+def profile(paths, warm=False):
+    """Load the application, serve ``paths`` and return the timings"""
+    phases = {}
+    start = time.perf_counter()
+
+    _phase('import django')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from django.core.wsgi import get_wsgi_application
+
+    loaded = time.perf_counter()
+    phases['import django'] = loaded - start
+
+    _phase('setup')
+    application = get_wsgi_application()
+    phases['setup'] = time.perf_counter() - loaded
+
+    from .warmup import serve, warm_up, warm_up_host
+
+    if warm:
+        _phase('warm up')
+        started = time.perf_counter()
+        warm_up(application=application)
+        phases['warm up'] = time.perf_counter() - started
+
+    host = warm_up_host()
+    requests = []
+    first_byte_at = None
+    for path in paths:
+        _phase(f'GET {path}')
+        sent_at = time.time()
+        status, cold = serve(application, path, host)
+        if first_byte_at is None:
+            first_byte_at = sent_at + cold
+        _, warm_ttfb = serve(application, path, host)
+        requests.append({'path': path, 'status': status, 'cold': cold, 'warm': warm_ttfb})
+    return {'phases': phases, 'requests': requests, 'first_byte_at': first_byte_at}
+
+
+def parse_importtime(stderr):
+    """
+    ``-X importtime`` output as ``{phase: [(module, self_us, cumulative_us,
+    depth)]}``; imports before the first marker fall under ``'interpreter'``
+    """
+    imports = defaultdict(list)
+    phase = 'interpreter'
+    for line in stderr.splitlines():
+        if line.startswith(PHASE_MARKER):
+            phase = line[len(PHASE_MARKER):]
+            continue
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports[phase].append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return dict(imports)
+
+
+def package_totals(imports):
+    """``{top-level package: (modules, self microseconds)}`` for a list of imports"""
+    totals = defaultdict(lambda: [0, 0])
+    for module, self_us, _, _ in imports:
+        package = totals[module.split('.')[0]]
+        package[0] += 1
+        package[1] += self_us
+    return {name: tuple(total) for name, total in totals.items()}
+
+
+if __name__ == '__main__':
+    warm = '--warm-up' in sys.argv[1:]
+    paths = [arg for arg in sys.argv[1:] if arg != '--warm-up']
+    print(json.dumps(profile(paths, warm=warm)))
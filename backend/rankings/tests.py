@@ -1,8 +1,76 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import combinations
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import OperationalError, close_old_connections, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import College, RankingSource, CollegeRanking
+from scrapers.normalize import normalize_rank, normalize_score
+
+from . import readmodel, routers
+from .aggregation import adjacent_preferences, aggregate, kemeny
+from .agreement import count_inversions, kendall_tau
+from .analysis import analyze_strengths
+from .bitmaps import parse_source_expression, source_bitmaps
+from .cache_backends import VERSION_KEY, _LocalTier
+from .caching import cache_metrics, cached, refresh_early, reset_cache_metrics
+from .categories import rebuild_categories
+from .composites import CompositeRows, CompositeSpec, average_composite
+from .dataset import get_dataset_version, get_latest_year
+from .export import COLUMN_NAMES, EXPORT_FORMATS
+from .facets import facet_index
+from .importer import import_records, read_csv, write_checkpoint
+from .middleware import ReadReplicaMiddleware, choose_encoding
+from .models import (
+    AggregateRanking, College, CollegeProfile, CollegeRanking, DatasetVersion, RankingCategory,
+    RankingSource, active_version_id,
+)
+from .movers import get_movers
+from .pagination import estimated_count
+from .pipeline import run_post_ingest
+from .profiles import check_profiles, rebuild_profiles
+from .publish import publish_snapshot
+from .queries import composite_queryset
+from .readmodel import get_matrix, load_matrix, reset_matrix
+from .renderers import FastJSONRenderer
+from .routers import PRIMARY_COOKIE, ReadReplicaRouter, routed_reads
+from .similarity import SimilarityIndex
+from .sqlite_snapshot import build_sqlite_snapshot
+from .startup import PHASE_MARKER, package_totals, parse_importtime
+from .versions import (
+    KEEP_VERSIONS, DatasetValidationError, NothingStaged, activate_version,
+    create_staging_version, prune_versions, rollback_version, staged_version,
+)
+from .warmup import WARM_UP_PATHS, warm_up
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = pq = None
 
 
 class CollegeModelTests(TestCase):
@@ -51,3 +119,1640 @@ class CollegeAPITests(APITestCase):
         url = reverse('college-search')
         response = self.client.get(url, {'q': 'Harvard'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SnapshotPublishTests(TestCase):
+    def setUp(self):
+        self.snapshot_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshot_root, ignore_errors=True)
+        source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        college = College.objects.create(name="MIT", country="USA")
+        CollegeRanking.objects.create(
+            college=college, source=source, rank=1, score=99.5, ranking_year=2025
+        )
+        self.college = college
+
+    def test_publish_writes_compressed_files_and_manifest(self):
+        with override_settings(API_SNAPSHOT_ROOT=self.snapshot_root):
+            manifest = publish_snapshot()
+            publish_snapshot()
+
+        link = Path(self.snapshot_root) / 'current'
+        self.assertTrue(link.is_symlink())
+        for name in ['sources.json', 'composite/international/page-1.json',
+                     'rankings/qs/page-1.json', f'colleges/{self.college.pk}.json']:
+            self.assertIn(name, manifest['files'])
+            self.assertTrue((link / name).exists())
+            self.assertTrue((link / (name + '.gz')).exists())
+
+        page = json.loads((link / 'rankings/qs/page-1.json').read_text())
+        self.assertEqual(page['count'], 1)
+        self.assertEqual(page['source']['code'], 'qs')
+        self.assertEqual(len(list((Path(self.snapshot_root) / 'versions').iterdir())), 2)
+
+    def test_view_follows_the_current_snapshot(self):
+        def get(path, **headers):
+            response = self.client.get(f'/api-snapshot/{path}', **headers)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            return response, body
+
+        with override_settings(API_SNAPSHOT_ROOT=self.snapshot_root):
+            publish_snapshot()
+            response, body = get('sources.json', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(json.loads(gzip.decompress(body))[0]['code'], 'qs')
+            self.assertEqual(int(response['Content-Length']), len(body))
+            etag = response['ETag']
+            self.assertEqual(
+                get('sources.json', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')[0]
+                .status_code, 304,
+            )
+
+            # A new snapshot is served at once, with new ETags
+            stanford = College.objects.create(name="Stanford", country="USA")
+            self.assertEqual(get(f'colleges/{stanford.pk}.json')[0].status_code, 404)
+            publish_snapshot()
+            response, body = get(f'colleges/{stanford.pk}.json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(body)['name'], 'Stanford')
+            self.assertNotEqual(get('sources.json', HTTP_ACCEPT_ENCODING='gzip')[0]['ETag'], etag)
+
+            # Nothing outside the current snapshot is reachable
+            staging = Path(self.snapshot_root) / 'versions' / '.staging'
+            staging.mkdir()
+            (staging / 'sources.json').write_text('[]')
+            for path in ['../versions/.staging/sources.json', '.staging/sources.json',
+                         'sources.json.gz', 'missing.json']:
+                self.assertEqual(get(path)[0].status_code, 404, path)
+
+
+class RenderingAndCompressionTests(APITestCase):
+    def setUp(self):
+        source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        for i in range(1, 41):
+            college = College.objects.create(name=f"University {i}", country="USA")
+            CollegeRanking.objects.create(
+                college=college, source=source, rank=i, score=100 - i, ranking_year=2025
+            )
+
+    def test_fast_renderer_matches_drf_output(self):
+        data = {
+            'score': Decimal('95.50'),
+            'name': 'MIT \u2028 Cambridge\u2029',
+            'ranks': [1, 2],
+            'updated_at': datetime(2025, 1, 2, 3, 4, 5, 678, tzinfo=dt_timezone.utc),
+            'fetched_at': datetime(
+                2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))
+            ),
+            'naive': datetime(2025, 1, 2, 3, 4, 5),
+            'published': date(2025, 1, 2),
+            'at': datetime(2025, 1, 2, 12, 30, 0, 1).time(),
+            'lag': timedelta(seconds=90),
+            3: None,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_large_responses_are_compressed(self):
+        url = reverse('ranking-by-source')
+        response = self.client.get(url, {'source': 'qs'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 40)
+
+        response = self.client.get(url, {'source': 'qs'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_brotli_preferred_when_accepted(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+        self.assertIsNone(choose_encoding('identity'))
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.college = College.objects.create(name="MIT", country="USA", city="Cambridge")
+        CollegeRanking.objects.create(
+            college=self.college, source=self.source, rank=1, score=99.0, ranking_year=2025
+        )
+
+    def test_slim_preset_drops_source_and_metrics(self):
+        response = self.client.get(reverse('ranking-by-source'), {'source': 'qs', 'preset': 'slim'})
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'rank', 'score', 'ranking_year', 'college'})
+        self.assertEqual(row['college']['name'], 'MIT')
+
+    def test_collapsed_relations_render_ids_without_joins(self):
+        get_dataset_version()  # memoized across requests in practice
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('ranking-by-source'),
+                {'source': 'qs', 'fields': 'rank,college', 'expand': ''},
+            )
+        self.assertEqual(response.data['results'][0], {'college': self.college.pk, 'rank': 1})
+
+    def test_composite_nested_fields_and_unknown_preset(self):
+        url = reverse('composite-ranking-international')
+        response = self.client.get(url, {'fields': 'composite_score,college.name'})
+        self.assertEqual(response.data['results'][0], {'college': {'name': 'MIT'}, 'composite_score': 99.0})
+
+        response = self.client.get(url, {'preset': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CollegeBundleTests(APITestCase):
+    def setUp(self):
+        source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.college = College.objects.create(name="MIT", country="USA")
+        other = College.objects.create(name="Stanford", country="USA")
+        CollegeRanking.objects.create(
+            college=self.college, source=source, rank=1, score=99.0, ranking_year=2025,
+            research_impact=95, academic_reputation=90, teaching_quality=70,
+        )
+        CollegeRanking.objects.create(
+            college=other, source=source, rank=2, score=97.0, ranking_year=2025
+        )
+
+    def test_bundle_uses_fixed_number_of_queries(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        url = reverse('college-detail', args=[self.college.pk])
+        # Memoized per dataset version in steady state
+        get_latest_year()
+        get_matrix()
+        # profile lookup, college, rankings + sources, ranking categories, similar
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'include': 'analysis,breakdown,similar'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['analysis']['strengths'][0]['metric'], 'research_impact')
+        self.assertEqual(len(response.data['breakdown']['international_rankings']), 1)
+        self.assertEqual(response.data['similar'][0]['college']['name'], 'Stanford')
+        self.assertEqual(response.data['composite_score_international'], 99.0)
+
+    def test_unknown_include_is_rejected(self):
+        url = reverse('college-detail', args=[self.college.pk])
+        response = self.client.get(url, {'include': 'everything'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CollegeProfileTests(APITestCase):
+    def setUp(self):
+        self.source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.college = College.objects.create(name="MIT", country="USA")
+        self.ranking = CollegeRanking.objects.create(
+            college=self.college, source=self.source, rank=1, score=99.0, ranking_year=2025,
+            research_impact=95,
+        )
+
+    def test_profiles_serve_same_documents_with_one_query(self):
+        detail_url = reverse('college-detail', args=[self.college.pk])
+        breakdown_url = reverse('college-rankings-breakdown', args=[self.college.pk])
+        live_detail = json.loads(self.client.get(detail_url).content)
+        live_breakdown = json.loads(self.client.get(breakdown_url).content)
+
+        self.assertEqual(rebuild_profiles(), 1)
+        with self.assertNumQueries(1):
+            response = self.client.get(detail_url)
+        self.assertEqual(json.loads(response.content), live_detail)
+        with self.assertNumQueries(1):
+            response = self.client.get(breakdown_url)
+        self.assertEqual(json.loads(response.content), live_breakdown)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('analysis-analyze'), {'college_id': self.college.pk})
+
+    def test_edits_drop_profile_and_checker_reports_drift(self):
+        rebuild_profiles()
+        self.assertEqual(list(check_profiles()), [])
+
+        CollegeProfile.objects.filter(pk=self.college.pk).update(
+            detail={'id': self.college.pk, 'name': 'Wrong'}
+        )
+        problems = dict(check_profiles())
+        self.assertIn('detail.name: \'Wrong\' != \'MIT\'', problems[self.college.pk])
+
+        self.ranking.rank = 2
+        self.ranking.save()
+        self.assertFalse(CollegeProfile.objects.filter(pk=self.college.pk).exists())
+
+    def test_writes_into_a_staging_version_keep_active_profiles(self):
+        rebuild_profiles()
+        version = get_dataset_version()
+        staging = create_staging_version('ingest')
+        ranking = CollegeRanking.all_versions.get(version=staging, college=self.college)
+        ranking.rank = 3
+        ranking.save()
+        ranking.delete()
+        self.assertTrue(CollegeProfile.objects.filter(pk=self.college.pk).exists())
+        self.assertEqual(get_dataset_version(), version)
+
+    def test_checker_reports_profiles_from_an_older_dataset_version(self):
+        rebuild_profiles()
+        other = College.objects.create(name="Caltech", country="USA")
+        CollegeRanking.objects.create(
+            college=other, source=self.source, rank=2, score=98.0, ranking_year=2025,
+        )
+        problems = dict(check_profiles())
+        self.assertTrue(problems[self.college.pk][0].startswith('stale dataset_version'))
+
+        call_command('check_profiles', fix=True, stdout=io.StringIO())
+        self.assertEqual(list(check_profiles()), [])
+
+    def test_profiles_from_an_older_dataset_version_are_not_served(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        url = reverse('analysis-analyze')
+        rebuild_profiles()
+        before = self.client.get(url, {'college_id': self.college.pk}).data
+
+        # Another college's ranking shifts MIT's percentile; MIT's profile is kept
+        # but its dataset version is no longer current
+        other = College.objects.create(name="Caltech", country="USA")
+        CollegeRanking.objects.create(
+            college=other, source=self.source, rank=2, score=98.0, ranking_year=2025,
+            research_impact=99,
+        )
+        after = self.client.get(url, {'college_id': self.college.pk}).data
+        self.assertNotEqual(after, before)
+        rebuild_profiles()
+        self.assertEqual(self.client.get(url, {'college_id': self.college.pk}).data, after)
+
+
+class ReadModelTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        the = RankingSource.objects.create(
+            name="THE", code="the", region="INTERNATIONAL", website_url="https://the.com"
+        )
+        usnews = RankingSource.objects.create(
+            name="US News", code="usnews", region="AMERICAN", website_url="https://usnews.com"
+        )
+        self.colleges = [
+            College.objects.create(name=f"University {i}", country="USA" if i % 2 else "UK")
+            for i in range(1, 8)
+        ]
+        for i, college in enumerate(self.colleges, start=1):
+            CollegeRanking.objects.create(
+                college=college, source=qs, rank=i, score=100 - i * 3, ranking_year=2025
+            )
+            if i % 3:
+                CollegeRanking.objects.create(
+                    college=college, source=the, rank=i, score=90 - i, ranking_year=2025
+                )
+            if i == 4:
+                CollegeRanking.objects.create(
+                    college=college, source=usnews, rank=1, score=None, ranking_year=2025
+                )
+
+    def test_matrix_composite_matches_orm(self):
+        matrix = load_matrix()
+        rows = average_composite(matrix, 'INTERNATIONAL')[:]
+        expected = list(composite_queryset('INTERNATIONAL'))
+        self.assertEqual([c.pk for c in rows], [c.pk for c in expected])
+        for row, college in zip(rows, expected):
+            self.assertAlmostEqual(row.avg_score, float(college.avg_score), places=6)
+            self.assertEqual(row.rankings_count, college.rankings_count)
+        # A ranking without a score counts, but gives no composite
+        self.assertEqual(len(average_composite(matrix, 'AMERICAN')), 0)
+
+    def test_college_positions(self):
+        matrix = load_matrix()
+        first, last = self.colleges[0].pk, self.colleges[-1].pk
+        self.assertEqual(
+            matrix.college_positions([last, first, 999999]).tolist(),
+            [len(self.colleges) - 1, 0, -1],
+        )
+
+    def test_composite_endpoint_is_served_from_matrix(self):
+        url = reverse('composite-ranking-international')
+        self.client.get(url)  # load the matrix
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'preset': 'slim'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(response.data['results'][0]['college']['id'], self.colleges[0].pk)
+
+    @override_settings(READ_MODEL_BACKGROUND_RELOAD=True)
+    def test_background_reload_serves_previous_matrix(self):
+        stale = readmodel.get_matrix()
+        College.objects.create(name="New University", country="USA")
+        with mock.patch.object(readmodel, '_reload_in_background') as reload:
+            self.assertIs(readmodel.get_matrix(), stale)
+            reload.assert_called_once()
+
+
+class CustomCompositeTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        self.url = reverse('composite-ranking-custom')
+        qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        the = RankingSource.objects.create(
+            name="THE", code="the", region="INTERNATIONAL", website_url="https://the.com"
+        )
+        self.a = College.objects.create(name="A", country="USA")
+        self.b = College.objects.create(name="B", country="USA")
+        self.c = College.objects.create(name="C", country="UK")
+        for college, source, score in [
+            (self.a, qs, 90), (self.a, the, 60),
+            (self.b, qs, 70), (self.b, the, 80),
+            (self.c, qs, 85),
+        ]:
+            CollegeRanking.objects.create(
+                college=college, source=source, rank=1, score=score, ranking_year=2025
+            )
+
+    def ids(self, response):
+        return [row['college']['id'] for row in response.data['results']]
+
+    def test_weights_change_the_order(self):
+        response = self.client.get(self.url, {'weights': 'qs:1,the:3'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # renormalize: C has only QS, so it keeps its QS score
+        self.assertEqual(self.ids(response), [self.c.pk, self.b.pk, self.a.pk])
+        self.assertEqual(response.data['weights'], {'qs': 0.25, 'the': 0.75})
+        self.assertEqual(response.data['results'][1]['composite_score'], 77.5)
+
+    def test_missing_data_policies(self):
+        zero = self.client.get(self.url, {'weights': 'qs:1,the:3', 'missing': 'zero'})
+        self.assertEqual(self.ids(zero), [self.b.pk, self.a.pk, self.c.pk])
+        self.assertEqual(zero.data['results'][2]['composite_score'], 21.25)
+
+        exclude = self.client.get(self.url, {'weights': 'qs:1,the:3', 'missing': 'exclude'})
+        self.assertEqual(self.ids(exclude), [self.b.pk, self.a.pk])
+        coverage = self.client.get(self.url, {'weights': 'qs,the', 'min_sources': 2})
+        self.assertEqual(coverage.data['count'], 2)
+
+    def test_equivalent_weights_share_cache_entry(self):
+        codes = ['qs', 'the']
+        spec = CompositeSpec.parse('qs:40,the:40', year=2025, source_codes=codes)
+        self.assertEqual(spec, CompositeSpec.parse('THE:1, qs:1', year=2025, source_codes=codes))
+
+        self.client.get(self.url, {'weights': 'qs:40,the:40'})
+        self.assertIsNotNone(cache.get(spec.cache_key(get_matrix().version)))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'weights': 'the:1,qs:1'})
+        self.assertEqual(response.data['count'], 3)
+
+    def test_invalid_weights(self):
+        for weights in ['', 'nope:1', 'qs:-1', 'qs:0', 'qs:abc']:
+            response = self.client.get(self.url, {'weights': weights})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, weights)
+
+    def test_partial_ordering_matches_full_sort(self):
+        rng = np.random.default_rng(1)
+        scores = rng.integers(0, 20, 500).astype(float)
+        ids = np.arange(1, 501)
+        rows = CompositeRows(ids, scores, np.ones(500, dtype=int))
+        expected = np.lexsort((ids, -scores))
+        self.assertEqual(rows.ordered(37).tolist(), expected[:37].tolist())
+        self.assertEqual(rows.ordered(500).tolist(), expected.tolist())
+
+
+class RankAggregationTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        self.url = reverse('composite-ranking-international')
+        sources = [
+            RankingSource.objects.create(
+                name=code.upper(), code=code, region="INTERNATIONAL",
+                website_url=f"https://{code}.com"
+            )
+            for code in ['qs', 'the', 'arwu']
+        ]
+        self.colleges = [College.objects.create(name=f"U{i}", country="USA") for i in range(4)]
+        # Ranks per source; U3 is only ranked by ARWU
+        table = {
+            'qs': [1, 2, 3, None],
+            'the': [2, 1, 3, None],
+            'arwu': [1, 3, 4, 2],
+        }
+        for source in sources:
+            for college, rank in zip(self.colleges, table[source.code]):
+                if rank is not None:
+                    CollegeRanking.objects.create(
+                        college=college, source=source, rank=rank,
+                        score=100 - rank, ranking_year=2025
+                    )
+
+    def ids(self, response):
+        return [row['college']['id'] for row in response.data['results']]
+
+    def test_aggregation_methods(self):
+        nan = np.nan
+        ranks = np.array([[1, 2, 1], [2, 1, 3], [3, 3, 4], [nan, nan, 2]])
+        order, values = aggregate(ranks, 'median')
+        self.assertEqual(order.tolist(), [0, 1, 3, 2])  # U1/U3 tie, by id
+        self.assertEqual(values.tolist(), [1, 2, 3, 2])
+        order, values = aggregate(ranks, 'borda')
+        self.assertEqual(order.tolist(), [0, 3, 1, 2])
+        self.assertAlmostEqual(values[3], 0.75)
+        order, _ = aggregate(ranks, 'geomean')
+        self.assertEqual(order[0], 0)
+        # Kemeny: two sources rank U1 and U2 but not U3, so U3 drops below them
+        order, values = aggregate(ranks, 'kemeny')
+        self.assertEqual(order.tolist(), [0, 1, 2, 3])
+        self.assertEqual(values.tolist(), [1, 2, 3, 4])
+
+    def test_kemeny_reaches_local_optimum(self):
+        rng = np.random.default_rng(3)
+        quality = rng.normal(size=300)
+        ranks = np.empty((300, 5))
+        for s in range(5):
+            ranks[np.argsort(-(quality + rng.normal(size=300))), s] = np.arange(1, 301)
+        order, _ = kemeny(ranks, initial=np.arange(300)[::-1])
+        self.assertFalse((adjacent_preferences(ranks, order[:-1], order[1:]) > 0).any())
+
+        with self.assertLogs('rankings.aggregation', 'WARNING'):
+            order, _ = kemeny(ranks, initial=np.arange(300)[::-1], max_passes=1)
+        self.assertTrue((adjacent_preferences(ranks, order[:-1], order[1:]) > 0).any())
+
+    def test_endpoint_serves_precomputed_aggregates(self):
+        live = self.client.get(self.url, {'method': 'median'})
+        self.assertEqual(live.status_code, status.HTTP_200_OK)
+
+        run_post_ingest(publish=False, log=lambda message: None)
+        self.assertEqual(AggregateRanking.objects.filter(method='kemeny').count(), 4)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'method': 'median', 'preset': 'slim'})
+        self.assertEqual(response.data['method'], 'median')
+        self.assertEqual(response.data['year'], 2025)
+        self.assertEqual(self.ids(response), self.ids(live))
+        self.assertEqual(
+            self.ids(response),
+            [self.colleges[i].pk for i in [0, 1, 3, 2]],
+        )
+        self.assertEqual(response.data['results'][1]['composite_score'], 2.0)
+
+    def test_unknown_method(self):
+        response = self.client.get(self.url, {'method': 'plurality'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class YearScopeAndMoversTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        self.qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.colleges = [College.objects.create(name=f"U{i}", country="USA") for i in range(4)]
+        ranks = {2024: [1, 2, 3, 4], 2025: [3, 1, 4, None]}
+        for year, year_ranks in ranks.items():
+            for college, rank in zip(self.colleges, year_ranks):
+                if rank is not None:
+                    CollegeRanking.objects.create(
+                        college=college, source=self.qs, rank=rank,
+                        score=100 - rank * 10, ranking_year=year,
+                    )
+
+    def test_composites_default_to_latest_year(self):
+        url = reverse('composite-ranking-international')
+        latest = self.client.get(url, {'preset': 'slim'})
+        self.assertEqual(latest.data['year'], 2025)
+        self.assertEqual(latest.data['count'], 3)
+        self.assertEqual(latest.data['results'][0]['college']['id'], self.colleges[1].pk)
+
+        earlier = self.client.get(url, {'preset': 'slim', 'year': 2024})
+        self.assertEqual(earlier.data['count'], 4)
+        self.assertEqual(earlier.data['results'][0]['composite_score'], 90.0)
+
+        self.assertEqual(self.colleges[0].composite_score_international, 70.0)
+        self.assertEqual(self.colleges[0].composite_score('INTERNATIONAL', 2024), 90.0)
+
+    def test_analysis_endpoints_accept_year(self):
+        url = reverse('college-rankings-breakdown', args=[self.colleges[0].pk])
+        latest = self.client.get(url)
+        self.assertEqual(latest.data['year'], 2025)
+        self.assertEqual(latest.data['all_rankings'][0]['rank'], 3)
+        earlier = self.client.get(url, {'year': 2024})
+        self.assertEqual(earlier.data['all_rankings'][0]['rank'], 1)
+        self.assertEqual(earlier.data['composite_scores']['international'], 90.0)
+
+        detail = self.client.get(
+            reverse('college-detail', args=[self.colleges[0].pk]), {'year': 2024}
+        )
+        self.assertEqual(detail.data['composite_score_international'], 90.0)
+        bad = self.client.get(url, {'year': 'last'})
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_movers_between_years(self):
+        url = reverse('movers-list')
+        response = self.client.get(url, {'source': 'qs'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['from_year'], response.data['to_year']), (2024, 2025))
+        self.assertEqual(response.data['ranked_both_years'], 3)
+        gainer = response.data['gainers'][0]
+        self.assertEqual(gainer['college']['id'], self.colleges[1].pk)
+        self.assertEqual((gainer['from_rank'], gainer['to_rank'], gainer['change']), (2, 1, 1))
+        self.assertEqual(
+            [m['college']['id'] for m in response.data['decliners']],
+            [self.colleges[0].pk, self.colleges[2].pk],
+        )
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, {'source': 'qs', 'limit': 1})
+        self.assertEqual(len(cached.data['decliners']), 1)
+
+        composite = self.client.get(url, {'source': 'composite-international'})
+        self.assertEqual(composite.data['gainers'][0]['college']['id'], self.colleges[1].pk)
+
+    def test_movers_validation(self):
+        url = reverse('movers-list')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        for params in [{'source': 'nope'}, {'source': 'qs', 'from_year': 2025}]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+        negative = self.client.get(url, {'source': 'qs', 'limit': -1})
+        self.assertEqual(len(negative.data['decliners']), 1)
+
+    def test_movers_skip_colleges_deleted_after_loading(self):
+        matrix = get_matrix()
+        self.colleges[0].delete()
+        data = get_movers(matrix, 'qs', 2024, 2025)
+        self.assertEqual(
+            [m['college']['id'] for m in data['decliners']], [self.colleges[2].pk]
+        )
+
+
+class PercentileAnalysisTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.addCleanup(reset_matrix)
+        source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.colleges = []
+        # Research is high for everyone, diversity low for everyone
+        for i in range(10):
+            college = College.objects.create(name=f"U{i}", country="USA")
+            CollegeRanking.objects.create(
+                college=college, source=source, rank=i + 1, score=90 - i, ranking_year=2025,
+                research_impact=90 - i, international_diversity=20 + i * 4,
+                teaching_quality=50,
+            )
+            self.colleges.append(college)
+
+    def test_strengths_are_judged_by_percentile(self):
+        url = reverse('analysis-analyze')
+        # U9: research 81 (lowest of all), diversity 56 (highest of all)
+        response = self.client.get(url, {'college_id': self.colleges[9].pk})
+        self.assertEqual(response.data['strengths'][0]['metric'], 'international_diversity')
+        self.assertEqual(response.data['strengths'][0]['percentile'], 95.0)
+        self.assertEqual(response.data['percentiles']['research_impact'], 5.0)
+        self.assertEqual(response.data['percentiles']['teaching_quality'], 50.0)
+        self.assertEqual(response.data['weaknesses'][-1]['metric'], 'research_impact')
+
+    def test_bulk_matches_single_analysis(self):
+        url = reverse('analysis-bulk')
+        ids = [c.pk for c in self.colleges[:5]] + [999999]
+        response = self.client.post(url, {'college_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['year'], 2025)
+        self.assertEqual(response.data['missing'], [999999])
+        self.assertEqual(len(response.data['results']), 5)
+
+        for college, result in zip(self.colleges, response.data['results']):
+            single = analyze_strengths(college, list(college.collegeranking_set.all()))
+            self.assertEqual(result['college']['id'], college.pk)
+            for key in ['strengths', 'weaknesses', 'all_metrics', 'percentiles']:
+                self.assertEqual(result[key], single[key], key)
+
+        get = self.client.get(url, {'college_ids': f'{ids[0]},{ids[1]}'})
+        self.assertEqual(len(get.data['results']), 2)
+
+    def test_bulk_validation(self):
+        url = reverse('analysis-bulk')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        too_many = ','.join(str(i) for i in range(1, 1002))
+        response = self.client.get(url, {'college_ids': too_many})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RankingCategoryDerivationTests(APITestCase):
+    def setUp(self):
+        self.source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.rankings = []
+        for i in range(10):
+            college = College.objects.create(name=f"U{i}", country="USA")
+            self.rankings.append(CollegeRanking.objects.create(
+                college=college, source=self.source, rank=i + 1, score=90 - i,
+                ranking_year=2025, research_impact=95 - i * 5,
+                academic_reputation=80, teaching_quality=60 + i,
+            ))
+
+    def derive(self):
+        return rebuild_categories(load_matrix())
+
+    def test_levels_follow_population_percentiles(self):
+        # RESEARCH, ACADEMIC and INTERNATIONAL for each of the 10 rankings
+        self.assertEqual(self.derive(), 30)
+        research = {
+            c.college_ranking_id: c for c in RankingCategory.objects.filter(category_type='RESEARCH')
+        }
+        self.assertEqual(research[self.rankings[0].pk].strength_level, 'EXCEPTIONAL')
+        self.assertEqual(research[self.rankings[3].pk].strength_level, 'STRONG')
+        self.assertEqual(research[self.rankings[9].pk].strength_level, 'WEAK')
+        self.assertEqual(float(research[self.rankings[0].pk].score), 95.0)
+        academic = RankingCategory.objects.get(
+            college_ranking=self.rankings[0], category_type='ACADEMIC'
+        )
+        self.assertEqual(float(academic.score), 70.0)  # mean of 80 and 60
+
+    def test_rederive_upserts_and_drops_stale(self):
+        self.derive()
+        CollegeRanking.objects.filter(pk=self.rankings[0].pk).update(research_impact=None)
+        self.assertEqual(self.derive(), 29)
+        self.assertEqual(RankingCategory.objects.count(), 29)
+
+    def test_categories_served_with_single_prefetch(self):
+        self.derive()
+        url = reverse('ranking-by-source')
+        with self.assertNumQueries(4):  # source, count, page, categories
+            response = self.client.get(url, {'source': 'qs'})
+        categories = response.data['results'][0]['categories']
+        self.assertEqual(
+            {c['category_type'] for c in categories}, {'ACADEMIC', 'RESEARCH', 'INTERNATIONAL'}
+        )
+        with self.assertNumQueries(3):
+            slim = self.client.get(url, {'source': 'qs', 'preset': 'slim'})
+        self.assertNotIn('categories', slim.data['results'][0])
+
+
+class StreamingExportTests(APITestCase):
+    def setUp(self):
+        self.qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.usnews = RankingSource.objects.create(
+            name="US News", code="usnews", region="AMERICAN", website_url="https://usnews.com"
+        )
+        self.colleges = [College.objects.create(name=f"U{i}", country="USA") for i in range(3)]
+        for i, college in enumerate(self.colleges):
+            CollegeRanking.objects.create(
+                college=college, source=self.qs, rank=i + 1, score=90 - i, ranking_year=2025
+            )
+            CollegeRanking.objects.create(
+                college=college, source=self.usnews, rank=i + 1, score=80 - i, ranking_year=2024
+            )
+
+    def export(self, **params):
+        response = self.client.get(reverse('export-rankings'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_streams_filtered_rows(self):
+        response, body = self.export(source='qs')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment; filename="rankings-', response['Content-Disposition'])
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['college_name'] for row in rows], ['U0', 'U1', 'U2'])
+        self.assertEqual({row['source_code'] for row in rows}, {'qs'})
+        self.assertEqual(rows[0]['score'], 90.0)
+
+        _, body = self.export(year=2024)
+        self.assertEqual(len(body.splitlines()), 3)
+
+    def test_csv_has_header_and_one_line_per_ranking(self):
+        response, body = self.export(fmt='csv', region='AMERICAN')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = body.splitlines()
+        self.assertEqual(lines[0].split(','), COLUMN_NAMES)
+        self.assertEqual(len(lines), 4)
+        self.assertIn('usnews', lines[1])
+
+    def test_bad_parameters_are_rejected_before_streaming(self):
+        url = reverse('export-rankings')
+        for params in ({'fmt': 'xml'}, {'source': 'nope'}, {'region': 'MARS'}, {'year': 'x'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('error', response.data)
+
+    def test_command_writes_file(self):
+        out_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out_dir)
+        call_command(
+            'export_rankings', format='ndjson', output=str(out_dir / 'rankings.ndjson'),
+            chunk_size=1, stdout=io.StringIO(),
+        )
+        lines = (out_dir / 'rankings.ndjson').read_text().splitlines()
+        self.assertEqual(len(lines), 6)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_columnar_formats_round_trip(self):
+        for fmt in ('arrow', 'parquet'):
+            response = self.client.get(reverse('export-rankings'), {'fmt': fmt, 'source': 'qs'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], EXPORT_FORMATS[fmt])
+            data = b''.join(response.streaming_content)
+            if fmt == 'arrow':
+                table = pyarrow.ipc.open_file(pyarrow.BufferReader(data)).read_all()
+            else:
+                table = pq.read_table(pyarrow.BufferReader(data))
+            self.assertEqual(table.column('college_name').to_pylist(), ['U0', 'U1', 'U2'])
+            self.assertEqual(table.schema.field('score').type, pyarrow.float64())
+            self.assertEqual(table.column('score').to_pylist(), [90.0, 89.0, 88.0])
+
+    def test_composites_table(self):
+        run_post_ingest(publish=False, log=lambda message: None)
+        response = self.client.get(
+            reverse('export-composites'), {'region': 'INTERNATIONAL', 'method': 'borda'}
+        )
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['position'] for row in rows], [1, 2, 3])
+        self.assertEqual(rows[0]['college_id'], self.colleges[0].pk)
+        self.assertIn('composites-', response['Content-Disposition'])
+
+        bad = self.client.get(reverse('export-composites'), {'method': 'vote'})
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        RankingSource.objects.create(
+            name="THE", code="the", region="INTERNATIONAL", website_url="https://the.com"
+        )
+        College.objects.create(name="Existing University", country="UK")
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+
+    def run_import(self, path, **options):
+        out = io.StringIO()
+        call_command('import_rankings', path, skip_publish=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_normalize_matches_scraper_rules(self):
+        self.assertEqual(normalize_score('87.5%'), 87.5)
+        self.assertEqual(normalize_score('120'), 100)
+        self.assertIsNone(normalize_score('n/a'))
+        self.assertEqual(normalize_rank('=12'), 12)
+        self.assertEqual(normalize_rank('501-600'), 501)
+        self.assertEqual(normalize_rank('1,234'), 1234)
+        self.assertEqual(normalize_rank('1,201-1,400'), 1201)
+        self.assertIsNone(normalize_rank('unranked'))
+
+    def test_excel_csv_with_aliases_and_invalid_rows(self):
+        path = self.write('qs.csv', (
+            '﻿Institution;Country;Rank;Overall Score;Academic Reputation\n'
+            'Existing University;UK;=3;91.234;99\n'
+            'New College;France;501-600;n/a;\n'
+            ';Nowhere;4;50;\n'
+            'Bad Rank College;Spain;-;50;\n'
+        ))
+        output = self.run_import(path, source='qs', year=2025, chunk_size=2)
+        self.assertIn('Row 3: college_name is required', output)
+        self.assertIn('Row 4: Invalid rank', output)
+
+        rankings = CollegeRanking.objects.order_by('rank')
+        self.assertEqual(
+            [(r.college.name, r.rank) for r in rankings],
+            [('Existing University', 3), ('New College', 501)],
+        )
+        self.assertEqual(str(rankings[0].overall_score), '91.23')
+        self.assertEqual(str(rankings[0].academic_reputation), '99.00')
+        self.assertIsNone(rankings[1].overall_score)
+        self.assertEqual(College.objects.get(name='New College').country, 'France')
+        self.assertFalse(Path(f'{path}.checkpoint.json').exists())
+
+    def test_values_that_do_not_fit_their_columns_are_row_errors(self):
+        path = self.write('rankings.ndjson', '\n'.join(json.dumps(record) for record in [
+            {"college": "A", "source": "qs", "year": 2025, "rank": 1, "country": "x" * 101},
+            {"college": "B", "source": "qs", "year": 2025, "rank": 2, "city": "x" * 101},
+            {"college": "C", "source": "qs", "year": 2025, "rank": 3,
+             "data_source_url": "https://qs.com/" + "x" * 200},
+            {"college": "D", "source": "qs", "year": 2025, "rank": "9" * 12},
+            {"college": "E", "source": "qs", "year": 2025, "rank": 5},
+        ]))
+        output = self.run_import(path)
+        self.assertIn('Row 1: country is longer than 100 characters', output)
+        self.assertIn('Row 2: city is longer than 100 characters', output)
+        self.assertIn('Row 3: data_source_url is longer than 200 characters', output)
+        self.assertIn('Row 4: rank 999999999999 is out of range', output)
+        self.assertEqual(list(CollegeRanking.objects.values_list('college__name', flat=True)), ['E'])
+
+    def test_ndjson_upserts_are_idempotent(self):
+        path = self.write('rankings.ndjson', (
+            '{"college": "A", "source": "qs", "year": 2025, "rank": 1, "score": 90}\n'
+            'not json\n'
+            '{"college": "A", "source": "the", "year": 2025, "rank": 2}\n'
+            '{"college": "B", "source": "nope", "year": 2025, "rank": 3}\n'
+        ))
+        output = self.run_import(path)
+        self.assertIn('Row 2: not a JSON object', output)
+        self.assertIn("Row 4: Unknown source 'nope'", output)
+        self.assertEqual(CollegeRanking.objects.count(), 2)
+
+        path = self.write('update.ndjson', (
+            '{"college": "A", "source": "qs", "year": 2025, "rank": 5, "score": 80}\n'
+        ))
+        self.run_import(path)
+        self.assertEqual(CollegeRanking.objects.count(), 2)
+        self.assertEqual(CollegeRanking.objects.get(source__code='qs').rank, 5)
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write('qs.csv', 'name,rank\nFirst,1\nSecond,2\nThird,3\n')
+        # An earlier run committed two rows into its staging version, then died
+        version = create_staging_version('interrupted')
+        import_records(list(read_csv(path))[:2], source='qs', year=2025, version=version)
+        write_checkpoint(f'{path}.checkpoint.json', path, 2, version.pk)
+        self.assertEqual(CollegeRanking.objects.count(), 0)
+
+        output = self.run_import(path, source='qs', year=2025)
+        self.assertIn(f'Resuming after row 2 into v{version.pk}', output)
+        self.assertIn('Imported 1 rankings from 1 rows', output)
+        self.assertEqual(
+            sorted(CollegeRanking.objects.values_list('college__name', flat=True)),
+            ['First', 'Second', 'Third'],
+        )
+
+
+class DatasetVersionTests(APITestCase):
+    def setUp(self):
+        self.qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        self.the = RankingSource.objects.create(
+            name="THE", code="the", region="INTERNATIONAL", website_url="https://the.com"
+        )
+        self.college = College.objects.create(name="A", country="USA")
+        for source, rank in ((self.qs, 1), (self.the, 2)):
+            ranking = CollegeRanking.objects.create(
+                college=self.college, source=source, rank=rank, score=90, ranking_year=2025,
+                research_impact=80,
+            )
+        RankingCategory.objects.create(
+            college_ranking=ranking, category_type='RESEARCH', strength_level='STRONG'
+        )
+
+    def ranks(self):
+        return dict(CollegeRanking.objects.values_list('source__code', 'rank'))
+
+    def test_staged_writes_are_invisible_until_activation(self):
+        original = active_version_id()
+        version = create_staging_version('test')
+        self.assertEqual(version.rankings_count, 2)
+        CollegeRanking.all_versions.filter(version=version, source=self.qs).update(rank=7)
+        self.assertEqual(self.ranks(), {'qs': 1, 'the': 2})
+        url = reverse('college-detail', args=[self.college.pk])
+        self.assertEqual(len(self.client.get(url).data['rankings']), 2)
+
+        self.assertEqual(activate_version(version), original)
+        self.assertEqual(active_version_id(), version.pk)
+        self.assertEqual(self.ranks(), {'qs': 7, 'the': 2})
+        # Categories are derived into the staged version; the previous one keeps its own
+        self.assertEqual(
+            CollegeRanking.objects.get(source=self.qs).categories.get().strength_level, 'AVERAGE'
+        )
+        self.assertEqual(
+            CollegeRanking.all_versions.get(version_id=original, source=self.the)
+            .categories.get().strength_level,
+            'STRONG',
+        )
+        self.assertEqual(CollegeRanking.all_versions.filter(version_id=original).count(), 2)
+
+        self.assertEqual(rollback_version().pk, original)
+        self.assertEqual(self.ranks(), {'qs': 1, 'the': 2})
+
+    def test_validation_blocks_versions_that_lose_data(self):
+        original = active_version_id()
+        with self.assertRaises(DatasetValidationError) as raised:
+            with staged_version('drop the') as version:
+                CollegeRanking.all_versions.filter(version=version, source=self.the).delete()
+        self.assertIn('sources missing from version: the', str(raised.exception))
+        self.assertEqual(DatasetVersion.objects.get(pk=version.pk).status, 'FAILED')
+        self.assertEqual(active_version_id(), original)
+        self.assertEqual(self.ranks(), {'qs': 1, 'the': 2})
+
+        with self.assertRaises(DatasetValidationError):
+            with staged_version('empty', clone=False, force=True):
+                pass
+        with self.assertRaises(RuntimeError):
+            with staged_version('crash') as version:
+                raise RuntimeError
+        self.assertFalse(DatasetVersion.objects.filter(pk=version.pk).exists())
+        self.assertEqual(active_version_id(), original)
+
+    def test_prune_keeps_recent_and_active_versions(self):
+        for i in range(4):
+            activate_version(create_staging_version(f'v{i}'))
+        active = active_version_id()
+        self.assertEqual(prune_versions(keep=2), 3)
+        self.assertEqual(
+            list(DatasetVersion.objects.values_list('pk', flat=True)), [active, active - 1]
+        )
+        self.assertEqual(CollegeRanking.all_versions.count(), 4)
+        self.assertEqual(self.ranks(), {'qs': 1, 'the': 2})
+
+    def test_ingests_prune_and_can_skip_activation(self):
+        for i in range(5):
+            with staged_version(f'v{i}'):
+                pass
+        self.assertEqual(DatasetVersion.objects.count(), KEEP_VERSIONS)
+        active = active_version_id()
+        with staged_version('nothing new') as version:
+            raise NothingStaged
+        self.assertFalse(DatasetVersion.objects.filter(pk=version.pk).exists())
+        self.assertEqual(active_version_id(), active)
+
+    def test_reseeding_without_new_rankings_keeps_the_active_version(self):
+        call_command('seed_demo_data', skip_publish=True, stdout=io.StringIO())
+        active = active_version_id()
+        rankings = CollegeRanking.all_versions.count()
+        out = io.StringIO()
+        call_command('seed_demo_data', skip_publish=True, stdout=out)
+        self.assertIn(f'dataset v{active} unchanged', out.getvalue())
+        self.assertEqual(active_version_id(), active)
+        self.assertEqual(CollegeRanking.all_versions.count(), rankings)
+
+    def test_overlapping_ingests_cannot_overwrite_each_other(self):
+        first = create_staging_version('cron fetch')
+        second = create_staging_version('import')
+        CollegeRanking.all_versions.filter(version=first, source=self.qs).update(rank=5)
+        CollegeRanking.all_versions.filter(version=second, source=self.the).update(rank=6)
+
+        activate_version(first)
+        with self.assertRaises(DatasetValidationError) as raised:
+            activate_version(second, force=True)
+        self.assertIn(f'v{active_version_id()} has been activated since', str(raised.exception))
+        self.assertEqual(DatasetVersion.objects.get(pk=second.pk).status, 'FAILED')
+        self.assertEqual(self.ranks(), {'qs': 5, 'the': 2})
+
+    def test_prune_removes_abandoned_staging_versions(self):
+        abandoned = create_staging_version('killed import')
+        DatasetVersion.objects.filter(pk=abandoned.pk).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        running = create_staging_version('running import')
+        out = io.StringIO()
+        call_command('dataset_versions', 'list', stdout=out)
+        self.assertIn(f'dataset_versions discard {abandoned.pk}', out.getvalue())
+
+        self.assertEqual(prune_versions(), 1)
+        self.assertFalse(DatasetVersion.objects.filter(pk=abandoned.pk).exists())
+        self.assertTrue(DatasetVersion.objects.filter(pk=running.pk).exists())
+        self.assertEqual(CollegeRanking.all_versions.filter(version_id=abandoned.pk).count(), 0)
+
+
+@override_settings(READ_REPLICA_ALIAS='default', READ_YOUR_WRITES_SECONDS=5)
+class DatabaseRoutingTests(TestCase):
+    """The replica alias points at ``default`` here: a routed read returns it, the primary ``None``"""
+
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def tearDown(self):
+        routers._down_until.clear()
+
+    def test_reads_use_the_replica_in_safe_requests_until_they_write(self):
+        self.assertIsNone(self.router.db_for_read(College))
+        with routed_reads(replica=False):
+            self.assertIsNone(self.router.db_for_read(College))
+        with routed_reads() as state:
+            self.assertEqual(self.router.db_for_read(College), 'default')
+            self.assertEqual(self.router.db_for_write(College), 'default')
+            self.assertTrue(state.wrote)
+            self.assertIsNone(self.router.db_for_read(College))
+        with override_settings(READ_REPLICA_ALIAS='replica'), routed_reads():
+            self.assertIsNone(self.router.db_for_read(College))
+        with override_settings(READ_REPLICA_APP_LABELS=['rankings']), routed_reads():
+            self.assertEqual(self.router.db_for_read(College), 'default')
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_clients_that_wrote_stay_on_the_primary(self):
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(College))
+            if request.method == 'POST':
+                College.objects.create(name='Written', country='USA')
+            return HttpResponse()
+
+        middleware = ReadReplicaMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.get('/api/colleges/'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+        response = middleware(factory.post('/admin/rankings/college/add/'))
+        self.assertEqual(response.cookies[PRIMARY_COOKIE]['max-age'], 5)
+
+        request = factory.get('/api/colleges/')
+        request.COOKIES[PRIMARY_COOKIE] = '1'
+        middleware(request)
+        self.assertEqual(reads, ['default', None, None])
+
+    def test_falls_back_to_the_primary_while_the_replica_is_down(self):
+        replica = connections['default']
+        with routed_reads():
+            with mock.patch.object(replica, 'ensure_connection', side_effect=OperationalError):
+                self.assertIsNone(self.router.db_for_read(College))
+            # Not retried until REPLICA_RETRY_SECONDS have passed
+            self.assertIsNone(self.router.db_for_read(College))
+            with mock.patch('rankings.routers.time.monotonic', return_value=time.monotonic() + 60):
+                self.assertEqual(self.router.db_for_read(College), 'default')
+
+
+class SqliteSnapshotTests(TestCase):
+    def test_snapshot_holds_the_active_version_read_only(self):
+        source = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        college = College.objects.create(name="A", country="USA")
+        CollegeRanking.objects.create(
+            college=college, source=source, rank=3, score=88.5, ranking_year=2025
+        )
+        staging = create_staging_version('unpublished')
+        CollegeRanking.all_versions.filter(version=staging).update(rank=9)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'rankings.sqlite3'
+            snapshot = build_sqlite_snapshot(path)
+            self.assertEqual(snapshot['tables']['rankings_collegeranking'], 1)
+            self.assertEqual(snapshot['tables']['rankings_datasetversion'], 1)
+            self.assertEqual(list(Path(directory).iterdir()), [path])
+
+            db = sqlite3.connect(f'file:{path}?mode=ro&immutable=1', uri=True)
+            try:
+                self.assertEqual(
+                    db.execute(
+                        'SELECT version_id, rank, score FROM rankings_collegeranking'
+                    ).fetchall(),
+                    [(active_version_id(), 3, 88.5)],
+                )
+                self.assertEqual(db.execute('PRAGMA journal_mode').fetchone(), ('delete',))
+                with self.assertRaises(sqlite3.OperationalError):
+                    db.execute("UPDATE rankings_college SET name = 'B'")
+            finally:
+                db.close()
+
+
+class StartupTests(TestCase):
+    def test_warm_up_serves_the_warm_up_paths(self):
+        RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        # As the test client does: keep the test transaction's connection open
+        request_finished.disconnect(close_old_connections)
+        try:
+            results = warm_up()
+        finally:
+            request_finished.connect(close_old_connections)
+        self.assertEqual([(path, status) for path, status, _ in results],
+                         [(path, 200) for path in WARM_UP_PATHS])
+
+        self.assertIn('source_bitmaps', get_matrix().derived)
+
+    def test_importtime_is_attributed_to_phases(self):
+        imports = parse_importtime('\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 | site',
+            f'{PHASE_MARKER}GET /api/sources/',
+            'import time:       300 |        300 |   numpy.core',
+            'import time:       100 |        400 | numpy',
+            'unrelated log line',
+        ]))
+        self.assertEqual(imports, {
+            'interpreter': [('site', 120, 120, 0)],
+            'GET /api/sources/': [('numpy.core', 300, 300, 1), ('numpy', 100, 400, 0)],
+        })
+        self.assertEqual(package_totals(imports['GET /api/sources/']), {'numpy': (2, 400)})
+
+    def test_scraper_dependencies_load_on_first_use(self):
+        code = (
+            'import sys, scrapers.normalize; print("requests" in sys.modules); '
+            'from scrapers import QSScraper; print("requests" in sys.modules)'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        ).stdout.split()
+        self.assertEqual(output, ['False', 'True'])
+
+
+class CacheStampedeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_metrics()
+
+    def test_concurrent_cold_requests_compute_once(self):
+        calls = []
+        start = threading.Barrier(100)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        results = []
+
+        def request():
+            start.wait()
+            results.append(cached('stampede', compute, 60, beta=0))
+
+        threads = [threading.Thread(target=request) for _ in range(100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [42] * 100)
+        metrics = cache_metrics()
+        self.assertEqual(metrics['computations'], 1)
+        self.assertEqual(metrics['misses'] + metrics['hits'], 100)
+        self.assertEqual(metrics['coalesced_waits'], metrics['misses'] - 1)
+
+    def test_expired_value_is_served_while_refreshing(self):
+        values = iter(['old', 'new'])
+        self.assertEqual(cached('swr', lambda: next(values), 60, beta=0), 'old')
+        with mock.patch('rankings.caching.time.time', return_value=time.time() + 61), \
+                mock.patch('rankings.caching.threading.Thread') as thread:
+            self.assertEqual(cached('swr', lambda: next(values), 60, beta=0), 'old')
+            thread.call_args.kwargs['target']()
+        self.assertEqual(cached('swr', lambda: 'unused', 60, beta=0), 'new')
+        metrics = cache_metrics()
+        self.assertEqual((metrics['stale_hits'], metrics['computations']), (1, 2))
+
+    def test_early_refresh_grows_near_expiry(self):
+        with mock.patch('rankings.caching.random.random', return_value=0.5):
+            # -log(0.5) * 1s of compute time ~ 0.69s ahead of expiry
+            self.assertFalse(refresh_early(100.0, 1.0, now=99.0))
+            self.assertTrue(refresh_early(100.0, 1.0, now=99.5))
+            self.assertFalse(refresh_early(100.0, 1.0, beta=0.5, now=99.5))
+
+    def test_failed_computation_is_not_cached(self):
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            cached('failing', fail, 60)
+        self.assertEqual(cached('failing', lambda: 'ok', 60), 'ok')
+        self.assertEqual(cache_metrics()['errors'], 1)
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache.set(VERSION_KEY, 'v1')
+        cache.reset_metrics()
+
+    def test_local_tier_answers_repeated_reads(self):
+        cache.set('hot', {'page': 1})
+        caches['shared'].delete('hot')
+        self.assertEqual(cache.get('hot'), {'page': 1})
+
+        caches['shared'].set('warm', [1, 2])
+        self.assertEqual(cache.get('warm'), [1, 2])
+        caches['shared'].delete('warm')
+        self.assertEqual(cache.get('warm'), [1, 2])
+        self.assertIsNone(cache.get('missing'))
+
+        metrics = cache.metrics()
+        self.assertEqual((metrics['local_hits'], metrics['shared_hits']), (2, 1))
+        self.assertEqual(metrics['shared_misses'], 1)
+        self.assertEqual(metrics['entries'], 2)
+        self.assertGreater(metrics['bytes'], 0)
+        self.assertAlmostEqual(metrics['local_hit_ratio'], 0.5)
+
+    def test_dataset_version_change_invalidates_local_tier(self):
+        cache.set('hot', 'old')
+        # Another worker ingests: only the shared cache sees it
+        caches['shared'].set(VERSION_KEY, 'v2')
+        caches['shared'].set('hot', 'new')
+        self.assertEqual(cache.get('hot'), 'old')
+        with mock.patch('rankings.cache_backends.time.monotonic', return_value=time.monotonic() + 2):
+            self.assertEqual(cache.get('hot'), 'new')
+        self.assertEqual(cache.metrics()['invalidations'], 1)
+
+        # Without a known version the local tier is bypassed
+        cache.delete(VERSION_KEY)
+        caches['shared'].set('hot', 'newer')
+        self.assertEqual(cache.get('hot'), 'newer')
+
+    def test_lru_is_bounded_by_entries_and_bytes(self):
+        tier = _LocalTier(max_entries=2, max_bytes=100)
+        tier.set('a', b'x' * 10, 60, 'v1')
+        tier.set('b', b'x' * 10, 60, 'v1')
+        tier.get('a', 'v1')
+        tier.set('c', b'x' * 10, 60, 'v1')
+        self.assertEqual(list(tier.entries), ['a', 'c'])
+        tier.set('d', b'x' * 95, 60, 'v1')
+        self.assertEqual(list(tier.entries), ['d'])
+        tier.set('e', b'x' * 101, 60, 'v1')
+        self.assertEqual((list(tier.entries), tier.bytes, tier.counts['evictions']), (['d'], 95, 3))
+        self.assertIsNone(tier.get('d', 'v2'))
+
+
+class PaginationCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(25):
+            College.objects.create(name=f"College {i:02d}", country="USA", city="Boston")
+
+    def test_counts_are_cached_per_filter_and_dataset_version(self):
+        url = reverse('college-search')
+        get_dataset_version()
+        with self.assertNumQueries(2):
+            first = self.client.get(url, {'q': 'College'})
+        with self.assertNumQueries(1):
+            repeat = self.client.get(url, {'q': 'College', 'page': 2})
+        self.assertEqual((first.data['count'], repeat.data['count']), (25, 25))
+        self.assertTrue(first.data['count_exact'])
+        self.assertEqual(len(repeat.data['results']), 5)
+        self.assertEqual(self.client.get(url, {'q': 'College 1'}).data['count'], 10)
+
+        College.objects.create(name="College 99", country="USA", city="Boston")
+        self.assertEqual(self.client.get(url, {'q': 'College'}).data['count'], 26)
+
+    def test_estimated_count_is_flagged_and_corrected_past_its_end(self):
+        url = reverse('college-list')
+        with mock.patch('rankings.pagination.estimated_count', return_value=2_000_000):
+            response = self.client.get(url)
+        self.assertEqual((response.data['count'], response.data['count_exact']), (2_000_000, False))
+
+        # A stale estimate below the real count must not hide the last pages
+        with mock.patch('rankings.pagination.estimated_count', return_value=10), \
+                self.settings(PAGINATION_ESTIMATE_MIN_ROWS=10):
+            response = self.client.get(url, {'page': 2})
+        self.assertEqual((response.data['count'], response.data['count_exact']), (25, True))
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_estimates_only_apply_to_unfiltered_querysets(self):
+        # Unversioned tables are only estimated on PostgreSQL
+        self.assertIsNone(estimated_count(College.objects.all()))
+
+        # Rankings: the active version's count, not every retained version's rows
+        DatasetVersion.objects.filter(pk=active_version_id()).update(rankings_count=1_500_000)
+        DatasetVersion.objects.create(label='older', status='VALIDATED', rankings_count=9)
+        rankings = CollegeRanking.objects.select_related('college', 'source').order_by('rank')
+        self.assertEqual(estimated_count(rankings), 1_500_000)
+        with self.assertNumQueries(0):
+            self.assertEqual(estimated_count(rankings), 1_500_000)
+        self.assertIsNone(estimated_count(rankings.filter(source__code='qs')))
+        response = self.client.get(reverse('ranking-list'))
+        self.assertEqual((response.data['count'], response.data['count_exact']), (1_500_000, False))
+
+
+class SourceBitmapTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        self.sources = {
+            code: RankingSource.objects.create(
+                name=code.upper(), code=code, region=region, website_url=f"https://{code}.com"
+            )
+            for code, region in [('qs', 'INTERNATIONAL'), ('arwu', 'INTERNATIONAL'),
+                                 ('usnews', 'AMERICAN')]
+        }
+        self.colleges = {}
+        memberships = {
+            'Alpha University': {'qs': 2025, 'usnews': 2025},
+            'Beta College': {'qs': 2025, 'usnews': 2024, 'arwu': 2025},
+            'Gamma Institute': {'qs': 2024},
+            'Delta University': {'arwu': 2025},
+        }
+        for rank, (name, sources) in enumerate(memberships.items(), start=1):
+            college = self.colleges[name] = College.objects.create(name=name, country="USA")
+            for code, year in sources.items():
+                CollegeRanking.objects.create(
+                    college=college, source=self.sources[code], rank=rank, ranking_year=year
+                )
+
+    def _names(self, **params):
+        response = self.client.get(reverse('college-search'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [row['name'] for row in response.data['results']]
+
+    def test_parse_source_expression(self):
+        self.assertEqual(
+            parse_source_expression('qs & usnews | !arwu'),
+            ('or', ('and', ('source', 'qs'), ('source', 'usnews')), ('not', ('source', 'arwu'))),
+        )
+        self.assertEqual(
+            parse_source_expression('qs and not (arwu or the)'),
+            parse_source_expression('qs & !(arwu | the)'),
+        )
+        for bad in ['', 'qs &', '(qs | arwu', 'qs arwu', 'qs $ arwu', '!']:
+            with self.assertRaises(ValueError, msg=bad):
+                parse_source_expression(bad)
+
+    def test_deeply_nested_expressions_are_rejected(self):
+        self.assertEqual(parse_source_expression('(' * 31 + '!qs' + ')' * 31)[0], 'not')
+        url = reverse('college-search')
+        for source in ['(' * 40 + 'qs' + ')' * 40, '!' * 40 + 'qs',
+                       '(' * 600 + 'qs' + ')' * 600, '!' * 2000 + 'qs', ' & '.join(['qs'] * 2000)]:
+            response = self.client.get(url, {'source': source})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertRegex(response.data['error'], 'nested deeper|longer than')
+
+    def test_search_by_source_expression(self):
+        self.assertEqual(self._names(source='qs'), ['Alpha University', 'Beta College', 'Gamma Institute'])
+        self.assertEqual(self._names(source='qs&usnews&!arwu'), ['Alpha University'])
+        self.assertEqual(self._names(source='(qs | arwu) and not usnews'),
+                         ['Delta University', 'Gamma Institute'])
+        self.assertEqual(self._names(source='qs & usnews', year=2025), ['Alpha University'])
+        self.assertEqual(self._names(source='qs', q='a', country='usa'),
+                         ['Alpha University', 'Beta College', 'Gamma Institute'])
+        self.assertEqual(self._names(source='!qs', q='Delta'), ['Delta University'])
+
+        response = self.client.get(reverse('college-search'), {'source': 'qs & unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Unknown source: unknown', response.data['error'])
+
+    def test_bitsets_pack_membership_per_source_and_year(self):
+        matrix = get_matrix()
+        bitmaps = source_bitmaps(matrix)
+        self.assertIs(source_bitmaps(matrix), bitmaps)
+        positions = matrix.college_positions([self.colleges['Alpha University'].pk,
+                                              self.colleges['Beta College'].pk])
+        self.assertEqual(bitmaps.positions(bitmaps.members('usnews')).tolist(), sorted(positions))
+        self.assertEqual(bitmaps.count(bitmaps.members('usnews', 2025)), 1)
+        self.assertEqual(bitmaps.count(bitmaps.evaluate('!qs')), 1)
+        self.assertEqual(bitmaps.count(bitmaps.members('qs', 1999)), 0)
+
+
+class FacetedFilterTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        usnews = RankingSource.objects.create(
+            name="US News", code="usnews", region="AMERICAN", website_url="https://usnews.com"
+        )
+        rows = [
+            # name, country, city, qs rank, research_impact, usnews rank
+            ("MIT", "USA", "Cambridge", 1, 95, 2),
+            ("Harvard", "USA", "Cambridge", 5, 90, 1),
+            ("Stanford", "USA", "Stanford", 150, 85, None),
+            ("Oxford", "UK", "Oxford", 3, 88, None),
+            ("Toronto", "Canada", "Toronto", 20, 70, None),
+        ]
+        for name, country, city, qs_rank, research, usnews_rank in rows:
+            college = College.objects.create(name=name, country=country, city=city)
+            CollegeRanking.objects.create(
+                college=college, source=qs, rank=qs_rank, score=100 - qs_rank / 2,
+                research_impact=research, ranking_year=2025,
+            )
+            CollegeRanking.objects.create(
+                college=college, source=qs, rank=qs_rank + 1, score=50,
+                research_impact=10, ranking_year=2024,
+            )
+            if usnews_rank:
+                CollegeRanking.objects.create(
+                    college=college, source=usnews, rank=usnews_rank, score=90, ranking_year=2025,
+                )
+
+    def _get(self, **params):
+        return self.client.get(reverse('college-faceted'), params)
+
+    def test_filters_combine_over_ranks_metrics_and_geography(self):
+        response = self._get(**{'rank.qs': '..100', 'research_impact': '88..', 'country': 'usa'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([row['name'] for row in response.data['results']], ['Harvard', 'MIT'])
+        self.assertEqual((response.data['count'], response.data['year']), (2, 2025))
+
+        response = self._get(**{'composite.international': '97..', 'sort': '-research_impact'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['MIT', 'Harvard', 'Oxford'])
+
+        response = self._get(**{'rank.qs': '5..', 'year': '2024', 'sort': 'rank.qs'})
+        self.assertEqual([row['name'] for row in response.data['results']],
+                         ['Harvard', 'Toronto', 'Stanford'])
+
+    def test_facet_counts_ignore_their_own_filter(self):
+        response = self._get(**{'research_impact': '80..', 'country': 'USA'})
+        facets = response.data['facets']
+        self.assertEqual(facets['country'], [{'value': 'USA', 'count': 3}, {'value': 'UK', 'count': 1}])
+        self.assertEqual(facets['city'], [{'value': 'Cambridge', 'count': 2},
+                                          {'value': 'Stanford', 'count': 1}])
+        self.assertEqual(facets['source'], [{'value': 'usnews', 'count': 2}, {'value': 'qs', 'count': 3}])
+
+        response = self._get(city='Cambridge,Oxford', facet_limit='1')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['facets']['country'], [{'value': 'USA', 'count': 2}])
+
+    def test_malformed_filters_are_rejected(self):
+        for params in [{'rank.unknown': '..10'}, {'research_impact': 'high'},
+                       {'sort': 'popularity'}, {'facet_limit': 'all'}]:
+            response = self._get(**params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_years_without_data_are_rejected_before_indexing(self):
+        for year in range(1990, 2000):
+            response = self._get(year=str(year))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, year)
+        self.assertNotIn('facet_index', get_matrix().derived)
+
+    def test_per_year_indexes_are_bounded(self):
+        matrix = get_matrix()
+        for year in [2024, 2025, None, 1999, 2000, 2025]:
+            facet_index(matrix, year)
+        memo = matrix.derived['facet_index']
+        self.assertEqual(len(memo), len(matrix.years) + 1)
+        self.assertEqual(list(memo)[-1], 2025)
+        self.assertIs(facet_index(matrix, 2025), memo[2025])
+
+
+class SimilarCollegesTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        qs = RankingSource.objects.create(
+            name="QS", code="qs", region="INTERNATIONAL", website_url="https://qs.com"
+        )
+        the = RankingSource.objects.create(
+            name="THE", code="the", region="INTERNATIONAL", website_url="https://the.com"
+        )
+        usnews = RankingSource.objects.create(
+            name="US News", code="usnews", region="AMERICAN", website_url="https://usnews.com"
+        )
+        profiles = [
+            # name, country, qs rank/score, the rank/score, usnews rank, research_impact
+            ("MIT", "USA", (1, 99), (2, 97), 1, 98),
+            ("Stanford", "USA", (3, 96), (1, 98), 2, 96),
+            ("Oxford", "UK", (2, 97), (3, 95), None, 95),
+            ("Toronto", "Canada", (40, 70), (None, None), None, 60),
+            ("Sydney", "Australia", (45, 68), (50, 65), None, 55),
+            ("Ohio State", "USA", (90, 55), (95, 50), 40, 45),
+        ]
+        self.colleges = {}
+        for name, country, (qs_rank, qs_score), (the_rank, the_score), us_rank, research in profiles:
+            college = self.colleges[name] = College.objects.create(name=name, country=country)
+            CollegeRanking.objects.create(
+                college=college, source=qs, rank=qs_rank, score=qs_score,
+                research_impact=research, ranking_year=2025,
+            )
+            if the_rank:
+                CollegeRanking.objects.create(
+                    college=college, source=the, rank=the_rank, score=the_score, ranking_year=2025,
+                )
+            if us_rank:
+                CollegeRanking.objects.create(
+                    college=college, source=usnews, rank=us_rank, score=100 - us_rank,
+                    ranking_year=2025,
+                )
+
+    def _similar(self, name, **params):
+        url = reverse('college-similar', args=[self.colleges[name].pk])
+        return self.client.get(url, params)
+
+    def test_nearest_profiles_come_first(self):
+        response = self._similar('MIT', limit=3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [row['college']['name'] for row in response.data['results']]
+        self.assertEqual(names[:2], ['Stanford', 'Oxford'])
+        similarities = [row['similarity'] for row in response.data['results']]
+        self.assertEqual(similarities, sorted(similarities, reverse=True))
+        self.assertEqual(response.data['results'][0]['region'], 'INTERNATIONAL')
+
+        # Missing THE ranking: still indexed, closest to the other mid-table college
+        names = [row['college']['name'] for row in self._similar('Toronto').data['results']]
+        self.assertEqual(names[0], 'Sydney')
+        self.assertNotIn('Toronto', names)
+
+    def test_region_and_country_filters(self):
+        names = [row['college']['name'] for row in
+                 self._similar('Oxford', region='american').data['results']]
+        self.assertEqual((set(names[:2]), names[2:]), ({'MIT', 'Stanford'}, ['Ohio State']))
+        names = [row['college']['name'] for row in
+                 self._similar('MIT', country='UK,Canada').data['results']]
+        self.assertEqual(names, ['Oxford', 'Toronto'])
+
+        self.assertEqual(self._similar('MIT', region='mars').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        missing = self.client.get(reverse('college-similar', args=[999999]))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_blocked_scan_matches_a_single_block(self):
+        index = SimilarityIndex(get_matrix(), 2025)
+        for position in range(len(index.college_ids)):
+            expected = index.neighbours(position, 4)
+            with mock.patch('rankings.similarity.BLOCK_ROWS', 2):
+                blocked = index.neighbours(position, 4)
+            self.assertEqual(blocked[0].tolist(), expected[0].tolist())
+            for got, want in zip(blocked[1].tolist(), expected[1].tolist()):
+                self.assertAlmostEqual(got, want, places=5)
+
+    def test_years_without_data_are_not_indexed(self):
+        for year in range(1990, 2000):
+            response = self._similar('MIT', year=str(year))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, year)
+        url = reverse('college-detail', args=[self.colleges['MIT'].pk])
+        response = self.client.get(url, {'include': 'similar', 'year': '1999'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['similar'], [])
+        self.assertNotIn('similarity_index', get_matrix().derived)
+
+        self.assertEqual(self._similar('MIT', year='2025').status_code, status.HTTP_200_OK)
+        self.assertEqual(list(get_matrix().derived['similarity_index']), [2025])
+
+
+class SourceAgreementTests(APITestCase):
+    def setUp(self):
+        reset_matrix()
+        sources = {
+            code: RankingSource.objects.create(
+                name=code.upper(), code=code, region="INTERNATIONAL",
+                website_url=f"https://{code}.com",
+            )
+            for code in ("qs", "the", "arwu")
+        }
+        # THE agrees with QS, ARWU reverses it; E is ranked by QS only
+        ranks = {
+            "A": {"qs": 1, "the": 1, "arwu": 4},
+            "B": {"qs": 2, "the": 2, "arwu": 3},
+            "C": {"qs": 3, "the": 3, "arwu": 2},
+            "D": {"qs": 4, "the": 4, "arwu": 1},
+            "E": {"qs": 5},
+        }
+        self.colleges = {}
+        for name, by_source in ranks.items():
+            college = self.colleges[name] = College.objects.create(name=name, country="USA")
+            for code, rank in by_source.items():
+                CollegeRanking.objects.create(
+                    college=college, source=sources[code], rank=rank, ranking_year=2025,
+                )
+        for name in ("A", "B"):
+            CollegeRanking.objects.create(
+                college=self.colleges[name], source=sources["qs"],
+                rank=ranks[name]["qs"], ranking_year=2024,
+            )
+
+    def test_pairwise_correlations(self):
+        response = self.client.get(reverse('agreement-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual((data['year'], data['sources']), (2025, ['arwu', 'qs', 'the']))
+        self.assertEqual(data['shared'], [[4, 4, 4], [4, 5, 4], [4, 4, 4]])
+        for table in ('spearman', 'kendall'):
+            self.assertEqual(data[table], [[1.0, -1.0, -1.0], [-1.0, 1.0, 1.0], [-1.0, 1.0, 1.0]])
+
+        # Two shared colleges are too few to correlate
+        older = self.client.get(reverse('agreement-list'), {'year': 2024}).data
+        self.assertEqual(older['shared'][1][1], 2)
+        self.assertEqual(older['spearman'], [[None] * 3] * 3)
+        self.assertEqual(older['disagreements'], [])
+
+    def test_disagreement_scores(self):
+        data = self.client.get(reverse('agreement-list'), {'limit': 3}).data
+        self.assertEqual(data['colleges_compared'], 4)
+        rows = data['disagreements']
+        self.assertEqual([row['college']['name'] for row in rows], ['A', 'D', 'B'])
+        self.assertAlmostEqual(rows[0]['disagreement'], 2 / 9, places=4)
+        self.assertEqual(rows[0]['ranks'], {'arwu': 4, 'qs': 1, 'the': 1})
+        self.assertEqual(rows[0]['normalized_ranks'], {'arwu': 1.0, 'qs': 0.0, 'the': 0.0})
+
+        bad = self.client.get(reverse('agreement-list'), {'limit': 'all'})
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_kendall_tau_with_ties_matches_pair_counting(self):
+        rng = np.random.default_rng(7)
+        a = rng.integers(1, 15, 60).astype(float)
+        b = rng.integers(1, 15, 60).astype(float)
+        concordant = discordant = a_only = b_only = 0
+        for i, j in combinations(range(len(a)), 2):
+            x, y = np.sign(a[i] - a[j]), np.sign(b[i] - b[j])
+            if x == 0 and y == 0:
+                continue
+            if x == 0:
+                a_only += 1
+            elif y == 0:
+                b_only += 1
+            elif x == y:
+                concordant += 1
+            else:
+                discordant += 1
+        expected = (concordant - discordant) / (
+            ((concordant + discordant + a_only) * (concordant + discordant + b_only)) ** 0.5
+        )
+        self.assertAlmostEqual(kendall_tau(a, b), expected, places=10)
+        self.assertEqual(
+            count_inversions(b),
+            sum(b[i] > b[j] for i, j in combinations(range(len(b)), 2)),
+        )
@@ -0,0 +1,298 @@
+"""
+Immutable dataset versions
+
+Every ranking row belongs to a ``DatasetVersion`` and readers only ever see
+the version the single-row ``ActiveDataset`` pointer names
+(``CollegeRanking.objects`` filters on it in the same SQL statement). An
+ingest therefore never touches what readers see:
+
+1. ``create_staging_version`` copies the active rankings (and their
+   categories) into a new version with two ``INSERT ... SELECT``
+   statements, so a partial ingest (one source) starts from the full data;
+2. the ingest writes into the staging version;
+3. ``activate_version`` validates it, derives its ranking categories and
+   flips the pointer with one ``UPDATE``. Readers switch from one complete
+   version to the next, and the active version is never written to.
+
+A staged version records the version it was cloned from, and activation
+is refused once another version has been activated in the meantime: two
+overlapping ingests would otherwise both start from the same data, and
+the second activation would silently drop the first one's rows.
+
+Superseded versions stay intact, so ``rollback_version`` is another pointer
+flip; ``prune_versions`` deletes all but the most recent ones, and staging
+versions abandoned for longer than ``STAGING_MAX_AGE``, after every
+activation by an ingest. ``staged_version`` wraps steps 1-3 and the pruning
+for the ingest commands, which then run the post-ingest pipeline for the
+new version. Colleges and sources are
+shared reference data and are not versioned.
+"""
+
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .categories import rebuild_categories
+from .dataset import invalidate_dataset_version
+from .models import (
+    ACTIVE_POINTER_ID,
+    ActiveDataset,
+    CollegeProfile,
+    CollegeRanking,
+    DatasetVersion,
+    RankingCategory,
+    active_version_id,
+)
+from .readmodel import load_matrix
+
+KEEP_VERSIONS = 3
+# Staging versions older than this are abandoned ingests (killed imports)
+STAGING_MAX_AGE = timedelta(days=7)
+# A new version may not lose more than half of the active version's rankings
+MIN_RETAINED_SHARE = 0.5
+
+
+class NothingStaged(Exception):
+    """Raised in a ``staged_version`` block to discard the version instead of activating it"""
+
+
+class DatasetValidationError(ValueError):
+    """A staged version failed validation and was not activated"""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__('; '.join(problems))
+
+
+def _columns(model, exclude):
+    return [f.column for f in model._meta.concrete_fields if f.name not in exclude]
+
+
+def _clone_rankings(from_version_id, to_version_id):
+    """Copy one version's rankings and categories into another; returns rankings copied"""
+    quote = connection.ops.quote_name
+    rankings = quote(CollegeRanking._meta.db_table)
+    categories = quote(RankingCategory._meta.db_table)
+    ranking_columns = ', '.join(quote(c) for c in _columns(CollegeRanking, ('id', 'version')))
+    category_columns = _columns(RankingCategory, ('id', 'college_ranking'))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {rankings} ({ranking_columns}, {quote("version_id")}) '
+            f'SELECT {ranking_columns}, %s FROM {rankings} WHERE {quote("version_id")} = %s',
+            [to_version_id, from_version_id],
+        )
+        copied = cursor.rowcount
+        # Match each category's ranking to its copy on (college, source, year)
+        cursor.execute(
+            f'INSERT INTO {categories} ({quote("college_ranking_id")}, '
+            f'{", ".join(quote(c) for c in category_columns)}) '
+            f'SELECT dst.{quote("id")}, {", ".join(f"c.{quote(col)}" for col in category_columns)} '
+            f'FROM {categories} c '
+            f'JOIN {rankings} src ON src.{quote("id")} = c.{quote("college_ranking_id")} '
+            f'JOIN {rankings} dst ON dst.{quote("college_id")} = src.{quote("college_id")} '
+            f'AND dst.{quote("source_id")} = src.{quote("source_id")} '
+            f'AND dst.{quote("ranking_year")} = src.{quote("ranking_year")} '
+            f'AND dst.{quote("version_id")} = %s '
+            f'WHERE src.{quote("version_id")} = %s',
+            [to_version_id, from_version_id],
+        )
+    return copied
+
+
+def _delete_rankings(version_id):
+    """
+    Delete a version's rankings and categories with two statements.
+
+    ``QuerySet.delete()`` would load every row to send the ranking signals,
+    which only matter for the active version.
+    """
+    quote = connection.ops.quote_name
+    rankings = quote(CollegeRanking._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(RankingCategory._meta.db_table)} '
+            f'WHERE {quote("college_ranking_id")} IN '
+            f'(SELECT {quote("id")} FROM {rankings} WHERE {quote("version_id")} = %s)',
+            [version_id],
+        )
+        cursor.execute(f'DELETE FROM {rankings} WHERE {quote("version_id")} = %s', [version_id])
+
+
+def create_staging_version(label='', clone=True):
+    """A new staging version, starting as a copy of the active one unless ``clone`` is off"""
+    source_id = active_version_id()
+    with transaction.atomic():
+        version = DatasetVersion.objects.create(label=label[:100], base_version_id=source_id)
+        if clone:
+            version.rankings_count = _clone_rankings(source_id, version.pk)
+            version.save(update_fields=['rankings_count'])
+    return version
+
+
+def validate_version(version, force=False):
+    """
+    Problems that should stop ``version`` from being activated.
+
+    Absolute checks (no rankings, out-of-range values, another version
+    activated since this one was staged) always apply;
+    ``force`` skips the comparison with the active version (rankings or
+    whole sources disappearing).
+    """
+    rankings = CollegeRanking.all_versions.filter(version=version)
+    active_id = active_version_id()
+    problems = []
+    moved = _base_moved(version, active_id)
+    if moved:
+        problems.append(moved)
+    count = rankings.count()
+    if not count:
+        problems.append('version has no rankings')
+
+    invalid = rankings.filter(Q(rank__lt=1) | Q(score__lt=0) | Q(score__gt=100)).count()
+    if invalid:
+        problems.append(f'{invalid} rankings have a rank below 1 or a score outside 0-100')
+
+    if not force and active_id != version.pk:
+        active = CollegeRanking.all_versions.filter(version_id=active_id)
+        active_count = active.count()
+        if count < active_count * MIN_RETAINED_SHARE:
+            problems.append(
+                f'version has {count} rankings, fewer than {MIN_RETAINED_SHARE:.0%} '
+                f'of the active version ({active_count})'
+            )
+        missing = set(active.values_list('source__code', flat=True).distinct()) - set(
+            rankings.values_list('source__code', flat=True).distinct()
+        )
+        if missing:
+            problems.append(f"sources missing from version: {', '.join(sorted(missing))}")
+    return problems
+
+
+def _base_moved(version, active_id):
+    """Why a staging version may not replace ``active_id``, or ``None`` if it may"""
+    if version.status != 'STAGING' or version.base_version_id in (None, active_id):
+        return None
+    return (
+        f'v{version.pk} was staged from v{version.base_version_id}, but v{active_id} has been '
+        f'activated since; activating it would drop that version\'s changes (re-run the ingest)'
+    )
+
+
+def _fail(version, problems):
+    version.status = 'FAILED'
+    version.notes = '; '.join(problems)
+    version.save(update_fields=['status', 'notes'])
+    raise DatasetValidationError(problems)
+
+
+def activate_version(version, force=False):
+    """
+    Validate ``version``, derive its categories (on first activation) and
+    make it the one readers see.
+
+    The switch is a single ``UPDATE`` of the pointer row, which is locked
+    while checking that the version's base is still the active one
+    (``force`` does not skip that check). Returns the id of the previously
+    active version. Raises ``DatasetValidationError`` (and marks the version
+    failed) if validation finds problems.
+    """
+    if version.status == 'FAILED':
+        raise DatasetValidationError([f'v{version.pk} failed validation: {version.notes}'])
+    problems = validate_version(version, force=force)
+    if problems:
+        _fail(version, problems)
+    if version.activated_at is None:
+        # Derived data that lives in the version is written before readers see it
+        rankings = CollegeRanking.all_versions.filter(version=version)
+        rebuild_categories(load_matrix(f'v{version.pk}', rankings), version=version)
+
+    now = timezone.now()
+    with transaction.atomic():
+        previous = ActiveDataset.objects.select_for_update().values_list(
+            'version_id', flat=True
+        ).get(pk=ACTIVE_POINTER_ID)
+        moved = _base_moved(version, previous)
+        if not moved:
+            version.status = 'VALIDATED'
+            version.rankings_count = CollegeRanking.all_versions.filter(version=version).count()
+            version.activated_at = now
+            version.save(update_fields=['status', 'rankings_count', 'activated_at'])
+            ActiveDataset.objects.filter(pk=ACTIVE_POINTER_ID).update(version=version, updated_at=now)
+            # Profiles embed ranking ids; views compute live until the pipeline rebuilds them
+            CollegeProfile.objects.all().delete()
+    if moved:
+        _fail(version, [moved])
+    invalidate_dataset_version()
+    return previous
+
+
+def discard_version(version):
+    """Delete a version that is not active"""
+    if version.pk == active_version_id():
+        raise ValueError(f'v{version.pk} is the active version')
+    with transaction.atomic():
+        _delete_rankings(version.pk)
+        version.delete()
+
+
+@contextmanager
+def staged_version(label='', clone=True, force=False):
+    """
+    Stage a version for the ``with`` block, then validate and activate it
+    and prune old versions.
+
+    If the block raises, the staging version is discarded and nothing
+    readers see changes; ``NothingStaged`` is not re-raised, so a block
+    that finds nothing to write can raise it to skip the activation.
+    """
+    version = create_staging_version(label, clone=clone)
+    try:
+        yield version
+    except NothingStaged:
+        discard_version(version)
+        return
+    except BaseException:
+        discard_version(version)
+        raise
+    activate_version(version, force=force)
+    prune_versions()
+
+
+def rollback_version():
+    """Re-activate the validated version activated before the current one"""
+    active_id = active_version_id()
+    previous = DatasetVersion.objects.filter(
+        status='VALIDATED', activated_at__isnull=False, pk__lt=active_id,
+    ).order_by('-pk').first()
+    if previous is None:
+        raise ValueError('No earlier validated version to roll back to')
+    activate_version(previous, force=True)
+    return previous
+
+
+def prune_versions(keep=KEEP_VERSIONS, staging_max_age=STAGING_MAX_AGE):
+    """
+    Delete validated and failed versions beyond the ``keep`` most recent,
+    and staging versions created more than ``staging_max_age`` ago.
+
+    The active version and recent staging versions (ingests in progress or
+    resumable) are always kept. Returns the number of versions deleted.
+    """
+    active_id = active_version_id()
+    kept = list(
+        DatasetVersion.objects.filter(status='VALIDATED').order_by('-pk').values_list(
+            'pk', flat=True
+        )[:keep]
+    )
+    stale = DatasetVersion.objects.exclude(pk__in=kept + [active_id]).exclude(
+        status='STAGING', created_at__gte=timezone.now() - staging_max_age
+    )
+    deleted = 0
+    for version in stale:
+        discard_version(version)
+        deleted += 1
+    return deleted
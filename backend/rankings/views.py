@@ -2,14 +2,25 @@
 Django REST API Views
 """
 
+import hashlib
+
+import numpy as np
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q, Avg, F
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
 
-from .models import College, CollegeRanking, RankingSource, RankingCategory
+from .models import (
+    College,
+    CollegeRanking,
+    RankingSource,
+    RankingCategory,
+)
 from .serializers import (
     CollegeSerializer, 
     CollegeDetailSerializer,
@@ -17,22 +28,77 @@ from .serializers import (
     RankingSourceSerializer,
     CompositeRankingSerializer
 )
+from .aggregation import METHODS as AGGREGATION_METHODS
+from .agreement import DISAGREEMENT_LIMIT, MAX_DISAGREEMENTS, get_agreement
+from .composites import (
+    CompositeSpec,
+    aggregate_composite,
+    average_composite,
+    weighted_composite,
+)
+from .bitmaps import CollegeRows, filter_by_sources, name_ordered_ids
+from .analysis import analyze_strengths, build_breakdown, rankings_prefetch
+from .facets import faceted_search
+from .fieldsets import Fieldset
+from .dataset import get_dataset_version, get_latest_year
+from .export import EXPORT_FORMATS, stream_export
+from .middleware import choose_encoding
+from .movers import COMPOSITE_SOURCES, default_years, get_movers
+from .pagination import StandardResultsSetPagination
+from .percentiles import bulk_analysis
+from .profiles import get_profile_documents
+from .publish import SNAPSHOT_MAX_AGE, snapshot_file
+from .readmodel import get_matrix
+from .similarity import MAX_SIMILAR_LIMIT, SIMILAR_LIMIT, find_similar
 import logging
 
 logger = logging.getLogger(__name__)
 
+BULK_ANALYSIS_MAX = 1000
+
+
+def requested_year(request, name='year'):
+    """An integer year query parameter, or ``None``; raises ``ValueError`` if malformed"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+
+def year_error(e):
+    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Applies ``?fields=`` / ``?exclude=`` / ``?expand=`` / ``?preset=`` to the
+    view's serializer and trims the queryset to match
+    """
+    
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_request(self.request, self.get_serializer_class())
+        return self._fieldset
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fieldset', self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+    
+    def optimize_queryset(self, queryset):
+        return self.get_serializer_class().optimize_queryset(queryset, self.get_fieldset())
+    
+    def get_queryset(self):
+        return self.optimize_queryset(super().get_queryset())
 
 
-class CollegeViewSet(viewsets.ReadOnlyModelViewSet):
+class CollegeViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoints for College data
     """
-    queryset = College.objects.all().prefetch_related('collegeranking_set')
+    queryset = College.objects.all()
     serializer_class = CollegeSerializer
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -40,52 +106,172 @@ class CollegeViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
     
+    BUNDLE_SECTIONS = ['analysis', 'breakdown', 'similar']
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CollegeDetailSerializer
         return CollegeSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'rankings_breakdown'):
+            # One prefetch feeds the detail, composites and every bundled section
+            queryset = queryset.prefetch_related(rankings_prefetch())
+        return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        College detail, optionally bundled with the rest of the college page
+        GET /api/colleges/{id}/?include=analysis,breakdown,similar&year=2025
+        
+        Composites and bundled sections cover one year, the latest by default.
+        """
+        try:
+            year = requested_year(request)
+        except ValueError as e:
+            return year_error(e)
+        latest = year is None or year == get_latest_year()
+        include = [
+            part.strip() for part in request.query_params.get('include', '').split(',')
+            if part.strip()
+        ]
+        unknown = set(include) - set(self.BUNDLE_SECTIONS)
+        if unknown:
+            return Response(
+                {'error': f"Unknown include: {', '.join(sorted(unknown))}. "
+                          f"Available: {', '.join(self.BUNDLE_SECTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        sections = [name for name in include if name != 'similar']
+        documents = None
+        if self.get_fieldset() is None and latest:
+            documents = get_profile_documents(kwargs['pk'], ['detail'] + sections)
+        
+        if documents is not None:
+            # Served straight from the precomputed profile
+            data = documents['detail']
+            for name in sections:
+                data[name] = documents[name]
+        else:
+            college = self.get_object()
+            rankings = list(college.collegeranking_set.all())
+            context = dict(self.get_serializer_context(), year=year)
+            data = self.get_serializer(college, context=context).data
+            if 'analysis' in include:
+                data['analysis'] = analyze_strengths(college, rankings, year)
+            if 'breakdown' in include:
+                data['breakdown'] = build_breakdown(college, rankings, year)
+        
+        if 'similar' in include:
+            data['similar'] = find_similar(get_matrix(), data['id'], year=year)
+        
+        return Response(data)
+    
     @action(detail=True, methods=['get'])
     def rankings_breakdown(self, request, pk=None):
         """
         Get detailed breakdown of college rankings across all sources
-        GET /api/colleges/{id}/rankings_breakdown/
+        GET /api/colleges/{id}/rankings_breakdown/?year=2025
         """
+        try:
+            year = requested_year(request)
+        except ValueError as e:
+            return year_error(e)
+        if year is None or year == get_latest_year():
+            documents = get_profile_documents(pk, ['breakdown'])
+            if documents is not None:
+                return Response(documents['breakdown'])
+        
         college = self.get_object()
-        rankings = college.collegeranking_set.all().select_related('source')
-        
-        breakdown = {
-            'college': CollegeSerializer(college).data,
-            'international_rankings': [],
-            'american_rankings': [],
-            'composite_scores': {
-                'international': college.composite_score_international,
-                'american': college.composite_score_american,
-            },
-            'all_rankings': CollegeRankingSerializer(rankings, many=True).data,
-        }
-        
-        # Separate by region
-        for ranking in rankings:
-            data = CollegeRankingSerializer(ranking).data
-            if ranking.source.region == 'INTERNATIONAL':
-                breakdown['international_rankings'].append(data)
-            else:
-                breakdown['american_rankings'].append(data)
+        return Response(build_breakdown(college, list(college.collegeranking_set.all()), year))
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Colleges with the most similar ranking profiles (ranks, scores and
+        metrics across sources), optionally within a region or countries
+        GET /api/colleges/{id}/similar/?limit=10&region=AMERICAN&country=USA,Canada&year=2025
+        """
+        if not str(pk).isdigit():
+            raise Http404
+        try:
+            year = requested_year(request)
+            limit = int(request.query_params.get('limit', SIMILAR_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'year and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        countries = [
+            name.strip()
+            for value in request.query_params.getlist('country')
+            for name in value.split(',')
+            if name.strip()
+        ]
+        matrix = get_matrix()
+        if matrix.college_positions([int(pk)])[0] < 0:
+            # Unknown college, or one added since the matrix was loaded
+            get_object_or_404(College, pk=pk)
+        if year is not None and matrix.year_position(year) is None:
+            return Response(
+                {'error': f'no rankings for year {year}'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            similar = find_similar(
+                matrix, int(pk), year=year, limit=max(1, min(limit, MAX_SIMILAR_LIMIT)),
+                region=request.query_params.get('region'), countries=countries,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'college': int(pk),
+            'year': year or matrix.latest_year,
+            'results': similar,
+        })
+    
+    @action(detail=False, methods=['get'], url_path='filter')
+    def faceted(self, request):
+        """
+        Filter colleges by source ranks, metrics, composites and geography,
+        with facet counts for the matches
+        GET /api/colleges/filter/?rank.qs=..100&research_impact=80..
+            &composite.international=70..&country=USA&sort=-research_impact
         
-        return Response(breakdown)
+        Filters and sort keys are described in ``rankings.facets``; they
+        cover one ``year`` with data (default: the latest).
+        """
+        matrix = get_matrix()
+        try:
+            year = requested_year(request) or matrix.latest_year
+            if year is not None and matrix.year_position(year) is None:
+                raise ValueError(f'no rankings for year {year}')
+            college_ids, facets = faceted_search(matrix, request.query_params, year)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        page = self.paginate_queryset(CollegeRows(college_ids, self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data.update({'year': year, 'facets': facets})
+        return response
     
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
-        Search colleges by name, country
+        Search colleges by name, country and the sources that rank them
         GET /api/colleges/search/?q=harvard
+        GET /api/colleges/search/?source=qs%26usnews%26!arwu&year=2025
+        
+        ``source`` is a source code or a boolean expression of them
+        (``&``, ``|``, ``!``, parentheses; see ``rankings.bitmaps``),
+        matched against rankings in ``year`` or, by default, any year.
         """
         query = request.query_params.get('q', '')
         country = request.query_params.get('country', '')
         ranking_source = request.query_params.get('source', '')
         
-        queryset = self.queryset
+        queryset = self.get_queryset()
         
         if query:
             queryset = queryset.filter(
@@ -97,9 +283,19 @@ class CollegeViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(country__icontains=country)
         
         if ranking_source:
-            queryset = queryset.filter(
-                collegeranking__source__code=ranking_source
-            ).distinct()
+            matrix = get_matrix()
+            if query or country:
+                candidates = queryset.values_list('id', flat=True)
+                college_ids = np.fromiter(candidates.iterator(), dtype=np.int64)
+            else:
+                college_ids = name_ordered_ids(matrix)
+            try:
+                college_ids = filter_by_sources(
+                    matrix, ranking_source, college_ids, year=requested_year(request)
+                )
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = CollegeRows(college_ids, queryset)
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -115,28 +311,55 @@ class CompositeRankingViewSet(viewsets.ViewSet):
     Composite rankings calculated from multiple sources
     """
     
-    @action(detail=False, methods=['get'])
-    def international(self, request):
+    def _composite_response(self, request, region):
         """
-        Get international composite rankings (average of 5 sources)
-        GET /api/composite-rankings/international/
+        Rank on the in-memory matrix (or precomputed aggregates), then load
+        and serialize just the page. ``?method=`` picks a rank-aggregation
+        method instead of the score average. Every method ranks one
+        ``?year=`` (default: the latest).
         """
-        colleges = College.objects.annotate(
-            avg_score=Avg(
-                'collegeranking__score',
-                filter=Q(collegeranking__source__region='INTERNATIONAL')
+        method = request.query_params.get('method', 'average')
+        if method != 'average' and method not in AGGREGATION_METHODS:
+            return Response(
+                {'error': f"method must be one of: average, {', '.join(AGGREGATION_METHODS)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        ).filter(avg_score__isnull=False).order_by('-avg_score')
-        
+
+        fieldset = Fieldset.from_request(request, CompositeRankingSerializer)
+
+        def optimize(queryset):
+            return CompositeRankingSerializer.optimize_queryset(queryset, fieldset)
+
+        matrix = get_matrix()
+        try:
+            year = requested_year(request) or matrix.latest_year
+        except ValueError as e:
+            return year_error(e)
+        if method == 'average':
+            rows = average_composite(matrix, region, year, queryset=optimize(College.objects.all()))
+        else:
+            rows = aggregate_composite(matrix, region, year, method, optimize=optimize)
+
         page = StandardResultsSetPagination()
-        paginated = page.paginate_queryset(colleges, request)
-        
+        paginated = page.paginate_queryset(rows, request)
+
         serializer = CompositeRankingSerializer(
-            paginated, 
-            many=True, 
-            context={'region': 'INTERNATIONAL'}
+            paginated,
+            many=True,
+            context={'region': region},
+            fieldset=fieldset,
         )
-        return page.get_paginated_response(serializer.data)
+        response = page.get_paginated_response(serializer.data)
+        response.data.update({'method': method, 'year': year})
+        return response
+
+    @action(detail=False, methods=['get'])
+    def international(self, request):
+        """
+        Get international composite rankings (average of 5 sources)
+        GET /api/composite-rankings/international/
+        """
+        return self._composite_response(request, 'INTERNATIONAL')
     
     @action(detail=False, methods=['get'])
     def american(self, request):
@@ -144,22 +367,50 @@ class CompositeRankingViewSet(viewsets.ViewSet):
         Get American composite rankings (average of 5 sources)
         GET /api/composite-rankings/american/
         """
-        colleges = College.objects.annotate(
-            avg_score=Avg(
-                'collegeranking__score',
-                filter=Q(collegeranking__source__region='AMERICAN')
-            )
-        ).filter(avg_score__isnull=False).order_by('-avg_score')
+        return self._composite_response(request, 'AMERICAN')
+
+    @action(detail=False, methods=['get'])
+    def custom(self, request):
+        """
+        Rank colleges by a user-weighted composite of any sources
+        GET /api/composite-rankings/custom/?weights=qs:40,the:40,arwu:20
+            &year=2025&min_sources=2&missing=renormalize|zero|exclude
         
+        ``year`` defaults to the latest year.
+        """
+        matrix = get_matrix()
+        params = request.query_params
+        try:
+            spec = CompositeSpec.parse(
+                params.get('weights'),
+                year=params.get('year') or matrix.latest_year,
+                min_sources=params.get('min_sources'),
+                missing=params.get('missing'),
+                source_codes=matrix.source_codes,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        fieldset = Fieldset.from_request(request, CompositeRankingSerializer)
+        colleges = CompositeRankingSerializer.optimize_queryset(College.objects.all(), fieldset)
+        rows = weighted_composite(matrix, spec, queryset=colleges)
+
         page = StandardResultsSetPagination()
-        paginated = page.paginate_queryset(colleges, request)
-        
+        paginated = page.paginate_queryset(rows, request)
         serializer = CompositeRankingSerializer(
-            paginated, 
-            many=True, 
-            context={'region': 'AMERICAN'}
+            paginated,
+            many=True,
+            context={'region': 'CUSTOM'},
+            fieldset=fieldset,
         )
-        return page.get_paginated_response(serializer.data)
+        response = page.get_paginated_response(serializer.data)
+        response.data.update({
+            'weights': dict(spec.weights),
+            'year': spec.year,
+            'min_sources': spec.min_sources,
+            'missing': spec.missing,
+        })
+        return response
 
 
 class RankingSourceViewSet(viewsets.ReadOnlyModelViewSet):
@@ -172,7 +423,7 @@ class RankingSourceViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['region', 'name']
 
 
-class CollegeRankingViewSet(viewsets.ReadOnlyModelViewSet):
+class CollegeRankingViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     API for individual college rankings
     """
@@ -198,7 +449,7 @@ class CollegeRankingViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         source = get_object_or_404(RankingSource, code=source_code)
-        rankings = self.queryset.filter(source=source).order_by('rank')
+        rankings = self.get_queryset().filter(source=source).order_by('rank')
         
         page = self.paginate_queryset(rankings)
         if page is not None:
@@ -232,7 +483,9 @@ class ComparisonViewSet(viewsets.ViewSet):
     def compare(self, request):
         """
         Compare multiple colleges
-        GET /api/comparison/compare/?ids=1,2,3
+        GET /api/comparison/compare/?ids=1,2,3&year=2025
+        
+        Composites are for one year, the latest by default.
         """
         ids = request.query_params.get('ids', '')
         
@@ -250,16 +503,22 @@ class ComparisonViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        colleges = College.objects.filter(id__in=college_ids).prefetch_related('collegeranking_set')
+        try:
+            year = requested_year(request)
+        except ValueError as e:
+            return year_error(e)
+        
+        colleges = College.objects.filter(id__in=college_ids).prefetch_related(rankings_prefetch())
         
         comparison_data = []
         for college in colleges:
             rankings = college.collegeranking_set.all()
+            composites = college.composite_scores(year)
             comparison_data.append({
                 'college': CollegeSerializer(college).data,
                 'rankings': CollegeRankingSerializer(rankings, many=True).data,
-                'composite_international': college.composite_score_international,
-                'composite_american': college.composite_score_american,
+                'composite_international': composites['international'],
+                'composite_american': composites['american'],
             })
         
         return Response(comparison_data)
@@ -274,7 +533,7 @@ class StrengthsWeaknessesViewSet(viewsets.ViewSet):
     def analyze(self, request):
         """
         Analyze college strengths and weaknesses
-        GET /api/analysis/analyze/?college_id=1
+        GET /api/analysis/analyze/?college_id=1&year=2025
         """
         college_id = request.query_params.get('college_id')
         
@@ -284,34 +543,192 @@ class StrengthsWeaknessesViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        try:
+            year = requested_year(request)
+        except ValueError as e:
+            return year_error(e)
+        if year is None or year == get_latest_year():
+            documents = get_profile_documents(college_id, ['analysis'])
+            if documents is not None:
+                return Response(documents['analysis'])
+        
         college = get_object_or_404(College, id=college_id)
-        rankings = college.collegeranking_set.all()
-        
-        # Aggregate metrics across all rankings
-        avg_metrics = {}
-        metric_fields = [
-            'academic_reputation',
-            'employer_reputation',
-            'faculty_student_ratio',
-            'research_impact',
-            'international_diversity',
-            'teaching_quality',
-            'student_satisfaction'
+        rankings = list(college.collegeranking_set.all())
+        return Response(analyze_strengths(college, rankings, year))
+    
+    @action(detail=False, methods=['get', 'post'])
+    def bulk(self, request):
+        """
+        Percentile strengths and weaknesses for many colleges at once
+        GET  /api/analysis/bulk/?college_ids=1,2,3&year=2025
+        POST /api/analysis/bulk/  {"college_ids": [1, 2, 3], "year": 2025}
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        raw_ids = params.get('college_ids') or []
+        if isinstance(raw_ids, str):
+            raw_ids = [part for part in raw_ids.split(',') if part.strip()]
+        try:
+            college_ids = list(dict.fromkeys(int(i) for i in raw_ids))
+            year = int(params['year']) if params.get('year') else None
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'college_ids must be integers (and year an integer)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not college_ids:
+            return Response(
+                {'error': 'college_ids parameter required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(college_ids) > BULK_ANALYSIS_MAX:
+            return Response(
+                {'error': f'At most {BULK_ANALYSIS_MAX} colleges per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        matrix = get_matrix()
+        year = year or matrix.latest_year
+        analyses = bulk_analysis(matrix, college_ids, year)
+        colleges = College.objects.only(*CollegeSerializer.Meta.fields).in_bulk(list(analyses))
+        results = [
+            dict(
+                college=CollegeSerializer(colleges[college_id]).data,
+                year=year,
+                **analyses[college_id],
+            )
+            for college_id in college_ids if college_id in colleges
         ]
+        return Response({
+            'year': year,
+            'results': results,
+            'missing': [i for i in college_ids if i not in colleges],
+        })
+
+
+class MoversViewSet(viewsets.ViewSet):
+    """
+    Year-over-year rank movement
+    """
+    
+    def list(self, request):
+        """
+        Biggest rank gains and drops between two years, for one source or
+        a regional composite (composite-international / composite-american)
+        GET /api/movers/?source=qs&from_year=2024&to_year=2025&limit=20
+        
+        Years default to the latest year and the one before it.
+        """
+        source = request.query_params.get('source', '')
+        if not source:
+            return Response(
+                {'error': f"source parameter required (a source code or "
+                          f"{' / '.join(COMPOSITE_SOURCES)})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        for field in metric_fields:
-            values = [float(getattr(r, field)) for r in rankings if getattr(r, field) is not None]
-            if values:
-                avg_metrics[field] = round(sum(values) / len(values), 2)
+        matrix = get_matrix()
+        try:
+            from_year, to_year = default_years(
+                matrix, requested_year(request, 'from_year'), requested_year(request, 'to_year')
+            )
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+            return Response(get_movers(matrix, source, from_year, to_year, limit))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AgreementViewSet(viewsets.ViewSet):
+    """
+    How much the ranking sources agree with each other
+    """
+
+    def list(self, request):
+        """
+        Spearman and Kendall correlation between every pair of sources over
+        the colleges both rank, and the colleges they disagree on most
+        GET /api/agreement/?year=2025&limit=20
+
+        Year defaults to the latest year; limit caps the disagreements listed.
+        """
+        try:
+            year = requested_year(request)
+            limit = min(int(request.query_params.get('limit', DISAGREEMENT_LIMIT)), MAX_DISAGREEMENTS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_agreement(get_matrix(), year, max(limit, 0)))
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Bulk dataset export
+    """
+    
+    def _export_response(self, request, table, **filters):
+        fmt = request.query_params.get('fmt', 'ndjson')
+        try:
+            chunks = stream_export(
+                fmt, table, year=requested_year(request),
+                region=request.query_params.get('region') or None, **filters
+            )
+        except ValueError as e:
+            return year_error(e)
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Identify strengths (top 3 metrics) and weaknesses (bottom 3)
-        sorted_metrics = sorted(avg_metrics.items(), key=lambda x: x[1], reverse=True)
-        strengths = sorted_metrics[:3] if len(sorted_metrics) >= 3 else sorted_metrics
-        weaknesses = sorted_metrics[-3:] if len(sorted_metrics) >= 3 else []
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{table}-{get_dataset_version()}.{fmt}"'
+        )
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def rankings(self, request):
+        """
+        Stream every ranking as NDJSON, CSV, Arrow IPC or Parquet
+        GET /api/export/rankings/?fmt=ndjson&source=qs&region=INTERNATIONAL&year=2025
         
-        return Response({
-            'college': CollegeSerializer(college).data,
-            'strengths': [{'metric': s[0], 'score': s[1]} for s in strengths],
-            'weaknesses': [{'metric': w[0], 'score': w[1]} for w in weaknesses],
-            'all_metrics': avg_metrics,
-        })
+        Rows are read with a server-side cursor and encoded as they are
+        sent, so memory stays flat however large the export.
+        """
+        return self._export_response(
+            request, 'rankings', source=request.query_params.get('source') or None
+        )
+    
+    @action(detail=False, methods=['get'])
+    def composites(self, request):
+        """
+        Stream the precomputed rank-aggregation composites
+        GET /api/export/composites/?fmt=arrow&region=INTERNATIONAL&year=2025&method=borda
+        """
+        return self._export_response(
+            request, 'composites', method=request.query_params.get('method') or None
+        )
+
+
+@require_safe
+def api_snapshot(request, path):
+    """
+    A file of the currently published API snapshot, in the client's
+    preferred pre-compressed encoding
+    GET /api-snapshot/manifest.json
+    """
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    located = snapshot_file(path, encoding)
+    if located is None:
+        raise Http404('No such file in the current snapshot')
+    snapshot, file, content_encoding = located
+    # Snapshot directories are immutable, so their name identifies the bytes
+    name = f'{snapshot.name}/{file.relative_to(snapshot)}'
+    etag = f'"{hashlib.sha1(name.encode()).hexdigest()[:16]}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            file.open('rb'), content_type='application/json', filename=path.rsplit('/', 1)[-1]
+        )
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = f'public, max-age={SNAPSHOT_MAX_AGE}'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
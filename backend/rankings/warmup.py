@@ -0,0 +1,134 @@
+"""
+Worker warm-up
+
+A freshly started worker pays on its first requests for the URLconf and
+view imports, the dataset version, the in-memory rankings matrix, a cold
+database page cache and new database connections (a TLS handshake each
+on hosted Postgres). ``warm_up`` pays all of it before the worker accepts
+traffic: it opens a connection to every configured database, then serves
+``WARM_UP_PATHS`` (the source list, the first page of each composite and
+a search) in-process through the WSGI application, so the requests go
+through the same middleware, routing and caches as real ones. Indexes
+that only some requests build (the source membership bitmaps and name
+order behind ``?source=`` searches) are built directly by
+``build_indexes``, since no fixed path can name a source that exists.
+
+``gunicorn.conf.py`` calls it from ``post_fork``; ``python manage.py
+profile_startup --warm-up`` measures the difference.
+"""
+
+import io
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_PATHS = [
+    '/api/sources/',
+    '/api/composite-rankings/international/',
+    '/api/composite-rankings/american/',
+    '/api/colleges/',
+    '/api/colleges/search/?q=university',
+]
+
+
+def warm_up_host():
+    """A host name that passes ``ALLOWED_HOSTS`` validation"""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def open_connections():
+    """Connect to every configured database; returns the aliases that failed"""
+    failed = []
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError as e:
+            logger.warning('Warm-up could not connect to %r: %s', alias, e)
+            failed.append(alias)
+    return failed
+
+
+def serve(application, path, host):
+    """
+    GET ``path`` through a WSGI ``application``; returns the status code and
+    the time to the first body chunk in seconds
+    """
+    url = urlsplit(path)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    start = time.perf_counter()
+    body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        first_byte = None
+        for _ in body:
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+    finally:
+        # Fires request_finished, which keeps or recycles connections like a real request
+        body.close()
+    if first_byte is None:
+        first_byte = time.perf_counter() - start
+    return int(statuses[0].split()[0]), first_byte
+
+
+def build_indexes():
+    """Build the rankings matrix's lazily built search indexes"""
+    # Imported here so profile_startup attributes numpy to warm-up, not to start-up
+    from .bitmaps import name_ordered_ids, source_bitmaps
+    from .readmodel import get_matrix
+
+    matrix = get_matrix()
+    source_bitmaps(matrix)
+    name_ordered_ids(matrix)
+
+
+def warm_up(paths=None, application=None):
+    """
+    Open database connections, serve ``paths`` (default
+    ``WARM_UP_PATHS``) once and build the search indexes. Never raises: a worker that cannot warm up
+    still serves. Returns ``[(path, status, seconds)]``.
+    """
+    started = time.perf_counter()
+    results = []
+    try:
+        open_connections()
+        application = application or get_wsgi_application()
+        host = warm_up_host()
+        for path in WARM_UP_PATHS if paths is None else paths:
+            status, seconds = serve(application, path, host)
+            if status != 200:
+                logger.warning('Warm-up GET %s returned %s', path, status)
+            results.append((path, status, seconds))
+        build_indexes()
+    except Exception:
+        logger.exception('Worker warm-up failed')
+    logger.info(
+        'Worker warmed up in %.0fms (%d requests)',
+        (time.perf_counter() - started) * 1000,
+        len(results),
+    )
+    return results
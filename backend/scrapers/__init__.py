@@ -1,16 +1,29 @@
 # Scrapers package
-from .base_scraper import BaseScraper
-from .qs_scraper import QSScraper
-from .arwu_scraper import ARWUScraper
-from .usnews_scraper import USNewsScraper
-from .forbes_scraper import ForbesScraper
-from .niche_scraper import NicheScraper
+#
+# Scraper classes are imported on first access: importing a submodule such
+# as ``scrapers.normalize`` (used by the file importer) must not pull in
+# requests and BeautifulSoup.
+import importlib
 
-__all__ = [
-    'BaseScraper',
-    'QSScraper',
-    'ARWUScraper',
-    'USNewsScraper',
-    'ForbesScraper',
-    'NicheScraper',
-]
+_SCRAPERS = {
+    'BaseScraper': 'base_scraper',
+    'QSScraper': 'qs_scraper',
+    'ARWUScraper': 'arwu_scraper',
+    'USNewsScraper': 'usnews_scraper',
+    'ForbesScraper': 'forbes_scraper',
+    'NicheScraper': 'niche_scraper',
+}
+
+__all__ = list(_SCRAPERS)
+
+
+def __getattr__(name):
+    if name not in _SCRAPERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_SCRAPERS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
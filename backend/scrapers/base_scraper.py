@@ -9,6 +9,8 @@ import logging
 from bs4 import BeautifulSoup
 import time
 
+from .normalize import clean_text, normalize_score
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,22 +65,11 @@ class BaseScraper(ABC):
     
     def _normalize_score(self, score) -> Optional[float]:
         """Normalize score to 0-100 scale"""
-        if score is None:
-            return None
-        try:
-            # Remove any non-numeric characters except decimal point
-            if isinstance(score, str):
-                score = ''.join(c for c in score if c.isdigit() or c == '.')
-            score_float = float(score)
-            return min(100, max(0, score_float))
-        except (ValueError, TypeError):
-            return None
+        return normalize_score(score)
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
-        if not text:
-            return ""
-        return ' '.join(text.split()).strip()
+        return clean_text(text)
     
     def _rate_limit(self, seconds: float = 2.0):
         """Apply rate limiting between requests"""
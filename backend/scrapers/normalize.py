@@ -0,0 +1,43 @@
+"""
+Value normalization shared by the scrapers and the bulk importer
+"""
+
+import re
+from typing import Optional
+
+RANK_DIGITS = re.compile(r'\d+')
+THOUSANDS_SEPARATOR = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+
+
+def normalize_score(score) -> Optional[float]:
+    """Normalize score to 0-100 scale"""
+    if score is None:
+        return None
+    try:
+        # Remove any non-numeric characters except decimal point
+        if isinstance(score, str):
+            score = ''.join(c for c in score if c.isdigit() or c == '.')
+        score_float = float(score)
+        return min(100, max(0, score_float))
+    except (ValueError, TypeError):
+        return None
+
+
+def normalize_rank(rank) -> Optional[int]:
+    """First number in a published rank ('=12' -> 12, '501-600' -> 501, '1,234' -> 1234); None if absent"""
+    if rank is None:
+        return None
+    if isinstance(rank, int):
+        return rank if rank >= 1 else None
+    match = RANK_DIGITS.search(THOUSANDS_SEPARATOR.sub('', str(rank)))
+    if not match:
+        return None
+    value = int(match.group())
+    return value if value >= 1 else None
+
+
+def clean_text(text: str) -> str:
+    """Clean and normalize text"""
+    if not text:
+        return ""
+    return ' '.join(text.split()).strip()